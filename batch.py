@@ -0,0 +1,144 @@
+# --- 학급 단위 일괄 처리 ---
+# 학생 제출물 JSONL 을 읽어 StorySession 엔진으로 피드백 + 이어쓰기 다듬기(+ 최종 다듬기)를
+# 동시에 최대 N 개씩 돌리고, 입력 순서대로 결과 JSONL 을 씁니다.
+#
+#   python batch.py submissions.jsonl -o results.jsonl --concurrency 8 --final
+#   python batch.py submissions.jsonl -o results.jsonl --final --storybook storybooks/
+#
+# 입력 한 줄: {"id": "s01", "story": "앞 이야기(요약)", "question": "질문(선택)", "text": "학생이 쓴 부분",
+#              "title": "스토리북 제목(선택)"}
+# 출력 한 줄: {"id", "status": ok|rejected|error, "message", "feedback", "refined_extension",
+#              "story", "refined_story", "elapsed_ms", "storybook"(PDF 경로, --storybook 일 때)}
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_client import get_client
+from story_lint import check_input
+from story_session import StorySession
+from storybook import DEFAULT_TITLE, export_class
+
+
+def check_submission(text: str) -> str | None:
+    # 화면에서 쓰는 것과 같은 입력 검사. 통과하면 None
+    return check_input(text, "answer")
+
+
+def process_submission(submission: dict, final: bool = False) -> dict:
+    started = time.perf_counter()
+    result = {"id": submission.get("id"), "status": "ok", "message": None}
+    text = submission.get("text", "")
+    message = check_submission(text)
+    if message is not None:
+        result.update(status="rejected", message=message)
+    else:
+        try:
+            session = StorySession()
+            session.start(submission["story"].strip(), questions=[submission.get("question", "")])
+            session.choose_question(0)
+            session.submit(text)
+            result["feedback"] = session.generate_feedback()
+            session.decide_feedback(True)
+            result["refined_extension"] = session.context.segments[-1]
+            result["story"] = session.current_segment
+            if final:
+                session.finish()
+                result["refined_story"] = session.refine_final()
+        except Exception as e:
+            # 한 학생의 실패가 학급 전체를 멈추지 않게 기록만 하고 계속
+            result.update(status="error", message=f"{type(e).__name__}: {e}")
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def export_storybooks(submissions: list[dict], results: list[dict], out_dir: str, workers: int | None = None):
+    # 최종 이야기가 있는 결과마다 PDF 를 만들어 result["storybook"] 에 경로를 적음 (실패하면 message 에 사유)
+    started = time.perf_counter()
+    # id 가 겹쳐도 서로 덮어쓰지 않게 파일 이름은 export_class 가 구분해 줌 (두 번째부터 <id>-2.pdf …)
+    done = [
+        (submission, result) for submission, result in zip(submissions, results)
+        if result["status"] == "ok" and result.get("refined_story")
+    ]
+    stories = [
+        (str(result["id"]), submission.get("title") or DEFAULT_TITLE, result["refined_story"])
+        for submission, result in done
+    ]
+    for (_, result), path in zip(done, export_class(stories, out_dir, workers)):
+        if isinstance(path, Exception):
+            result["message"] = f"storybook: {type(path).__name__}: {path}"
+        else:
+            result["storybook"] = path
+    print(f"스토리북 {len(stories)}권 {time.perf_counter() - started:.1f}s → {out_dir}", file=sys.stderr)
+
+
+def read_submissions(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") if path != "-" else sys.stdin as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_batch(submissions: list[dict], concurrency: int = 8, final: bool = False, on_result=None) -> list[dict]:
+    results = []
+    done = 0
+    lock = threading.Lock()
+
+    def work(submission):
+        nonlocal done
+        result = process_submission(submission, final)
+        with lock:
+            done += 1
+            if on_result is not None:
+                on_result(done, result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        # map 은 입력 순서대로 결과를 돌려줌 (끝나는 순서와 무관)
+        for result in pool.map(work, submissions):
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학생 제출물 일괄 피드백/다듬기")
+    parser.add_argument("input", help="제출물 JSONL (- 이면 표준 입력)")
+    parser.add_argument("-o", "--output", default="-", help="결과 JSONL (기본: 표준 출력)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "8")),
+                        help="동시에 처리할 제출물 수")
+    parser.add_argument("--final", action="store_true", help="최종 동화책 다듬기까지 실행")
+    parser.add_argument("--storybook", metavar="DIR", help="최종 이야기를 <id>.pdf 스토리북으로 저장할 폴더 (--final 필요)")
+    parser.add_argument("--storybook-workers", type=int, default=None, help="PDF 를 만드는 프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args()
+    if args.storybook and not args.final:
+        parser.error("--storybook 은 --final 과 함께 써야 합니다")
+
+    submissions = read_submissions(args.input)
+    get_client(os.getenv("OPENAI_API_KEY"))
+    started = time.perf_counter()
+
+    def progress(done, result):
+        print(f"[{done}/{len(submissions)}] {result['id']}: {result['status']} ({result['elapsed_ms']:.0f}ms)",
+              file=sys.stderr)
+
+    results = run_batch(submissions, args.concurrency, args.final, on_result=progress)
+    if args.storybook:
+        export_storybooks(submissions, results, args.storybook, args.storybook_workers)
+    out = open(args.output, "w", encoding="utf-8") if args.output != "-" else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(f"{len(results)}건 {time.perf_counter() - started:.1f}s · {counts}", file=sys.stderr)
+    sys.exit(1 if counts.get("error") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# --- 전체 흐름 지연 벤치마크 ---
+# 로컬 대역 서버(mock_openai.py)를 띄우고 Streamlit AppTest 로 앱을 화면 없이 돌려
+# init → choose_q → write → review → decide_continue → done 각 단계 전환 시간을 잽니다.
+#
+#   python benchmarks/bench_e2e.py
+#   python benchmarks/bench_e2e.py --sessions 20 --rounds 3 --edits 1 --latency lognormal --latency-ms 800
+#   python benchmarks/bench_e2e.py --malformed-rate 0.3 --no-streaming
+#
+# 단계 시간 = 버튼 클릭 후 at.run() 이 끝날 때까지(콜백 + 스크립트 재실행, LLM 호출 포함)
+import argparse
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+from perf import percentile  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "streamlit_app.py")
+
+SUMMARY = "흥부는 다친 제비의 다리를 고쳐 주었고, 제비는 이듬해 봄에 박씨 하나를 물고 돌아왔어요."
+ANSWER = "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요. ({})"
+EDITED = "흥부는 아이들과 함께 박을 타며 즐겁게 노래를 불렀어요. 박이 열리자 보물이 가득 나왔어요. ({})"
+
+
+def _button(at, label: str):
+    for button in at.button:
+        if button.label == label:
+            return button
+    raise LookupError(f"버튼을 찾지 못함: {label!r} (stage={at.session_state['story'].stage})")
+
+
+def _text_area(at, label: str):
+    for area in at.text_area:
+        if area.label == label:
+            return area
+    raise LookupError(f"입력창을 찾지 못함: {label!r} (stage={at.session_state['story'].stage})")
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    def run(self, name: str, at, timeout: float):
+        started = time.perf_counter()
+        at.run(timeout=timeout)
+        self.samples.setdefault(name, []).append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+
+def run_session(n: int, args, timer: StageTimer):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    at.secrets["OPENAI_API_KEY"] = "mock"
+    timer.run("startup", at, args.timeout)
+
+    # init → choose_q (질문 생성)
+    _text_area(at, "이야기 요약 입력").input(f"{SUMMARY} ({n})")
+    at.run(timeout=args.timeout)
+    _button(at, "시작하기").click()
+    timer.run("init→choose_q", at, args.timeout)
+
+    for round_no in range(args.rounds):
+        assert at.session_state["story"].stage == "choose_q", at.session_state["story"].stage
+        at.button(key="q0").click()
+        timer.run("choose_q→write", at, args.timeout)
+
+        # write → review (피드백 생성)
+        tag = f"{n}-{round_no}"
+        _text_area(at, "답변 입력").input(ANSWER.format(tag))
+        at.run(timeout=args.timeout)
+        _button(at, "답변을 완성했어요.").click()
+        timer.run("write→review", at, args.timeout)
+
+        # 고쳐 쓰기 반복 (피드백 다시 생성)
+        for edit_no in range(args.edits):
+            _button(at, "✏️ 답변을 고칠래요.").click()
+            timer.run("review→edit", at, args.timeout)
+            at.text_area(key="edit_text").input(EDITED.format(f"{tag}-{edit_no}"))
+            _button(at, "수정을 완료했어요.").click()
+            timer.run("edit→review", at, args.timeout)
+
+        # review → decide_continue (이어쓰기 다듬기)
+        _button(at, "✅ 답변을 완성했어요.").click()
+        timer.run("review→decide_continue", at, args.timeout)
+
+        # 학생이 이야기를 읽는 시간 (이 사이에 미리 생성이 돎)
+        time.sleep(args.think_ms / 1000)
+        if round_no < args.rounds - 1:
+            _button(at, "계속 이어쓰기").click()
+            timer.run("decide_continue→choose_q", at, args.timeout)
+
+    # decide_continue → done (최종 다듬기)
+    _button(at, "이야기 완성하기").click()
+    timer.run("decide_continue→done", at, args.timeout)
+    assert at.session_state["story"].stage == "done", at.session_state["story"].stage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 대역 서버로 앱 전체 흐름 지연 측정")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=2, help="세션마다 이어쓰기 횟수")
+    parser.add_argument("--edits", type=int, default=0, help="라운드마다 고쳐 쓰기 횟수")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="decide_continue 화면에서 머무는 시간 (미리 생성 효과 확인용)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="at.run() 한 번의 제한 시간(초)")
+    parser.add_argument("--no-streaming", action="store_true", help="LLM_STREAMING=0 으로 실행")
+    parser.add_argument("--cache", action="store_true",
+                        help="응답 캐시를 켠 채로 측정 (기본은 꺼서 매번 대역 서버까지 감)")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(config=config_from_args(args)).start()
+    # 앱이 import 되기 전에 설정해야 openai 클라이언트와 캐시 싱글턴에 반영됨
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["LLM_STREAMING"] = "0" if args.no_streaming else "1"
+    if not args.cache:
+        os.environ["LLM_CACHE_PATH"] = ""
+        os.environ["LLM_CACHE_MAX_ENTRIES"] = "0"
+        os.environ["SIMILAR_INDEX_MAX_ENTRIES"] = "0"
+    os.chdir(ROOT)
+
+    # 앱의 빈 라벨 text_area 경고가 재실행마다 스택과 함께 찍혀 표를 덮지 않게
+    logging.getLogger("streamlit.elements.lib.policies").disabled = True
+
+    timer = StageTimer()
+    failures = 0
+    started = time.perf_counter()
+    try:
+        for n in range(args.sessions):
+            try:
+                run_session(n, args, timer)
+            except (AssertionError, LookupError, RuntimeError) as e:
+                failures += 1
+                print(f"[session {n}] 실패: {e}")
+    finally:
+        server.stop()
+    elapsed = time.perf_counter() - started
+
+    print(f"세션 {args.sessions}개 ({failures}개 실패), {elapsed:.1f}s, "
+          f"대역 서버 지연 {args.latency} {args.latency_ms:.0f}ms, "
+          f"streaming={'off' if args.no_streaming else 'on'}, cache={'on' if args.cache else 'off'}")
+    print(f"LLM 호출: {dict(sorted(server.calls.items()))}")
+    print()
+    print(f"{'단계':<28}{'n':>5}{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}")
+    for name, values in timer.samples.items():
+        ms = [v * 1000 for v in values]
+        print(f"{name:<28}{len(ms):>5}{percentile(ms, 50):>10.0f}"
+              f"{percentile(ms, 90):>10.0f}{percentile(ms, 99):>10.0f}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
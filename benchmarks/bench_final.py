@@ -0,0 +1,105 @@
+# --- 최종 다듬기 벤치마크: 이야기 길이별 done 단계 대기 시간 ---
+# 이어쓰기 N 번을 마친 이야기로 최종 다듬기를 세 가지 방식으로 돌려 봅니다.
+#   full        : 예전처럼 이야기 전체를 한 요청으로 다시 씀
+#   chunked     : 전체를 다시 쓰되 덩어리로 나눠 병렬 요청
+#   incremental : 이미 다듬어진 조각은 두고 다듬지 않은 조각(처음 요약)만 다시 씀 (StorySession.refine_final)
+# 대역 서버는 출력 토큰당 생성 시간(--ms-per-token)을 더해 긴 응답일수록 느리게 답합니다.
+#
+#   python benchmarks/bench_final.py
+#   python benchmarks/bench_final.py --lengths 5 20 40 --ms-per-token 15
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import CANNED_FEEDBACK, MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+
+SUMMARY = ("옛날 옛적에 마음씨 착한 흥부와 욕심 많은 놀부 형제가 살았어요. 흥부는 다친 제비의 다리를 고쳐 주었고, "
+           "제비는 이듬해 봄에 박씨 하나를 물고 돌아왔어요. ({})")
+PART = "흥부네 가족은 박을 타면서 노래를 불렀고, 박 속에서는 반짝이는 보물이 끝없이 쏟아져 나왔어요. ({}-{})"
+
+
+def build_session(rounds: int, n: int):
+    from story_session import StorySession
+
+    session = StorySession()
+    session.start(SUMMARY.format(n), questions=["다음에는 무슨 일이 생겼을까요?"])
+    for r in range(rounds):
+        session.choose_question(0)
+        session.submit(PART.format(n, r))
+        # 추천 예시(이미 다듬어진 글)를 그대로 붙이는 경로 → LLM 호출 없이 조각만 늘림
+        session.feedback = {**CANNED_FEEDBACK, "improved": PART.format(n, r)}
+        session.accept_improved()
+        if r < rounds - 1:
+            session.continue_story(questions=["그다음에는요?"])
+    session.finish()
+    return session
+
+
+def refine_tokens() -> tuple[int, int]:
+    from metrics import get_metrics
+
+    rows = [row for row in get_metrics().summary() if row["task"] == "refine_story"]
+    return sum(r["prompt_tokens"] for r in rows), sum(r["completion_tokens"] for r in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이야기 길이별 최종 다듬기 시간 비교")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[2, 5, 10, 20], help="이어쓰기 횟수")
+    parser.add_argument("--repeat", type=int, default=3)
+    add_config_arguments(parser)
+    parser.set_defaults(latency="fixed", latency_ms=400, ms_per_token=20)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(config=config_from_args(args)).start()
+    os.environ.update(OPENAI_BASE_URL=server.base_url, LLM_CACHE_PATH="", LLM_CACHE_MAX_ENTRIES="0",
+                      METRICS_LOG_PATH="", METRICS_PROM_PATH="")
+    from llm_client import get_client
+    from story_llm import refine_segments
+
+    get_client("mock")
+
+    def full(session):
+        segments = session.context.segments
+        refine_segments(segments, [False] * len(segments), chunk_tokens=10 ** 9)
+
+    def chunked(session):
+        segments = session.context.segments
+        refine_segments(segments, [False] * len(segments))
+
+    def incremental(session):
+        session.refine_final()
+
+    modes = {"full": full, "chunked": chunked, "incremental": incremental}
+    print(f"대역 서버 {args.latency_ms:.0f}ms + 출력 토큰당 {args.ms_per_token:.0f}ms · 길이마다 {args.repeat}회 평균")
+    print()
+    print(f"{'이어쓰기':>8}{'조각':>6}  " + "".join(f"{m + '(s)':>16}" for m in modes) + f"{'토큰 full→incr':>18}")
+    n = 0
+    try:
+        for rounds in args.lengths:
+            times, tokens = {}, {}
+            for mode, run in modes.items():
+                elapsed = 0.0
+                before = refine_tokens()
+                for _ in range(args.repeat):
+                    n += 1
+                    session = build_session(rounds, n)
+                    started = time.perf_counter()
+                    run(session)
+                    elapsed += time.perf_counter() - started
+                after = refine_tokens()
+                times[mode] = elapsed / args.repeat
+                tokens[mode] = sum(after) - sum(before)
+            segments = rounds + 1
+            print(f"{rounds:>8}{segments:>6}  " + "".join(f"{times[m]:>16.2f}" for m in modes)
+                  + f"{tokens['full'] // args.repeat:>10}→{tokens['incremental'] // args.repeat}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
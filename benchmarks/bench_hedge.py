@@ -0,0 +1,127 @@
+# --- 헤지 요청 / 모델 선택 벤치마크 ---
+# 가끔 몇 초씩 멈추는 대역 서버에 학생 여러 명이 피드백을 요청할 때 꼬리 지연(p99)을 비교합니다.
+#   off  : 헤지 없음 (LLM_HEDGE=0)
+#   same : p90 을 넘으면 같은 모델로 한 번 더
+#   mini : p90 을 넘으면 gpt-4o-mini 로 한 번 더 (대역 서버에서는 mini 가 더 빠름)
+# 피드백은 절반은 한 번에(generate_feedback), 절반은 스트리밍(stream_feedback, 첫 필드까지 시간)으로 받습니다.
+#
+#   python benchmarks/bench_hedge.py
+#   python benchmarks/bench_hedge.py --requests 400 --tail-rate 0.1 --tail-ms 15000
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+from perf import percentile  # noqa: E402
+
+CONTEXT = "흥부는 다친 제비의 다리를 고쳐 주었고, 제비는 이듬해 봄에 박씨 하나를 물고 돌아왔어요."
+ANSWER = "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요. ({})"
+
+
+def run_child(requests: int, concurrency: int) -> dict:
+    # 환경 변수가 정해진 뒤 import 해야 라우터/스케줄러 싱글턴에 반영됨
+    from llm_client import get_client
+    from model_router import get_default_router
+    from story_llm import generate_feedback, stream_feedback
+
+    get_client("mock")
+    samples: dict[str, list[float]] = {"generate_feedback": [], "stream_feedback": []}
+    errors = 0
+    lock = threading.Lock()
+
+    def one(n):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            if n % 2:
+                task = "stream_feedback"
+                next(iter(stream_feedback(ANSWER.format(n), CONTEXT)))
+            else:
+                task = "generate_feedback"
+                generate_feedback(ANSWER.format(n), CONTEXT)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            samples[task].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return {
+        "elapsed": time.perf_counter() - started,
+        "errors": errors,
+        "tasks": {
+            task: {q: percentile(v, q) for q in (50, 90, 99)}
+            for task, v in samples.items()
+        },
+        "router": get_default_router().stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="꼬리 지연이 있는 백엔드에서 헤지 요청 효과 측정")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["off", "same", "mini"], help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    parser.set_defaults(latency_ms=800, sigma=0.3, tail_rate=0.05, tail_ms=8000, fast_model_factor=0.5, seed=7)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_child(args.requests, args.concurrency)))
+        return
+
+    modes = {
+        "off": {"LLM_HEDGE": "0"},
+        "same": {"LLM_HEDGE": "1"},
+        "mini": {"LLM_HEDGE": "1", "LLM_HEDGE_MODEL_GENERATE_FEEDBACK": "gpt-4o-mini"},
+    }
+    results, sent = {}, {}
+    for mode, env in modes.items():
+        # 모드마다 같은 시드로 새 대역 서버 → 같은 지연 순서
+        server = MockOpenAIServer(config=config_from_args(args)).start()
+        try:
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode,
+                 "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+                env=dict(os.environ, OPENAI_BASE_URL=server.base_url, LLM_CACHE_PATH="", LLM_CACHE_MAX_ENTRIES="0",
+                         SIMILAR_INDEX_MAX_ENTRIES="0", METRICS_LOG_PATH="", METRICS_PROM_PATH="", LLM_RPM="0",
+                         LLM_TPM="0", **env),
+                capture_output=True, text=True, check=True,
+            )
+        finally:
+            server.stop()
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        sent[mode] = server.calls.get("generate_feedback", 0)
+
+    print(f"피드백 {args.requests}건 · 동시 {args.concurrency} · 대역 서버 {args.latency} {args.latency_ms:.0f}ms, "
+          f"{args.tail_rate:.0%} 확률로 +{args.tail_ms:.0f}ms")
+    print()
+    print(f"{'mode':<7}{'실제 요청':>9}{'추가':>7}{'실패':>6}  "
+          f"{'한 번에 p50/p90/p99 (ms)':<26}{'스트리밍 첫 필드 p50/p90/p99 (ms)'}")
+    for mode, r in results.items():
+        cols = []
+        for task in ("generate_feedback", "stream_feedback"):
+            row = r["tasks"][task]
+            cols.append(f"{row['50'] * 1000:.0f}/{row['90'] * 1000:.0f}/{row['99'] * 1000:.0f}")
+        extra = sent[mode] / args.requests - 1
+        print(f"{mode:<7}{sent[mode]:>9}{extra:>7.0%}{r['errors']:>6}  {cols[0]:<26}{cols[1]}")
+    print()
+    for row in results["mini"]["router"]:
+        print(f"mini: {row['task']} ({row['kind']}) 헤지 {row['hedged']}회 · 헤지 쪽 승 {row['hedge_wins']}회 · "
+              f"현재 기준 {row['hedge_after_ms'] or 0:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# --- 로컬 린터 벤치마크 ---
+# 학생 답변 중 일부에 ㅋㅋ, 반복 글자/문장부호, 짝 안 맞는 따옴표, 띄어쓰기 실수를 섞어 피드백을 요청합니다.
+#   llm  : 린터 결과는 먼저 보여 주고 프롬프트에 적어 모델도 부름 (LINT_SHORT_CIRCUIT=0, 기본값)
+#   lint : 고친 뒤 볼 내용이 남지 않는 답(ㅋㅋ만 잔뜩 등)만 모델 없이 로컬 피드백 (LINT_SHORT_CIRCUIT=1)
+# 답변당 린터 시간, 대역 서버까지 간 호출 수, 피드백 대기 p50/p90, 예전/지금 피드백 프롬프트 토큰 수를 비교합니다.
+#
+#   python benchmarks/bench_lint.py
+#   python benchmarks/bench_lint.py --answers 300 --dirty-rate 0.5 --latency-ms 1500
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+from perf import percentile  # noqa: E402
+
+CONTEXT = "흥부는 다친 제비의 다리를 고쳐 주었고, 제비는 이듬해 봄에 박씨 하나를 물고 돌아왔어요."
+ANSWERS = [
+    "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요.",
+    "놀부는 흥부가 부자가 된 걸 보고 너무 샘이 나서 제비 다리를 일부러 부러뜨렸어요.",
+    "제비는 흥부에게 “고마워요!” 하고 인사한 뒤 따뜻한 남쪽 나라로 날아갔어요.",
+    "흥부의 아이들은 배가 고팠지만 서로 밥을 양보하며 웃었어요. 흥부는 그런 아이들이 자랑스러웠어요.",
+]
+# 학생들이 흔히 하는 기계적인 실수
+MISTAKES = [
+    lambda t: t.replace("어요.", "어요ㅋㅋ", 1),
+    lambda t: t.replace("어요.", "어요ㅠㅠ", 1),
+    lambda t: t.replace("어요.", "어요!!!", 1),
+    lambda t: t.replace("쏟아졌어요", "쏟아졌어요오오오오").replace("부러뜨렸어요", "부러뜨렸어요오오오오"),
+    lambda t: t.replace("어요.", "어요 .", 1),
+    lambda t: t.replace("어요. ", "어요.", 1),
+    lambda t: t.replace("”", "") if "”" in t else t + " “어디 가니?",
+    lambda t: "ㅋㅋㅋㅋㅋㅋ 진짜 웃겨요 ㅎㅎㅎㅎㅎㅎ ㅋㅋㅋㅋㅋㅋㅋ",   # 고치고 나면 볼 내용이 남지 않음
+]
+
+
+# 로컬 린터 전의 피드백 프롬프트 (토큰 비교용 사본)
+def old_feedback_prompt(raw_text: str, context: str) -> str:
+    return (
+        "다음은 이야기 맥락과 사용자가 작성한 부분입니다.\n"
+        f"맥락:\n{context}\n"
+        f"사용자 작성:\n{raw_text}\n\n"
+        "이 텍스트의 *잘한 부분*(positives), *틀린 부분*(errors), *고칠 방법*(suggestions), "
+        "그리고 *개선된 버전*(improved) 세 가지를 반드시 JSON 객체 형식으로 반환해주세요.\n"
+        "이 피드백은 초등학생들을 위한 피드백임으로 초등학생들이 이해하기 쉽게 기초적인 내용으로 반드시 한국어로만 작성해주세요.\n"
+        "교육적인 목적의 피드백을 위하여 반드시 맞춤법을 맞추고 비속어 약어 (ㅋㅋ, ㅎㅎ 등)의 사용을 지적해주고 교육적인 내용을 긍정적으로보게 해주세요.\n"
+        "예시 형식:\n{\n  \"positives\": [...], \"errors\": [...], \"suggestions\": [...], \"improved\": \"...\"\n}"
+    )
+
+
+def workload(answers: int, dirty_rate: float, seed: int) -> list[tuple[str, bool]]:
+    rng = random.Random(seed)
+    jobs = []
+    for n in range(answers):
+        # 번호를 붙여 정확 일치 캐시/비슷한 입력 색인에 걸리지 않게 함
+        text = f"{ANSWERS[rng.randrange(len(ANSWERS))]} 그날은 {n + 1}번째 봄이었어요."
+        dirty = rng.random() < dirty_rate
+        if dirty:
+            text = rng.choice(MISTAKES)(text)
+        jobs.append((text, dirty))
+    return jobs
+
+
+def run_child(answers: int, dirty_rate: float, seed: int) -> dict:
+    from llm_client import get_client
+    from story_lint import is_local_feedback
+    from story_llm import generate_feedback
+
+    get_client("mock")
+    waits, local = [], 0
+    started = time.perf_counter()
+    for text, _ in workload(answers, dirty_rate, seed):
+        t0 = time.perf_counter()
+        feedback = generate_feedback(text, CONTEXT)
+        waits.append(time.perf_counter() - t0)
+        local += is_local_feedback(feedback)
+    return {
+        "elapsed": time.perf_counter() - started,
+        "local": local,
+        "wait": {q: percentile(waits, q) for q in (50, 90)},
+    }
+
+
+def lint_timing(jobs, repeat: int) -> tuple[float, float, float]:
+    # (답변당 평균 µs, 문제를 찾은 비율, 실제로 섞은 비율)
+    from story_lint import lint
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text, _ in jobs:
+            lint(text)
+        best = min(best, time.perf_counter() - started)
+    found = sum(bool(lint(text)) for text, _ in jobs) / len(jobs)
+    dirty = sum(d for _, d in jobs) / len(jobs)
+    return best / len(jobs) * 1e6, found, dirty
+
+
+def prompt_tokens(jobs) -> tuple[float, float]:
+    # 린터를 통과한 답변(모델까지 가는 답변)의 평균 프롬프트 토큰: 예전 / 지금
+    from story_context import estimate_tokens
+    from story_lint import lint
+    from story_llm import _feedback_prompt
+
+    clean = [text for text, _ in jobs if not lint(text)]
+    old = sum(estimate_tokens(old_feedback_prompt(text, CONTEXT)) for text in clean) / len(clean)
+    new = sum(estimate_tokens(_feedback_prompt(text, CONTEXT)) for text in clean) / len(clean)
+    return old, new
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 린터로 줄인 피드백 호출/대기/프롬프트 측정")
+    parser.add_argument("--answers", type=int, default=200)
+    parser.add_argument("--dirty-rate", type=float, default=0.4, help="기계적인 실수를 섞은 답변 비율")
+    parser.add_argument("--repeat", type=int, default=20, help="린터 시간 측정 반복 (최솟값 사용)")
+    parser.add_argument("--mode", choices=["llm", "lint"], help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    parser.set_defaults(latency="fixed", latency_ms=800, seed=5)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_child(args.answers, args.dirty_rate, args.seed)))
+        return
+
+    jobs = workload(args.answers, args.dirty_rate, args.seed)
+    us, found, dirty = lint_timing(jobs, args.repeat)
+    old_tokens, new_tokens = prompt_tokens(jobs)
+
+    modes = {"llm": "0", "lint": "1"}
+    results, calls = {}, {}
+    for mode, short_circuit in modes.items():
+        server = MockOpenAIServer(config=config_from_args(args)).start()
+        try:
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--answers", str(args.answers),
+                 "--dirty-rate", str(args.dirty_rate), "--seed", str(args.seed)],
+                env=dict(os.environ, OPENAI_BASE_URL=server.base_url, LLM_CACHE_PATH="", LLM_CACHE_MAX_ENTRIES="0",
+                         SIMILAR_INDEX_MAX_ENTRIES="0", METRICS_LOG_PATH="", METRICS_PROM_PATH="", LLM_RPM="0",
+                         LLM_TPM="0", LLM_HEDGE="0", LINT_SHORT_CIRCUIT=short_circuit),
+                capture_output=True, text=True, check=True,
+            )
+        finally:
+            server.stop()
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        calls[mode] = server.calls.get("generate_feedback", 0)
+
+    print(f"답변 {args.answers}개 · 실수 섞은 비율 {dirty:.0%} · 대역 서버 {args.latency} {args.latency_ms:.0f}ms")
+    print(f"린터: 답변당 {us:.1f}µs · 문제를 찾은 답변 {found:.0%}")
+    print(f"피드백 프롬프트 (린터 통과 답변 평균): 예전 {old_tokens:.0f} → 지금 {new_tokens:.0f} 토큰 "
+          f"({new_tokens / old_tokens - 1:+.0%})")
+    print()
+    print(f"{'mode':<6}{'모델 호출':>9}{'로컬 피드백':>11}{'대기 p50/p90 (ms)':>20}{'총 시간(s)':>11}")
+    for mode, r in results.items():
+        wait = f"{r['wait']['50'] * 1000:.0f}/{r['wait']['90'] * 1000:.0f}"
+        print(f"{mode:<6}{calls[mode]:>9}{r['local']:>11}{wait:>20}{r['elapsed']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
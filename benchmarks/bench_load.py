@@ -0,0 +1,274 @@
+# --- 학급 부하 테스트 ---
+# 실제 `streamlit run` 서버 하나에 학생 N 명을 웹소켓으로 동시에 붙여(bench_rerun.StreamlitClient) 대역 서버를 상대로
+# 전체 흐름을 밟게 하고, N 을 늘려 가며 한 프로세스가 몇 명까지 버티는지 봅니다.
+#   학생 한 명: 요약 입력 → 질문 고르기 → 답변 쓰기 → 피드백 → (고쳐 쓰기 반복) → 완성/추천 예시 → 이어쓰기 … → 완성 → 스토리북
+#   - 상호작용 사이에 생각하는 시간(lognormal, 답변 쓰기는 더 길게)
+#   - 피드백을 받을 때마다 --edit-rate 확률로 고쳐 다시 내고, 한 질문에 MAX_FEEDBACK_ROUNDS(2)번까지
+#   - 레벨(N)마다 새 서버 + 새 대역 서버 (메모리를 깨끗하게 재려고)
+# 레벨마다 보는 값
+#   처리량   : 완료한 세션/분, 상호작용/s
+#   지연     : 단계 전환(LLM 호출 포함)과 단계 안 조각 재실행의 p50/p90/p99, 단계별 p50/p90/p99
+#   서버     : CPU 사용률(100% = 코어 하나), 최대 RSS, 워밍업 뒤 대비 세션당 메모리
+# --max-* 를 주면 넘은 레벨이 있을 때 종료 코드 1 (용량 회귀 검사용), --json 으로 결과를 파일에 남김
+#
+#   python benchmarks/bench_load.py
+#   python benchmarks/bench_load.py --sessions 10 20 40 --think-ms 3000 --latency-ms 1500
+#   python benchmarks/bench_load.py --sessions 30 --max-p90-ms 4000 --max-mb-per-session 5 --json load.json
+#   python benchmarks/bench_load.py --sessions 10 20 --post-script-gc true   # 실행마다 gc.collect 를 켜고 비교
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_rerun import (  # noqa: E402
+    ANSWER,
+    EDITED,
+    SUMMARY,
+    StreamlitClient,
+    _cpu_seconds,
+    connect_session,
+    streamlit_server,
+)
+from mock_openai import MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+from perf import percentile  # noqa: E402
+from story_session import MAX_FEEDBACK_ROUNDS  # noqa: E402
+
+# 단계 안 상호작용 (조각만 다시 실행). 나머지는 단계 전환
+IN_STAGE = ("init: 요약 입력", "write: 답변 입력", "review→edit", "review: 답변 수정", "review: 추천 예시 보기")
+
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Student:
+    # 한 학생의 흐름. 상호작용마다 (단계 이름, wall 초)를 samples 에 쌓음
+    def __init__(self, client: StreamlitClient, n: int, args, rng: random.Random):
+        self.client = client
+        self.n = n
+        self.args = args
+        self.rng = rng
+        self.samples: list[tuple[str, float]] = []
+        self.capped = 0          # 고쳐 쓰기 한도까지 간 질문 수
+
+    def think(self, median_ms: float):
+        if median_ms > 0:
+            time.sleep(self.rng.lognormvariate(math.log(median_ms / 1000), 0.5))
+
+    def step(self, name: str, action, *args):
+        wall, _, _ = action(*args)
+        self.samples.append((name, wall))
+
+    def run(self):
+        c, a = self.client, self.args
+        self.step("startup", c.start)
+        self.think(a.think_ms)
+        self.step("init: 요약 입력", c.type_text, c.find("text_area", "이야기 요약 입력"), SUMMARY.format(self.n))
+        self.step("init→choose_q", c.click, c.find("button", "시작하기"))
+        for round_no in range(a.rounds):
+            tag = f"{self.n}-{round_no}"
+            self.think(a.think_ms)
+            self.step("choose_q→write", c.click, c.find("button", key=f"q{self.rng.randrange(3)}"))
+            self.think(a.write_ms)
+            self.step("write: 답변 입력", c.type_text, c.find("text_area", "답변 입력"), ANSWER.format(tag))
+            self.step("write→review", c.click, c.find("button", "답변을 완성했어요."))
+            edits = 0
+            while edits < MAX_FEEDBACK_ROUNDS and self.rng.random() < a.edit_rate:
+                self.think(a.think_ms)
+                self.step("review→edit", c.click, c.find("button", "✏️ 답변을 고칠래요."))
+                self.think(a.write_ms / 2)
+                self.step("review: 답변 수정", c.type_text, c.find("text_area", key="edit_text"),
+                          EDITED.format(f"{tag}-{edits}"))
+                self.step("edit→review", c.click, c.find("button", "수정을 완료했어요."))
+                edits += 1
+            self.capped += edits == MAX_FEEDBACK_ROUNDS
+            self.think(a.think_ms)
+            if self.rng.random() < a.accept_rate:
+                self.step("review: 추천 예시 보기", c.click, c.find("button", "👍 추천 예시를 사용할래요."))
+                self.step("review→decide_continue", c.click, c.find("button", "✅ 이대로 사용할게요"))
+            else:
+                self.step("review→decide_continue", c.click, c.find("button", "✅ 답변을 완성했어요."))
+            self.think(a.think_ms)
+            if round_no < a.rounds - 1:
+                self.step("decide_continue→choose_q", c.click, c.find("button", "계속 이어쓰기"))
+        self.step("decide_continue→done", c.click, c.find("button", "이야기 완성하기"))
+        self.think(a.think_ms)
+        self.step("done→storybook", c.click, c.find("button", "📚 스토리북 PDF 만들기"))
+
+
+def run_level(sessions: int, args) -> dict:
+    mock = MockOpenAIServer(config=config_from_args(args)).start()
+    env = {"LLM_RPM": str(args.rpm), "LLM_TPM": str(args.tpm)}
+    flags = ["--runner.postScriptGC", args.post_script_gc] if args.post_script_gc else []
+    try:
+        with streamlit_server(mock.base_url, args.timeout, env, flags) as (port, proc):
+            # 워밍업: 첫 실행에서만 하는 import/초기화를 세션당 메모리에서 빼려고 한 명을 먼저 돌림
+            with connect_session(port, args.timeout) as ws:
+                Student(StreamlitClient(ws, args.timeout, proc.pid), -1, _no_think(args), random.Random(0)).run()
+            baseline = _rss_mb(proc.pid)
+
+            peak = [baseline]
+            stop = threading.Event()
+
+            def sample_rss():
+                while not stop.wait(0.2):
+                    peak[0] = max(peak[0], _rss_mb(proc.pid))
+
+            students, errors = [], []
+            lock = threading.Lock()
+
+            def one(n: int):
+                # 한꺼번에 몰리지 않게 --ramp-s 동안 고르게 입장
+                time.sleep(args.ramp_s * n / sessions)
+                rng = random.Random(args.seed * 100003 + n)
+                try:
+                    with connect_session(port, args.timeout) as ws:
+                        student = Student(StreamlitClient(ws, args.timeout, proc.pid), n, args, rng)
+                        student.run()
+                except Exception as e:
+                    with lock:
+                        errors.append(f"{type(e).__name__}: {e}")
+                    return
+                with lock:
+                    students.append(student)
+
+            sampler = threading.Thread(target=sample_rss, daemon=True)
+            sampler.start()
+            cpu_started, started = _cpu_seconds(proc.pid), time.perf_counter()
+            threads = [threading.Thread(target=one, args=(n,)) for n in range(sessions)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            cpu = _cpu_seconds(proc.pid) - cpu_started
+            stop.set()
+            sampler.join()
+            peak[0] = max(peak[0], _rss_mb(proc.pid))
+    finally:
+        mock.stop()
+
+    stages: dict[str, list[float]] = {}
+    for student in students:
+        for name, wall in student.samples:
+            stages.setdefault(name, []).append(wall)
+    transitions = [w for name, rows in stages.items() if name not in IN_STAGE for w in rows]
+    fragments = [w for name, rows in stages.items() if name in IN_STAGE for w in rows]
+    interactions = len(transitions) + len(fragments)
+    return {
+        "sessions": sessions,
+        "completed": len(students),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "sessions_per_min": len(students) / elapsed * 60,
+        "interactions_per_s": interactions / elapsed,
+        "capped_reviews": sum(student.capped for student in students),
+        "transition_ms": _pcts(transitions),
+        "fragment_ms": _pcts(fragments),
+        "stages_ms": {name: _pcts(rows) for name, rows in stages.items()},
+        "cpu_percent": cpu / elapsed * 100,
+        "cpu_ms_per_interaction": cpu / interactions * 1000 if interactions else 0.0,
+        "rss_baseline_mb": baseline,
+        "rss_peak_mb": peak[0],
+        "mb_per_session": (peak[0] - baseline) / sessions,
+        "llm_calls": dict(mock.calls),
+    }
+
+
+def _no_think(args):
+    return argparse.Namespace(**dict(vars(args), think_ms=0, write_ms=0))
+
+
+def _pcts(rows: list[float]) -> dict:
+    pcts = {str(q): percentile(rows, q) * 1000 for q in (50, 90, 99)}
+    return dict(pcts, n=len(rows))
+
+
+def _gate(results: list[dict], args) -> list[str]:
+    failures = []
+    for r in results:
+        n = r["sessions"]
+        if r["errors"] and len(r["errors"]) / n > args.max_error_rate:
+            failures.append(f"N={n}: 실패 세션 {len(r['errors'])}개 ({r['errors'][0]})")
+        if args.max_p90_ms and r["transition_ms"]["90"] > args.max_p90_ms:
+            failures.append(f"N={n}: 단계 전환 p90 {r['transition_ms']['90']:.0f}ms > {args.max_p90_ms:.0f}ms")
+        if args.max_mb_per_session and r["mb_per_session"] > args.max_mb_per_session:
+            failures.append(f"N={n}: 세션당 {r['mb_per_session']:.1f}MB > {args.max_mb_per_session:.1f}MB")
+        if args.max_cpu_percent and r["cpu_percent"] > args.max_cpu_percent:
+            failures.append(f"N={n}: CPU {r['cpu_percent']:.0f}% > {args.max_cpu_percent:.0f}%")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학생 N 명 동시 접속 부하 테스트 (실제 streamlit 서버 + 대역 LLM)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 20], help="레벨별 동시 학생 수")
+    parser.add_argument("--rounds", type=int, default=2, help="학생마다 이어 쓰는 횟수")
+    parser.add_argument("--think-ms", type=float, default=1500, help="버튼 사이 생각하는 시간 중앙값")
+    parser.add_argument("--write-ms", type=float, default=4000, help="답변을 쓰는 시간 중앙값")
+    parser.add_argument("--edit-rate", type=float, default=0.6,
+                        help=f"피드백마다 고쳐 다시 낼 확률 (질문당 최대 {MAX_FEEDBACK_ROUNDS}번)")
+    parser.add_argument("--accept-rate", type=float, default=0.3, help="추천 예시를 그대로 쓰는 비율")
+    parser.add_argument("--ramp-s", type=float, default=5.0, help="학생들이 들어오는 데 걸리는 시간")
+    parser.add_argument("--rpm", type=int, default=0, help="앱의 LLM_RPM (기본 0: API 한도 없이 프로세스 자체를 잼)")
+    parser.add_argument("--tpm", type=int, default=0, help="앱의 LLM_TPM")
+    parser.add_argument("--post-script-gc", choices=["true", "false"],
+                        help="runner.postScriptGC 를 덮어씀 (기본: 저장소의 .streamlit/config.toml 그대로)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--max-p90-ms", type=float, default=0, help="단계 전환 p90 한도")
+    parser.add_argument("--max-mb-per-session", type=float, default=0, help="세션당 메모리 한도")
+    parser.add_argument("--max-cpu-percent", type=float, default=0, help="서버 CPU 사용률 한도")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="허용할 실패 세션 비율")
+    parser.add_argument("--json", help="레벨별 결과를 JSON 으로 저장")
+    add_config_arguments(parser)
+    parser.set_defaults(latency="lognormal", latency_ms=800, seed=3)
+    args = parser.parse_args()
+
+    results = []
+    for sessions in args.sessions:
+        print(f"N={sessions} …", file=sys.stderr)
+        results.append(run_level(sessions, args))
+
+    print(f"대역 서버 {args.latency} {args.latency_ms:.0f}ms · 생각 {args.think_ms:.0f}ms / 쓰기 {args.write_ms:.0f}ms · "
+          f"이어쓰기 {args.rounds}번 · 고쳐 쓰기 확률 {args.edit_rate:.0%} (최대 {MAX_FEEDBACK_ROUNDS}번)")
+    print()
+    print(f"{'N':>4}{'완료':>5}{'실패':>5}{'세션/분':>8}{'상호작용/s':>11}  {'전환 p50/p90/p99 (ms)':<23}"
+          f"{'조각 p90':>8}{'CPU %':>7}{'최대 RSS':>9}{'MB/세션':>8}{'한도 도달':>9}")
+    for r in results:
+        t = r["transition_ms"]
+        print(f"{r['sessions']:>4}{r['completed']:>5}{len(r['errors']):>5}{r['sessions_per_min']:>8.1f}"
+              f"{r['interactions_per_s']:>11.2f}  {t['50']:.0f}/{t['90']:.0f}/{t['99']:.0f}".ljust(51)
+              + f"{r['fragment_ms']['90']:>8.0f}{r['cpu_percent']:>7.0f}{r['rss_peak_mb']:>9.0f}"
+              f"{r['mb_per_session']:>8.1f}{r['capped_reviews']:>9}")
+
+    last = results[-1]
+    print()
+    print(f"N={last['sessions']} 단계별 (ms)")
+    print(f"{'단계':<28}{'n':>5}{'p50':>8}{'p90':>8}{'p99':>8}")
+    for name, row in last["stages_ms"].items():
+        print(("*" if name in IN_STAGE else " ") + f"{name:<27}{row['n']:>5}{row['50']:>8.0f}{row['90']:>8.0f}{row['99']:>8.0f}")
+    print("* 단계 안 상호작용 (조각 재실행)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": results}, f, ensure_ascii=False, indent=2)
+
+    failures = _gate(results, args)
+    for failure in failures:
+        print(f"한도 초과: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# --- 비속어 필터 벤치마크 + 동등성 검사 ---
+# 기존 KOR_PROFANITY_REGEX 와 새 엔진(profanity.contains_profanity)을 비교합니다.
+#
+#   python benchmarks/bench_profanity.py
+#   python benchmarks/bench_profanity.py --sizes 500 2000 8000 32000 --fuzz 200000
+#
+# 1) profanity_corpus.tsv 의 기대값과 두 엔진 결과 비교
+# 2) 무작위 입력에서 "기존 정규식이 잡는 것은 새 엔진도 잡는다" 확인
+# 3) 일반 학생 글 / 되돌아가기가 심한 입력에서 길이별 검사 시간
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from profanity import KOR_PROFANITY_REGEX, contains_profanity, find_profanity  # noqa: E402
+from story_examples import examples  # noqa: E402
+
+CORPUS_PATH = os.path.join(ROOT, "benchmarks", "profanity_corpus.tsv")
+EXPECTED = {"clean": (False, False), "both": (True, True), "new": (False, True)}
+
+
+def old_contains(text: str) -> bool:
+    return bool(KOR_PROFANITY_REGEX.search(text))
+
+
+def check_corpus(path: str) -> list[str]:
+    failures = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            label, text = line.rstrip("\n").split("\t", 1)
+            got = (old_contains(text), contains_profanity(text))
+            if got != EXPECTED[label]:
+                failures.append(f"{label}\t{text}\t(기존={got[0]}, 새 엔진={got[1]})")
+            elif bool(find_profanity(text)) != got[1]:
+                failures.append(f"{label}\t{text}\t(find_profanity 불일치)")
+    return failures
+
+
+def fuzz_parity(n: int, seed: int) -> tuple[list[str], int]:
+    # 정규식에 나오는 글자 + 숫자/공백/줄바꿈 + 흔한 글자로 짧은 문자열을 만들어 비교
+    pattern_chars = {ch for ch in KOR_PROFANITY_REGEX.pattern if ch not in "[]()?*+|^{}-:<=\\"}
+    alphabet = sorted(pattern_chars) + list("0123 \n가나다하는이를에ㅅㅂ")
+    rng = random.Random(seed)
+    regressions, extra = [], 0
+    for _ in range(n):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+        old, new = old_contains(text), contains_profanity(text)
+        if old and not new:
+            regressions.append(text)
+        elif new and not old:
+            extra += 1
+    return regressions, extra
+
+
+def best_ms(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def inputs(size: int) -> dict[str, str]:
+    story = " ".join(examples)
+    return {
+        "학생 글": (story * (size // len(story) + 1))[:size],
+        "띄어쓰기 없는 한글": "가" * size,
+        "낭…띠 후보 반복": "낭" * size,
+        "뻐 + 숫자": "뻐" + "1" * size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="비속어 필터 벤치마크 + 동등성 검사")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fuzz", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = check_corpus(CORPUS_PATH)
+    print(f"[corpus] 실패 {len(failures)}건")
+    for failure in failures:
+        print("  " + failure)
+
+    regressions, extra = fuzz_parity(args.fuzz, args.seed)
+    print(f"[fuzz] {args.fuzz}건 중 기존만 잡음 {len(regressions)}건, 새 엔진만 잡음 {extra}건")
+    for text in regressions[:20]:
+        print("  " + repr(text))
+
+    print()
+    print(f"{'입력':<16}{'길이':>8}{'기존(ms)':>12}{'새 엔진(ms)':>14}{'배율':>8}")
+    for size in args.sizes:
+        for name, text in inputs(size).items():
+            old = best_ms(old_contains, text, args.repeat)
+            new = best_ms(contains_profanity, text, args.repeat)
+            print(f"{name:<16}{size:>8}{old:>12.2f}{new:>14.2f}{old / new:>8.1f}x")
+
+    sys.exit(1 if failures or regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
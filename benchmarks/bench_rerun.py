@@ -0,0 +1,279 @@
+# --- 상호작용별 재실행 비용 벤치마크 (전체 재실행 vs 조각 재실행) ---
+# 실제 `streamlit run` 서버를 띄우고 브라우저 대신 웹소켓으로 BackMsg 를 보내 한 학생의 흐름을 그대로 밟습니다.
+# (AppTest 는 조각 재실행을 흉내 내지 않고 항상 스크립트 전체를 돌리므로 실제 서버로 잽니다.)
+#   before   : UI_FRAGMENTS=0, 입력창/버튼마다 스크립트 전체 재실행
+#   fragment : UI_FRAGMENTS=1, 단계 안의 상호작용은 그 단계 조각만 재실행
+# 두 모드 모두 실행마다 gc.collect 를 돌리는 Streamlit 기본값 (runner.postScriptGC = true) 으로 띄워 조각만의 효과를 잼
+# 상호작용마다 비교하는 값
+#   wall : BackMsg 를 보낸 뒤 script_finished 까지 (Streamlit 이 메시지를 ~50ms 단위로 묶어 보내므로 계단 모양)
+#   CPU  : 그동안 서버 프로세스가 쓴 CPU 시간 (/proc/<pid>/stat, 리눅스에서만)
+#   KB   : 받은 ForwardMsg 바이트 수. 브라우저처럼 큰 메시지를 캐시해 두지 않으므로 최악의 경우(캐시 없음) 기준
+#
+#   python benchmarks/bench_rerun.py
+#   python benchmarks/bench_rerun.py --sessions 10 --latency-ms 300
+import argparse
+import contextlib
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+from perf import percentile  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "streamlit_app.py")
+
+SUMMARY = "흥부는 다친 제비의 다리를 고쳐 주었고, 제비는 이듬해 봄에 박씨 하나를 물고 돌아왔어요. ({})"
+ANSWER = "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요. ({})"
+EDITED = "흥부는 아이들과 함께 박을 타며 즐겁게 노래를 불렀어요. 박이 열리자 보물이 가득 나왔어요. ({})"
+
+# 모드별 (환경 변수, streamlit run 에 덧붙일 설정)
+MODES = {
+    "before": ({"UI_FRAGMENTS": "0"}, ["--runner.postScriptGC", "true"]),
+    "fragment": ({"UI_FRAGMENTS": "1"}, ["--runner.postScriptGC", "true"]),
+}
+
+# (상호작용 이름, 단계 안에서만 바뀌는지)
+STEPS = [
+    ("startup", False),
+    ("init: 요약 입력", True),
+    ("init→choose_q", False),
+    ("choose_q→write", False),
+    ("write: 답변 입력", True),
+    ("write→review", False),
+    ("review: 고칠래요", True),
+    ("review: 답변 수정", True),
+    ("review: 수정 완료(피드백 다시)", False),
+    ("review: 추천 예시 보기", True),
+    ("review→decide_continue", False),
+    ("decide_continue→done", False),
+]
+
+
+def _cpu_seconds(pid: int) -> float:
+    # 서버 프로세스가 지금까지 쓴 CPU 시간 (끝난 스레드 몫 포함). 10ms 눈금이라 여러 세션 평균으로 봄
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class StreamlitClient:
+    # 브라우저 대신 /_stcore/stream 에 붙어 위젯 상태를 보내고 결과 메시지를 받는 최소 클라이언트
+    def __init__(self, ws, timeout: float, server_pid: int):
+        self._ws = ws
+        self._timeout = timeout
+        self._server_pid = server_pid
+        self._states = {}         # 위젯 id → WidgetState (브라우저가 들고 있는 값)
+        self._widgets = {}        # 위젯 id → (종류, 라벨, 조각 id)
+        self._page_hash = ""
+
+    def find(self, kind: str, label: str | None = None, key: str | None = None) -> str:
+        for widget_id, (widget_kind, widget_label, _) in self._widgets.items():
+            if widget_kind != kind:
+                continue
+            if (label is not None and widget_label == label) or (key is not None and widget_id.endswith(f"-{key}")):
+                return widget_id
+        raise LookupError(f"{kind} 을(를) 찾지 못함: {label or key!r}")
+
+    def type_text(self, widget_id: str, text: str) -> tuple[float, float, int]:
+        # 입력창에서 포커스를 옮길 때처럼 값이 바뀐 상태로 재실행
+        self._states[widget_id].string_value = text
+        return self._rerun(fragment_id=self._widgets[widget_id][2])
+
+    def click(self, widget_id: str) -> tuple[float, float, int]:
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        return self._rerun(trigger=WidgetState(id=widget_id, trigger_value=True),
+                           fragment_id=self._widgets[widget_id][2])
+
+    def start(self) -> tuple[float, float, int]:
+        return self._rerun()
+
+    def _rerun(self, trigger=None, fragment_id: str = "") -> tuple[float, float, int]:
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self._page_hash
+        msg.rerun_script.widget_states.widgets.extend(self._states.values())
+        if trigger is not None:
+            msg.rerun_script.widget_states.widgets.append(trigger)
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+
+        seen = set()
+        received = 0
+        cpu_started = _cpu_seconds(self._server_pid)
+        started = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        while True:
+            data = self._ws.recv(timeout=self._timeout)
+            received += len(data)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self._page_hash = fwd.new_session.page_script_hash
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._on_element(fwd.delta.new_element, fwd.delta.fragment_id, seen)
+            elif kind == "script_finished":
+                status = fwd.script_finished
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("앱 스크립트 컴파일 오류")
+                if status != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+        elapsed = time.perf_counter() - started
+        cpu = _cpu_seconds(self._server_pid) - cpu_started
+        if not fragment_id or status == ForwardMsg.FINISHED_SUCCESSFULLY:
+            # 전체 재실행에서 다시 그려지지 않은 위젯은 브라우저에서도 사라짐
+            self._states = {k: v for k, v in self._states.items() if k in seen}
+            self._widgets = {k: v for k, v in self._widgets.items() if k in seen}
+        return elapsed, cpu, received
+
+    def _on_element(self, element, fragment_id: str, seen: set):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            raise RuntimeError(f"앱 예외: {element.exception.message}")
+        if kind not in ("button", "text_area"):
+            return
+        proto = getattr(element, kind)
+        seen.add(proto.id)
+        self._widgets[proto.id] = (kind, proto.label, fragment_id)
+        if kind == "text_area" and (proto.id not in self._states or proto.set_value):
+            value = proto.value if proto.HasField("value") else proto.default
+            self._states[proto.id] = WidgetState(id=proto.id, string_value=value)
+
+
+def run_session(client: StreamlitClient, n: int) -> dict[str, tuple[float, float, int]]:
+    out = {}
+    out["startup"] = client.start()
+    out["init: 요약 입력"] = client.type_text(client.find("text_area", "이야기 요약 입력"), SUMMARY.format(n))
+    out["init→choose_q"] = client.click(client.find("button", "시작하기"))
+    out["choose_q→write"] = client.click(client.find("button", key="q0"))
+    out["write: 답변 입력"] = client.type_text(client.find("text_area", "답변 입력"), ANSWER.format(n))
+    out["write→review"] = client.click(client.find("button", "답변을 완성했어요."))
+    out["review: 고칠래요"] = client.click(client.find("button", "✏️ 답변을 고칠래요."))
+    out["review: 답변 수정"] = client.type_text(client.find("text_area", key="edit_text"), EDITED.format(n))
+    out["review: 수정 완료(피드백 다시)"] = client.click(client.find("button", "수정을 완료했어요."))
+    out["review: 추천 예시 보기"] = client.click(client.find("button", "👍 추천 예시를 사용할래요."))
+    out["review→decide_continue"] = client.click(client.find("button", "✅ 이대로 사용할게요"))
+    out["decide_continue→done"] = client.click(client.find("button", "이야기 완성하기"))
+    return out
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(port: int, proc, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("streamlit 서버가 시작하지 못함")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("streamlit 서버 대기 시간 초과")
+
+
+@contextlib.contextmanager
+def streamlit_server(mock_url: str, timeout: float, env: dict | None = None, flags=()):
+    # 임시 작업 폴더에서 `streamlit run` 을 띄우고 (포트, 프로세스)를 넘김. bench_load.py 도 사용
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        # 앱이 st.secrets 에서 키를 읽으므로 작업 폴더에 secrets.toml 을 두고, 저장소에 config.toml 이 있으면 함께
+        os.makedirs(os.path.join(workdir, ".streamlit"))
+        with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+            f.write('OPENAI_API_KEY = "mock"\n')
+        config = os.path.join(ROOT, ".streamlit", "config.toml")
+        if os.path.exists(config):
+            shutil.copy(config, os.path.join(workdir, ".streamlit"))
+        env = dict(os.environ, OPENAI_BASE_URL=mock_url, LLM_CACHE_PATH="", LLM_CACHE_MAX_ENTRIES="0",
+                   SIMILAR_INDEX_MAX_ENTRIES="0", METRICS_LOG_PATH="", METRICS_PROM_PATH="",
+                   SESSION_STORE_PATH=os.path.join(workdir, "sessions.db"), **(env or {}))
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+             "--server.port", str(port), "--server.address", "127.0.0.1", "--server.fileWatcherType", "none",
+             "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false", *flags],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_healthy(port, proc, timeout)
+            yield port, proc
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def connect_session(port: int, timeout: float):
+    from websockets.sync.client import connect
+
+    return connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None,
+                   open_timeout=timeout)
+
+
+def run_mode(mode: str, args) -> dict[str, list[tuple[float, float, int]]]:
+    samples = {name: [] for name, _ in STEPS}
+    mock = MockOpenAIServer(config=config_from_args(args)).start()
+    mode_env, mode_flags = MODES[mode]
+    try:
+        with streamlit_server(mock.base_url, args.timeout, mode_env, mode_flags) as (port, proc):
+            for n in range(args.sessions):
+                with connect_session(port, args.timeout) as ws:
+                    for name, value in run_session(StreamlitClient(ws, args.timeout, proc.pid), n).items():
+                        samples[name].append(value)
+    finally:
+        mock.stop()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상호작용별 서버 시간/전송량: 전체 재실행 vs 조각 재실행")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60)
+    add_config_arguments(parser)
+    parser.set_defaults(latency="fixed", latency_ms=50)
+    args = parser.parse_args()
+
+    results = {mode: run_mode(mode, args) for mode in MODES}
+
+    print(f"세션 {args.sessions}개 · 대역 서버 {args.latency} {args.latency_ms:.0f}ms · "
+          f"모드마다 wall p50(ms) / 서버 CPU 평균(ms) / 받은 바이트 중앙값(KB)")
+    print()
+    print(f"{'상호작용':<28}" + "".join(f"{mode:>24}" for mode in results))
+    totals = {mode: [0.0, 0.0, 0.0] for mode in results}
+    for name, in_stage in STEPS:
+        line = ("*" if in_stage else " ") + f"{name:<27}"
+        for mode, samples in results.items():
+            rows = samples[name]
+            cols = (
+                percentile([wall for wall, _, _ in rows], 50) * 1000,
+                sum(cpu for _, cpu, _ in rows) / len(rows) * 1000,
+                percentile([size for _, _, size in rows], 50) / 1024,
+            )
+            if in_stage:
+                totals[mode] = [t + c for t, c in zip(totals[mode], cols)]
+            line += f"{cols[0]:>10.0f}{cols[1]:>7.1f}{cols[2]:>7.1f}"
+        print(line)
+    print()
+    before = totals["before"]
+    print(f"* 단계 안 상호작용 {sum(in_stage for _, in_stage in STEPS)}개 합계 (before 대비)")
+    for mode, (_, cpu, size) in totals.items():
+        print(f"  {mode:<9} CPU {cpu:7.1f}ms ({cpu / before[1] - 1:+.0%}) · 전송 {size:5.1f}KB ({size / before[2] - 1:+.0%})")
+
+if __name__ == "__main__":
+    main()
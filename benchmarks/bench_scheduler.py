@@ -0,0 +1,137 @@
+# --- 한 반이 동시에 "시작하기"를 누를 때 (버스트) 벤치마크 ---
+# 분당 요청 한도가 있는 대역 서버에 학생 N 명이 동시에 질문 생성 → 피드백 요청을 보내고,
+# 그 사이 미리 생성(prefetch) 요청도 섞어서 보냅니다.
+#   direct    : 예전처럼 조율 없이 바로 호출 (동시 제한/버킷/재시도 끔)
+#   scheduler : scheduler.RequestScheduler 를 거쳐 호출
+#
+#   python benchmarks/bench_scheduler.py
+#   python benchmarks/bench_scheduler.py --students 60 --rate-limit-rpm 120 --latency-ms 800
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+from perf import percentile  # noqa: E402
+
+SUMMARY = "흥부는 다친 제비의 다리를 고쳐 주었고, 제비는 이듬해 봄에 박씨 하나를 물고 돌아왔어요. ({})"
+ANSWER = "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요. ({})"
+
+
+def run_child(students: int) -> dict:
+    # 환경 변수가 정해진 뒤 import 해야 스케줄러/클라이언트 싱글턴에 반영됨
+    from llm_client import get_client
+    from scheduler import PRIORITY_PREFETCH, get_default_scheduler
+    from story_llm import generate_feedback, generate_questions
+
+    get_client("mock")
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def timed(task, fn, *args):
+        started = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception:
+            with lock:
+                errors[task] = errors.get(task, 0) + 1
+            return False
+        with lock:
+            samples.setdefault(task, []).append(time.perf_counter() - started)
+        return True
+
+    prefetch_pool = ThreadPoolExecutor(max_workers=students)
+
+    def student(n):
+        if not timed("generate_questions", generate_questions, SUMMARY.format(n)):
+            return
+        # 학생이 답을 쓰는 동안 다음 질문을 미리 생성 + 곧바로 피드백 요청
+        prefetch = prefetch_pool.submit(timed, "prefetch", generate_questions, ANSWER.format(n), PRIORITY_PREFETCH)
+        timed("generate_feedback", generate_feedback, ANSWER.format(n), SUMMARY.format(n))
+        prefetch.result()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=students) as pool:
+        list(pool.map(student, range(students)))
+    elapsed = time.perf_counter() - started
+    prefetch_pool.shutdown()
+    return {
+        "elapsed": elapsed,
+        "ok": sum(len(v) for v in samples.values()),
+        "errors": errors,
+        "tasks": {
+            task: {"n": len(v), "p50": percentile(v, 50), "p95": percentile(v, 95)}
+            for task, v in samples.items()
+        },
+        "scheduler": get_default_scheduler().stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="버스트 부하에서 LLM 요청 스케줄러 효과 측정")
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=16, help="scheduler 모드의 LLM_MAX_CONCURRENCY")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="scheduler 모드의 LLM_RPM (기본: 대역 서버 한도의 95%%)")
+    parser.add_argument("--mode", choices=["direct", "scheduler"], help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    parser.set_defaults(rate_limit_rpm=60, latency="fixed")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_child(args.students)))
+        return
+
+    server = MockOpenAIServer(config=config_from_args(args)).start()
+    base_env = dict(os.environ, OPENAI_BASE_URL=server.base_url, LLM_CACHE_PATH="", LLM_CACHE_MAX_ENTRIES="0",
+                    SIMILAR_INDEX_MAX_ENTRIES="0", METRICS_LOG_PATH="", METRICS_PROM_PATH="", LLM_TPM="0")
+    modes = {
+        "direct": {"LLM_MAX_CONCURRENCY": "0", "LLM_RPM": "0", "LLM_MAX_RETRIES": "0"},
+        "scheduler": {
+            "LLM_MAX_CONCURRENCY": str(args.concurrency),
+            "LLM_RPM": str(args.rpm if args.rpm is not None else args.rate_limit_rpm * 0.95),
+        },
+    }
+    results = {}
+    try:
+        for mode, env in modes.items():
+            # 대역 서버의 분당 한도 버킷이 다시 가득 차도록 매번 새로 시작
+            server.config.rate_limit_rpm = args.rate_limit_rpm
+            server._allowance, server._allowance_at = float(args.rate_limit_rpm), time.monotonic()
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--students", str(args.students)],
+                env={**base_env, **env}, capture_output=True, text=True, check=True,
+            )
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+    finally:
+        server.stop()
+
+    print(f"학생 {args.students}명 동시 시작 · 대역 서버 {args.latency_ms:.0f}ms, 분당 {args.rate_limit_rpm}건 한도")
+    print()
+    print(f"{'mode':<11}{'성공':>6}{'실패':>6}{'총 시간(s)':>12}{'처리량(건/s)':>14}  단계별 p50 / p95 (ms)")
+    for mode, r in results.items():
+        failed = sum(r["errors"].values())
+        tasks = "  ".join(
+            f"{task} {row['p50'] * 1000:.0f}/{row['p95'] * 1000:.0f}" for task, row in sorted(r["tasks"].items())
+        )
+        print(f"{mode:<11}{r['ok']:>6}{failed:>6}{r['elapsed']:>12.1f}{r['ok'] / r['elapsed']:>14.1f}  {tasks}")
+    sched = results["scheduler"]["scheduler"]
+    print()
+    print(f"scheduler: 최대 대기열 {sched['max_queue_depth']} · 재시도 {sched['retries']} · "
+          f"한도 대기 {sched['throttled']} · 포기 {sched['gave_up']}")
+    for name, row in sched["wait"].items():
+        if row["count"]:
+            print(f"  대기 {name:<12} n={row['count']:<4} p50 {row['p50_ms']:.0f}ms  p95 {row['p95_ms']:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
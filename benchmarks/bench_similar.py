@@ -0,0 +1,123 @@
+# --- 비슷한 입력 재사용 벤치마크 ---
+# 한 반 학생들이 story_examples 의 흥부와 놀부 요약을 조금씩 고쳐 내고, 비슷한 답을 쓰는 상황을 흉내 냅니다.
+#   exact   : 정확 일치 캐시(llm_cache)만 (SIMILAR_INDEX_MAX_ENTRIES=0)
+#   similar : 정확 일치 캐시 + MinHash/LSH 비슷한 입력 색인
+# 실제로 대역 서버까지 간 호출 수, 색인 적중률, 예시마다 학생들이 받은 서로 다른 질문 세트 수를 비교합니다.
+#
+#   python benchmarks/bench_similar.py
+#   python benchmarks/bench_similar.py --students 120 --max-entries 64
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_openai import MockOpenAIServer, add_config_arguments, config_from_args  # noqa: E402
+
+# 학생들이 흔히 바꾸는 표현
+REWORDS = [
+    ("착한", "선한"), ("큰 부자", "엄청난 부자"), ("어느 날", "하루는"), ("혼쭐이 났어요", "혼이 났어요"),
+    ("정성껏", "열심히"), ("금은보화", "보물"), ("살았어요", "살고 있었어요"), ("욕심 많은", "욕심쟁이"),
+]
+ANSWERS = [
+    "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요.",
+    "놀부는 흥부가 부자가 된 걸 보고 너무 샘이 나서 제비 다리를 일부러 부러뜨렸어요.",
+    "제비는 흥부에게 고맙다고 인사하고 따뜻한 남쪽 나라로 날아갔어요.",
+]
+
+
+def perturb(text: str, rng: random.Random) -> str:
+    # 마크다운 강조 지우기, 표현 몇 개 바꾸기, 띄어쓰기/문장부호 흔들기
+    if rng.random() < 0.5:
+        text = text.replace("**", "")
+    for old, new in rng.sample(REWORDS, rng.randint(0, 3)):
+        text = text.replace(old, new)
+    if rng.random() < 0.3:
+        text = text.replace(". ", ".  ").replace("요.", "요!")
+    return text
+
+
+def workload(students: int, seed: int) -> list[tuple[int, str, str]]:
+    from story_examples import examples
+
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(students):
+        n = rng.randrange(len(examples))
+        answer = ANSWERS[rng.randrange(len(ANSWERS))]
+        if rng.random() < 0.5:
+            answer = answer.replace("요.", "요").replace(" ", "  ", 1)
+        jobs.append((n, perturb(examples[n], rng), answer))
+    return jobs
+
+
+def run_child(students: int, seed: int) -> dict:
+    from llm_client import get_client
+    from similar_index import get_default_index
+    from story_llm import generate_feedback, generate_questions
+
+    get_client("mock")
+    seen: dict[int, set] = {}
+    started = time.perf_counter()
+    for n, summary, answer in workload(students, seed):
+        questions = generate_questions(summary)
+        seen.setdefault(n, set()).add(tuple(questions))
+        generate_feedback(answer, summary)
+    return {
+        "elapsed": time.perf_counter() - started,
+        "variety": {str(n): len(sets) for n, sets in sorted(seen.items())},
+        "index": get_default_index().stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="비슷한 입력 색인 효과 측정")
+    parser.add_argument("--students", type=int, default=60)
+    parser.add_argument("--max-entries", type=int, default=2048, help="similar 모드의 SIMILAR_INDEX_MAX_ENTRIES")
+    parser.add_argument("--mode", choices=["exact", "similar"], help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    parser.set_defaults(latency="fixed", latency_ms=300, seed=11)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_child(args.students, args.seed)))
+        return
+
+    modes = {"exact": "0", "similar": str(args.max_entries)}
+    results, calls = {}, {}
+    for mode, max_entries in modes.items():
+        server = MockOpenAIServer(config=config_from_args(args)).start()
+        try:
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--students", str(args.students), "--seed", str(args.seed)],
+                env=dict(os.environ, OPENAI_BASE_URL=server.base_url, LLM_CACHE_PATH="", METRICS_LOG_PATH="",
+                         METRICS_PROM_PATH="", SIMILAR_INDEX_MAX_ENTRIES=max_entries),
+                capture_output=True, text=True, check=True,
+            )
+        finally:
+            server.stop()
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        calls[mode] = dict(server.calls)
+
+    print(f"학생 {args.students}명 · 예시 요약을 조금씩 고쳐 질문 생성 + 피드백 요청 · 대역 서버 {args.latency_ms:.0f}ms")
+    print()
+    print(f"{'mode':<9}{'질문 호출':>9}{'피드백 호출':>11}{'총 시간(s)':>11}{'색인 적중':>11}  예시별 서로 다른 질문 세트")
+    for mode, r in results.items():
+        index = r["index"]
+        hit = f"{index['hits']}/{index['lookups']}" if index["lookups"] else "-"
+        print(f"{mode:<9}{calls[mode].get('generate_questions', 0):>9}{calls[mode].get('generate_feedback', 0):>11}"
+              f"{r['elapsed']:>11.1f}{hit:>11}  {r['variety']}")
+    index = results["similar"]["index"]
+    print()
+    print(f"similar: 항목 {index['entries']} · 버킷 {index['buckets']} · 변형 채우기 {index['fills']} · "
+          f"밀려남 {index['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
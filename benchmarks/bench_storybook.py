@@ -0,0 +1,130 @@
+# --- 스토리북 PDF 벤치마크 ---
+# 이야기 길이(조각 수)에 따라 PDF 한 권을 만드는 시간을 비교합니다.
+#   before : fpdf 그대로 (권마다 add_font 로 글꼴 파싱, 중복까지 쌓이는 글자 list)
+#   after  : storybook.render_pdf (글꼴 메트릭 프로세스 캐시, 집합 기반 글자 목록, cmap/부분 글꼴 캐시)
+# after 는 처음 보는 글자 조합(cold, 부분 글꼴 캐시 비움)과 같은 이야기를 다시 만들 때(warm)를 따로 잽니다.
+# 한글 TTF 가 필요합니다 (STORYBOOK_FONT_PATH 또는 --font, 예: NanumGothic.ttf).
+#
+#   python benchmarks/bench_storybook.py --font /usr/share/fonts/truetype/nanum/NanumGothic.ttf
+#   python benchmarks/bench_storybook.py --lengths 2 10 40 --repeat 5
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 학생이 이어 쓴 조각 흉내
+SEGMENT = ("흥부는 {n}번째 박을 조심스럽게 탔어요. 박 속에서는 반짝이는 금은보화와 쌀이 쏟아져 나왔고, "
+           "아이들은 손뼉을 치며 \"와, 정말 신기해요!\" 하고 외쳤어요. 흥부는 이웃들과 기쁨을 나누기로 했어요.")
+
+
+def make_story(segments: int) -> str:
+    from story_examples import examples
+
+    parts = [examples[0].replace("**", "")]
+    parts += [SEGMENT.format(n=n + 1) for n in range(segments)]
+    return "\n".join(parts)
+
+
+def render_before(text: str, font: str) -> bytes:
+    # 예전 방식 그대로: 매번 새 FPDF + add_font
+    import fpdf
+
+    fpdf.set_global("FPDF_CACHE_MODE", 1)
+    pdf = fpdf.FPDF(format="A5")
+    pdf.add_font("story", "", font, uni=True)
+    pdf.add_page()
+    pdf.set_font("story", "", 13)
+    for paragraph in text.split("\n"):
+        pdf.multi_cell(0, 8, paragraph)
+    return pdf.output(dest="S").encode("latin1")
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_child(mode: str, lengths: list[int], repeat: int, font: str) -> dict:
+    warnings.filterwarnings("ignore", message="cmap value too big/small")
+    rows = {}
+    if mode == "before":
+        for n in lengths:
+            text = make_story(n)
+            data = render_before(text, font)
+            rows[n] = {"cold": best_of(lambda: render_before(text, font), repeat), "bytes": len(data)}
+        return rows
+
+    import storybook
+
+    started = time.perf_counter()
+    storybook.render_pdf("가", font_path=font)
+    first = time.perf_counter() - started
+    for n in lengths:
+        # cold: 처음 보는 글자 조합 (부분 글꼴 캐시를 비우고), warm: 같은 이야기를 다시
+        text = make_story(n)
+
+        def cold_render():
+            storybook._CachedTTFontFile._subsets.clear()
+            return storybook.render_pdf(text, font_path=font)
+
+        cold = best_of(cold_render, repeat)
+        data = storybook.render_pdf(text, font_path=font)
+        warm = best_of(lambda: storybook.render_pdf(text, font_path=font), repeat)
+        rows[n] = {"cold": cold, "warm": warm, "bytes": len(data)}
+    return {"first": first, "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이야기 길이별 스토리북 PDF 생성 시간")
+    parser.add_argument("--font", default=os.getenv("STORYBOOK_FONT_PATH"), help="한글 TTF 경로")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[2, 5, 10, 20, 40], help="이어 쓴 조각 수")
+    parser.add_argument("--repeat", type=int, default=3, help="길이마다 반복 (최솟값 사용)")
+    parser.add_argument("--mode", choices=["before", "after"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if not args.font:
+        from storybook import StorybookError, find_font
+
+        try:
+            args.font = find_font()
+        except StorybookError as e:
+            parser.error(str(e))
+
+    if args.mode:
+        print(json.dumps(run_child(args.mode, args.lengths, args.repeat, args.font)))
+        return
+
+    results = {}
+    for mode in ("before", "after"):
+        # 모드마다 새 프로세스 (storybook 을 import 하면 fpdf 의 부분 글꼴 클래스가 바뀜)
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--font", args.font, "--repeat", str(args.repeat),
+             "--lengths", *map(str, args.lengths)],
+            env=dict(os.environ, METRICS_LOG_PATH="", METRICS_PROM_PATH=""),
+            capture_output=True, text=True, check=True,
+        )
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    after = results["after"]
+    print(f"글꼴 {os.path.basename(args.font)} · 반복 {args.repeat}회 중 최솟값 · "
+          f"after 첫 한 권(글꼴 메트릭 읽기 포함) {after['first'] * 1000:.0f}ms")
+    print()
+    print(f"{'조각':>4}{'글자 수':>8}{'before (ms)':>13}{'after cold':>12}{'after warm':>12}{'PDF (KB)':>10}")
+    for n in args.lengths:
+        before, row = results["before"][str(n)], after["rows"][str(n)]
+        print(f"{n:>4}{len(make_story(n)):>8}{before['cold'] * 1000:>13.0f}{row['cold'] * 1000:>12.0f}"
+              f"{row['warm'] * 1000:>12.0f}{row['bytes'] / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
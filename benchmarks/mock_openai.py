@@ -0,0 +1,305 @@
+# --- 로컬 OpenAI chat.completions 대역 서버 ---
+# 실제 gpt-4o 를 부르지 않고 앱 전체 흐름을 돌려 보기 위한 가짜 백엔드입니다.
+# 프롬프트 앞부분으로 어느 도우미 함수의 호출인지 알아내 그럴듯한 한국어 응답을 돌려주고,
+# 지연 분포 / 가끔 멈추는 꼬리 지연 / 작은 모델 속도 / 스트리밍 / 깨진 피드백 JSON 섞기 /
+# 분당 요청 한도(429)를 설정할 수 있습니다.
+#
+#   python benchmarks/mock_openai.py --port 8765 --latency lognormal --latency-ms 1500
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run streamlit_app.py
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_QUESTIONS = [
+    "만약 제비가 흥부에게 말을 걸 수 있다면 무슨 말을 했을까요?",
+    "박 속에서 금은보화 말고 또 무엇이 나왔을까요?",
+    "놀부는 혼쭐이 난 뒤에 어떤 마음이 들었을까요?",
+    "흥부네 아이들은 부자가 된 뒤 무엇을 하고 싶었을까요?",
+    "다음 날 마을 사람들은 어떤 이야기를 나눴을까요?",
+]
+
+CANNED_FEEDBACK = {
+    "positives": ["등장인물의 마음을 잘 표현했어요.", "이야기의 흐름이 자연스러워요."],
+    "errors": ["'ㅋㅋ' 같은 줄임말은 이야기 글에 어울리지 않아요."],
+    "suggestions": ["인물이 한 말을 큰따옴표로 묶어 보세요."],
+    "improved": "흥부는 제비에게 \"고마워!\"라고 말하며 환하게 웃었어요.",
+}
+
+
+def classify(prompt: str) -> str:
+    # story_llm.py 의 프롬프트 첫머리로 도우미 함수를 구분
+    if prompt.startswith("다음 이야기를 이어쓰기 위해"):
+        return "generate_questions"
+    if prompt.startswith("다음은 이야기 맥락과"):
+        return "generate_feedback"
+    if prompt.startswith("아래 두 부분을"):
+        return "refine_extension"
+    if prompt.startswith("아래 ‘다듬을 부분’을"):
+        return "refine_story"
+    return "other"
+
+
+def _between(text: str, start: str, end: str) -> str:
+    match = re.search(re.escape(start) + r"(.*?)" + re.escape(end), text, re.DOTALL)
+    return match.group(1).strip() if match else text
+
+
+class MockConfig:
+    def __init__(self, latency: str = "fixed", latency_ms: float = 300.0, sigma: float = 0.5,
+                 ttft_fraction: float = 0.2, malformed_rate: float = 0.0, chunk_chars: int = 8,
+                 rate_limit_rpm: int = 0, tail_rate: float = 0.0, tail_ms: float = 0.0,
+                 fast_model_factor: float = 1.0, ms_per_token: float = 0.0, seed: int | None = None):
+        self.latency = latency            # fixed | uniform | lognormal
+        self.latency_ms = latency_ms      # fixed 값, uniform 상한, lognormal 중앙값
+        self.sigma = sigma
+        self.ttft_fraction = ttft_fraction
+        self.malformed_rate = malformed_rate
+        self.chunk_chars = chunk_chars
+        self.rate_limit_rpm = rate_limit_rpm  # 0 이면 무제한, 넘으면 429 + Retry-After
+        self.tail_rate = tail_rate        # 이 확률로 tail_ms 만큼 더 멈춤 (과부하 백엔드 흉내)
+        self.tail_ms = tail_ms
+        self.fast_model_factor = fast_model_factor  # 이름에 "mini" 가 든 모델의 지연 배율
+        self.ms_per_token = ms_per_token  # 출력 토큰당 생성 시간 → 긴 응답일수록 느림
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self, model: str = "") -> float:
+        with self._lock:
+            if self.latency == "uniform":
+                ms = self._rng.uniform(0, self.latency_ms)
+            elif self.latency == "lognormal":
+                ms = self._rng.lognormvariate(0, self.sigma) * self.latency_ms
+            else:
+                ms = self.latency_ms
+            if "mini" in model:
+                ms *= self.fast_model_factor
+        return ms / 1000
+
+    def sample_stall(self) -> float:
+        # 과부하 백엔드처럼 응답을 시작하기 전에 한참 멈추는 경우 (스트리밍이면 첫 토큰 전)
+        with self._lock:
+            stalled = self.tail_rate and self._rng.random() < self.tail_rate
+        return self.tail_ms / 1000 if stalled else 0.0
+
+    def roll_malformed(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.malformed_rate
+
+    def pick(self, items: list, k: int) -> list:
+        with self._lock:
+            return self._rng.sample(items, k)
+
+
+def canned_response(prompt: str, config: MockConfig) -> str:
+    task = classify(prompt)
+    if task == "generate_questions":
+        return "\n".join(f"{i}. {q}" for i, q in enumerate(config.pick(CANNED_QUESTIONS, 3), start=1))
+    if task == "generate_feedback":
+        content = json.dumps(CANNED_FEEDBACK, ensure_ascii=False, indent=2)
+        if config.roll_malformed():
+            # 코드펜스 + 중간에 끊긴 JSON → 앱의 로컬 복구 경로를 태움
+            content = "```json\n" + content[:-25]
+        return content
+    if task == "refine_extension":
+        return _between(prompt, "■ 새로 쓴 부분:\n", "\n\n=>")
+    if task == "refine_story":
+        return _between(prompt, "■ 다듬을 부분:\n", "\n\n■ 뒷부분:")
+    return "네, 알겠어요."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config: MockConfig = self.server.config
+        prompt = "".join(m.get("content") or "" for m in body.get("messages", []))
+        retry_after = self.server.admit()
+        if retry_after is not None:
+            self.server.record("rate_limited")
+            self._send_json({"error": {"message": "Rate limit reached for requests", "type": "requests",
+                                       "code": "rate_limit_exceeded"}},
+                            status=429, headers={"Retry-After": f"{retry_after:.2f}"})
+            return
+        content = canned_response(prompt, config)
+        model = body.get("model", "gpt-4o")
+        latency = config.sample_latency(model)
+        stall = config.sample_stall()
+        self.server.record(classify(prompt))
+        usage = {
+            "prompt_tokens": len(prompt) // 2,
+            "completion_tokens": len(content) // 2,
+            "total_tokens": (len(prompt) + len(content)) // 2,
+        }
+        generation = usage["completion_tokens"] * config.ms_per_token / 1000
+        if body.get("stream"):
+            try:
+                self._stream(model, content, latency, stall, generation, config, usage,
+                             body.get("stream_options") or {})
+            except (BrokenPipeError, ConnectionResetError):
+                # 클라이언트가 스트림을 중간에 닫음 (헤지에서 진 쪽 등)
+                pass
+        else:
+            time.sleep(stall + latency + generation)
+            self._send_json({
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+    def _send_json(self, payload: dict, status: int = 200, headers: dict | None = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model, content, latency, stall, generation, config, usage, stream_options):
+        # 첫 토큰까지는 latency * ttft_fraction, 나머지와 생성 시간은 조각 사이에 나눠 씀
+        chunks = [content[i:i + config.chunk_chars] for i in range(0, len(content), config.chunk_chars)]
+        gap = (latency * (1 - config.ttft_fraction) + generation) / max(len(chunks), 1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model}
+
+        def send(payload):
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(stall + latency * config.ttft_fraction)
+        send({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]})
+        for chunk in chunks:
+            send({**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+            time.sleep(gap)
+        send({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if stream_options.get("include_usage"):
+            send({**base, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: MockConfig | None = None):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockConfig()
+        self.calls: dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+        self._allowance = float(self.config.rate_limit_rpm)
+        self._allowance_at = time.monotonic()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record(self, task: str):
+        with self._calls_lock:
+            self.calls[task] = self.calls.get(task, 0) + 1
+
+    def admit(self) -> float | None:
+        # OpenAI 처럼 분당 한도가 연속으로 채워지는 버킷. 여유가 있으면 None, 없으면 기다릴 초
+        rpm = self.config.rate_limit_rpm
+        if not rpm:
+            return None
+        now = time.monotonic()
+        with self._calls_lock:
+            self._allowance = min(rpm, self._allowance + (now - self._allowance_at) * rpm / 60)
+            self._allowance_at = now
+            if self._allowance < 1:
+                return (1 - self._allowance) * 60 / rpm
+            self._allowance -= 1
+            return None
+
+    def start(self) -> "MockOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=300.0,
+                        help="fixed 값 / uniform 상한 / lognormal 중앙값 (ms)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal 분산 정도")
+    parser.add_argument("--ttft-fraction", type=float, default=0.2,
+                        help="스트리밍에서 첫 토큰까지 걸리는 시간 비율")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="피드백 JSON 을 일부러 깨뜨려 보낼 확률")
+    parser.add_argument("--rate-limit-rpm", type=int, default=0,
+                        help="분당 요청 한도 (넘으면 429 + Retry-After, 0 이면 무제한)")
+    parser.add_argument("--tail-rate", type=float, default=0.0,
+                        help="응답이 한참 멈추는 요청의 비율 (꼬리 지연)")
+    parser.add_argument("--tail-ms", type=float, default=0.0, help="멈출 때 더해지는 지연 (ms)")
+    parser.add_argument("--fast-model-factor", type=float, default=1.0,
+                        help="gpt-4o-mini 처럼 이름에 mini 가 든 모델의 지연 배율")
+    parser.add_argument("--ms-per-token", type=float, default=0.0,
+                        help="출력 토큰당 생성 시간 (ms). 긴 응답(최종 다듬기)일수록 느려짐")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        sigma=args.sigma,
+        ttft_fraction=args.ttft_fraction,
+        malformed_rate=args.malformed_rate,
+        rate_limit_rpm=args.rate_limit_rpm,
+        tail_rate=args.tail_rate,
+        tail_ms=args.tail_ms,
+        fast_model_factor=args.fast_model_factor,
+        ms_per_token=args.ms_per_token,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 OpenAI chat.completions 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(args.host, args.port, config_from_args(args))
+    print(f"mock OpenAI listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
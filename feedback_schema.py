@@ -0,0 +1,194 @@
+# --- 피드백 구조화 출력 ---
+# gpt-4o 에 JSON 스키마 응답 형식을 요청하고, 받은 내용을 Feedback 으로 검증합니다.
+# 형식이 깨져 와도 다시 요청하지 않고 여기서 최대한 고쳐서 씁니다.
+import ast
+import json
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+
+FEEDBACK_FIELDS = ("positives", "errors", "suggestions", "improved")
+
+# 복구까지 실패했을 때 errors 에 넣는 문구
+PARSE_ERROR = "피드백 생성 중 파싱 오류"
+
+FEEDBACK_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "story_feedback",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "positives": {"type": "array", "items": {"type": "string"}},
+                "errors": {"type": "array", "items": {"type": "string"}},
+                "suggestions": {"type": "array", "items": {"type": "string"}},
+                "improved": {"type": "string"},
+            },
+            "required": list(FEEDBACK_FIELDS),
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+@dataclass
+class Feedback:
+    positives: list[str] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    suggestions: list[str] = field(default_factory=list)
+    improved: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Feedback":
+        # 타입이 조금 달라도(문자열 하나, 숫자 등) 화면에 쓸 수 있는 모양으로 맞춤
+        return cls(
+            positives=_as_list(data.get("positives")),
+            errors=_as_list(data.get("errors")),
+            suggestions=_as_list(data.get("suggestions")),
+            improved=_as_text(data.get("improved")),
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _as_list(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, (str, int, float)):
+        value = [value]
+    items = []
+    for item in value:
+        text = str(item).strip()
+        if text and text not in items:
+            items.append(text)
+    return items
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v).strip() for v in value if str(v).strip())
+    return str(value).strip()
+
+
+class ParseStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ok = 0           # 그대로 JSON 으로 읽힘
+        self.repaired = 0     # 로컬에서 고쳐서 읽음
+        self.failed = 0       # 고치지 못해 원문만 improved 로 보여줌
+
+    def record(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def report(self) -> dict:
+        with self._lock:
+            return {"ok": self.ok, "repaired": self.repaired, "failed": self.failed}
+
+
+_parse_stats = ParseStats()
+
+
+def get_parse_stats() -> ParseStats:
+    return _parse_stats
+
+
+def _strip_fences(content: str) -> str:
+    content = content.strip()
+    if content.startswith("```"):
+        content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content, flags=re.IGNORECASE)
+    return content
+
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def _close_truncated(text: str) -> str:
+    # 중간에 끊긴 JSON: 열린 문자열/괄호를 순서대로 닫아 줌
+    stack, in_string, escape = [], False, False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = re.sub(r"[,:]\s*$", "", text)
+    return text + "".join(reversed(stack))
+
+
+def _repair_candidates(content: str):
+    # 덜 위험한 수정부터 차례로 시도
+    start = content.find("{")
+    body = content[start:] if start >= 0 else content
+    end = body.rfind("}")
+    trimmed = body[:end + 1] if end >= 0 else body
+    yield _TRAILING_COMMA.sub(r"\1", trimmed)                 # 앞뒤 설명 글, 끝에 남은 쉼표
+    yield _close_truncated(_TRAILING_COMMA.sub(r"\1", body))  # 중간에 끊긴 응답
+    yield _TRAILING_COMMA.sub(r"\1", trimmed.translate(_SMART_QUOTES))  # “둥근 따옴표” 로 쓴 JSON
+
+
+def _salvage_fields(content: str) -> dict:
+    # 마지막 수단: "필드": ... 부분만 골라 읽기
+    data = {}
+    for name in FEEDBACK_FIELDS:
+        match = re.search(rf'"{name}"\s*:\s*(\[[^\]]*\]|"(?:[^"\\]|\\.)*")', content, re.DOTALL)
+        if match:
+            try:
+                data[name] = json.loads(match.group(1))
+            except json.JSONDecodeError:
+                pass
+    return data
+
+
+def _parse(content: str | None) -> tuple[Feedback, str]:
+    # (피드백, ok | repaired | failed). 내용이 없으면(구조화 출력 거절 등) 바로 failed
+    if content is None:
+        return Feedback(errors=[PARSE_ERROR]), "failed"
+    content = _strip_fences(content)
+    try:
+        data = json.loads(content)
+        if isinstance(data, dict):
+            return Feedback.from_dict(data), "ok"
+    except json.JSONDecodeError:
+        pass
+
+    for candidate in _repair_candidates(content):
+        for loader in (json.loads, ast.literal_eval):
+            try:
+                data = loader(candidate)
+            except (ValueError, SyntaxError, RecursionError):
+                continue
+            if isinstance(data, dict):
+                return Feedback.from_dict(data), "repaired"
+
+    data = _salvage_fields(content)
+    if data.get("improved") or data.get("errors") or data.get("suggestions"):
+        return Feedback.from_dict(data), "repaired"
+
+    return Feedback(errors=[PARSE_ERROR], improved=content), "failed"
+
+
+def parse_feedback(content: str | None) -> Feedback:
+    feedback, outcome = _parse(content)
+    _parse_stats.record(outcome)
+    return feedback
+
+
+def feedback_readable(content: str | None) -> bool:
+    # 캐시에 넣어도 되는 응답인지 (통계는 남기지 않음). 못 읽는 응답을 캐시하면 TTL 동안 같은 오류만 보게 됨
+    return _parse(content)[1] != "failed"
@@ -0,0 +1,65 @@
+# --- 피드백 JSON 스트리밍 파서 ---
+# gpt-4o가 stream=True로 보내는 조각들을 받아서, 최상위 JSON 객체의
+# 필드(positives, errors, suggestions, improved)가 하나씩 끝날 때마다 돌려줍니다.
+import json
+
+
+class FeedbackStreamParser:
+    def __init__(self):
+        self.text = ""
+        self._pos = 0             # 다음에 읽을 위치
+        self._started = False     # 최상위 '{'를 만났는지
+        self._done = False        # 최상위 '}'를 만났는지
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        # 새로 완성된 (필드, 값) 목록
+        self.text += chunk
+        completed = []
+        while self._pos < len(self.text) and not self._done:
+            ch = self.text[self._pos]
+            self._pos += 1
+
+            # 코드펜스 등 '{' 앞부분은 건너뜀
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._member_start = self._pos
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._close_member(self._pos - 1)
+                    self._done = True
+            elif ch == "," and self._depth == 1:
+                completed += self._close_member(self._pos - 1)
+                self._member_start = self._pos
+        return completed
+
+    def _close_member(self, end: int) -> list[tuple[str, object]]:
+        member = self.text[self._member_start:end].strip()
+        if not member:
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except json.JSONDecodeError:
+            # 형식이 깨진 필드는 건너뛰고, 끝난 뒤 전체 파싱에 맡김
+            return []
@@ -0,0 +1,32 @@
+# --- 프로세스 단위 OpenAI 클라이언트 ---
+# Streamlit 은 위젯을 누를 때마다 스크립트를 다시 실행하므로, 클라이언트를 스크립트 안에서
+# 만들면 재실행마다 새 커넥션 풀과 TLS 핸드셰이크가 생깁니다. 여기서 한 번만 만들어 공유합니다.
+import os
+import threading
+
+import openai
+
+try:
+    import httpx
+except ImportError:  # openai 3.x 는 httpx 대신 httpx2 를 씀 (API 동일)
+    import httpx2 as httpx
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(api_key: str | None = None) -> openai.OpenAI:
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "64")),
+                    max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "32")),
+                    keepalive_expiry=60.0,
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            )
+            # 재시도는 scheduler 가 우선순위/한도를 지키며 하므로 SDK 자체 재시도는 끔
+            _client = openai.OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+        return _client
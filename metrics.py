@@ -0,0 +1,307 @@
+# --- LLM 호출 / 로컬 검사 계측 ---
+# 모든 chat.completions.create 호출의 전체 시간, 첫 토큰까지 시간, 토큰 수, 추정 비용, 캐시 여부와
+# story_lint 의 입력 검사/린터 같은 로컬 검사 시간을 프로세스 단위로 모읍니다.
+# 기록은 회전하는 JSONL 로그와 Prometheus 텍스트 파일(node_exporter textfile 수집기 형식)로 내보냅니다.
+#
+#   python metrics.py                          # 기본 JSONL 로그 요약
+#   python metrics.py .cache/metrics.jsonl.1   # 회전된 로그 요약
+import argparse
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import deque
+
+from perf import percentile
+
+# 100만 토큰당 USD (입력, 출력)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+_LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+_CHECK_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+class _Histogram:
+    # Prometheus 누적 히스토그램 (le 버킷 + sum + count)
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out = [f'{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.total}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.total}")
+        return out
+
+
+class _TaskStats:
+    def __init__(self, window: int):
+        self.calls = 0
+        self.cache_hits = 0
+        self.hedges = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.wall = deque(maxlen=window)
+        self.ttft = deque(maxlen=window)
+        self.wall_hist = _Histogram(_LLM_BUCKETS)
+        self.ttft_hist = _Histogram(_LLM_BUCKETS)
+
+
+class Metrics:
+    def __init__(self, log_path: str | None = None, log_max_bytes: int = 5 * 1024 * 1024, log_backups: int = 3,
+                 prom_path: str | None = None, prom_interval: float = 5.0, window: int = 1000):
+        self._lock = threading.Lock()
+        self._window = window
+        self._llm: dict[tuple[str, str], _TaskStats] = {}   # (task, model) → 누적
+        self._checks: dict[str, _Histogram] = {}
+        self._collectors = []   # 다른 모듈이 Prometheus 줄을 덧붙이는 함수 (예: 스케줄러 대기열)
+        self.prom_path = prom_path
+        self.prom_interval = prom_interval
+        self._last_export = 0.0
+
+        # path 가 비어 있으면 메모리에만 모음
+        self._log = None
+        if log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=log_max_bytes, backupCount=log_backups, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log = logging.getLogger(f"{__name__}.jsonl.{id(self)}")
+            self._log.setLevel(logging.INFO)
+            self._log.propagate = False
+            self._log.addHandler(handler)
+
+    def add_collector(self, fn):
+        with self._lock:
+            self._collectors.append(fn)
+
+    def record_llm(self, task: str, model: str, cache: str, wall: float, ttft: float | None = None,
+                   prompt_tokens: int = 0, completion_tokens: int = 0, stream: bool = False,
+                   error: str | None = None):
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            stats = self._llm.get((task, model))
+            if stats is None:
+                stats = self._llm[(task, model)] = _TaskStats(self._window)
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.cost += cost
+            if cache == "hedge":
+                # 헤지에서 진 응답은 호출 수/지연에 넣지 않음
+                stats.hedges += 1
+            else:
+                stats.calls += 1
+                stats.cache_hits += cache == "hit"
+                stats.errors += error is not None
+                stats.wall.append(wall)
+                stats.wall_hist.observe(wall)
+                if ttft is not None:
+                    stats.ttft.append(ttft)
+                    stats.ttft_hist.observe(ttft)
+        self._write({
+            "kind": "llm", "task": task, "model": model, "cache": cache, "stream": stream,
+            "wall_ms": round(wall * 1000, 1),
+            "ttft_ms": None if ttft is None else round(ttft * 1000, 1),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "cost_usd": round(cost, 6), "error": error,
+        })
+
+    def record_check(self, name: str, seconds: float, result=None):
+        with self._lock:
+            hist = self._checks.get(name)
+            if hist is None:
+                hist = self._checks[name] = _Histogram(_CHECK_BUCKETS)
+            hist.observe(seconds)
+        self._write({"kind": "check", "name": name, "wall_ms": round(seconds * 1000, 3), "result": result})
+
+    def _write(self, record: dict):
+        if self._log is not None:
+            self._log.info(json.dumps({"ts": round(time.time(), 3), **record}, ensure_ascii=False))
+        if self.prom_path:
+            now = time.monotonic()
+            with self._lock:
+                due = now - self._last_export >= self.prom_interval
+                if due:
+                    self._last_export = now
+            if due:
+                self.export_prometheus()
+
+    def summary(self) -> list[dict]:
+        # 운영자용 표: 도우미 함수(task)·모델별 한 줄
+        with self._lock:
+            return [
+                {
+                    "task": task,
+                    "model": model,
+                    "calls": s.calls,
+                    "cache_hit": s.cache_hits / s.calls if s.calls else 0.0,
+                    "p50_ms": percentile(s.wall, 50) * 1000,
+                    "p95_ms": percentile(s.wall, 95) * 1000,
+                    "ttft_p50_ms": percentile(s.ttft, 50) * 1000 if s.ttft else None,  # 스트리밍 호출만
+                    "prompt_tokens": s.prompt_tokens,
+                    "completion_tokens": s.completion_tokens,
+                    "cost_usd": round(s.cost, 4),
+                    "errors": s.errors,
+                    "hedges": s.hedges,
+                }
+                for (task, model), s in sorted(self._llm.items())
+            ]
+
+    def check_summary(self) -> dict:
+        with self._lock:
+            return {
+                name: {"count": h.total, "mean_ms": h.sum / h.total * 1000 if h.total else 0.0}
+                for name, h in sorted(self._checks.items())
+            }
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP story_llm_calls_total LLM helper calls by task, model and cache status.",
+            "# TYPE story_llm_calls_total counter",
+        ]
+        with self._lock:
+            items = sorted(self._llm.items())
+            for (task, model), s in items:
+                base = f'task="{task}",model="{model}"'
+                lines.append(f'story_llm_calls_total{{{base},cache="hit"}} {s.cache_hits}')
+                lines.append(f'story_llm_calls_total{{{base},cache="miss"}} {s.calls - s.cache_hits}')
+                lines.append(f'story_llm_calls_total{{{base},cache="hedge"}} {s.hedges}')
+            lines += ["# HELP story_llm_errors_total LLM calls that raised.",
+                      "# TYPE story_llm_errors_total counter"]
+            lines += [f'story_llm_errors_total{{task="{t}",model="{m}"}} {s.errors}' for (t, m), s in items]
+            lines += ["# HELP story_llm_tokens_total Tokens reported by the API.",
+                      "# TYPE story_llm_tokens_total counter"]
+            for (task, model), s in items:
+                base = f'task="{task}",model="{model}"'
+                lines.append(f'story_llm_tokens_total{{{base},kind="prompt"}} {s.prompt_tokens}')
+                lines.append(f'story_llm_tokens_total{{{base},kind="completion"}} {s.completion_tokens}')
+            lines += ["# HELP story_llm_cost_usd_total Estimated spend from token counts and MODEL_PRICES.",
+                      "# TYPE story_llm_cost_usd_total counter"]
+            lines += [f'story_llm_cost_usd_total{{task="{t}",model="{m}"}} {s.cost:.6f}' for (t, m), s in items]
+            lines += ["# HELP story_llm_seconds Wall time per LLM helper call (cache hits included).",
+                      "# TYPE story_llm_seconds histogram"]
+            for (task, model), s in items:
+                lines += s.wall_hist.lines("story_llm_seconds", f'task="{task}",model="{model}"')
+            lines += ["# HELP story_llm_ttft_seconds Time to first streamed token.",
+                      "# TYPE story_llm_ttft_seconds histogram"]
+            for (task, model), s in items:
+                lines += s.ttft_hist.lines("story_llm_ttft_seconds", f'task="{task}",model="{model}"')
+            lines += ["# HELP story_check_seconds Local input checks (profanity, length).",
+                      "# TYPE story_check_seconds histogram"]
+            for name, h in sorted(self._checks.items()):
+                lines += h.lines("story_check_seconds", f'check="{name}"')
+            collectors = list(self._collectors)
+        for collect in collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self):
+        # 수집기가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓰고 바꿔치기
+        if not self.prom_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.prom_path)), exist_ok=True)
+        tmp = f"{self.prom_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, self.prom_path)
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(
+                log_path=os.getenv("METRICS_LOG_PATH", ".cache/metrics.jsonl"),
+                log_max_bytes=int(os.getenv("METRICS_LOG_MAX_BYTES", str(5 * 1024 * 1024))),
+                log_backups=int(os.getenv("METRICS_LOG_BACKUPS", "3")),
+                prom_path=os.getenv("METRICS_PROM_PATH", ".cache/metrics.prom"),
+                prom_interval=float(os.getenv("METRICS_PROM_INTERVAL", "5")),
+            )
+        return _metrics
+
+
+def timed_check(name: str):
+    # 로컬 검사 함수를 감싸 시간과 결과를 기록
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = fn(*args, **kwargs)
+            get_metrics().record_check(name, time.perf_counter() - started, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def summarize_log(path: str) -> Metrics:
+    # 다른 프로세스가 남긴 JSONL 로그를 다시 읽어 같은 요약을 만듦
+    metrics = Metrics()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("kind") == "llm":
+                metrics.record_llm(
+                    record["task"], record["model"], record["cache"], record["wall_ms"] / 1000,
+                    None if record.get("ttft_ms") is None else record["ttft_ms"] / 1000,
+                    record.get("prompt_tokens", 0), record.get("completion_tokens", 0),
+                    record.get("stream", False), record.get("error"),
+                )
+            elif record.get("kind") == "check":
+                metrics.record_check(record["name"], record["wall_ms"] / 1000, record.get("result"))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 호출 계측 로그 요약")
+    parser.add_argument("path", nargs="?", default=os.getenv("METRICS_LOG_PATH", ".cache/metrics.jsonl"))
+    parser.add_argument("--prometheus", action="store_true", help="요약 대신 Prometheus 텍스트 출력")
+    args = parser.parse_args()
+
+    metrics = summarize_log(args.path)
+    if args.prometheus:
+        print(metrics.prometheus_text(), end="")
+        return
+    print(f"{'task':<20}{'model':<14}{'calls':>6}{'hit':>6}{'p50(ms)':>9}{'p95(ms)':>9}"
+          f"{'ttft50':>8}{'in tok':>9}{'out tok':>9}{'USD':>9}{'err':>5}")
+    for row in metrics.summary():
+        ttft = "-" if row["ttft_p50_ms"] is None else f"{row['ttft_p50_ms']:.0f}"
+        print(f"{row['task']:<20}{row['model']:<14}{row['calls']:>6}{row['cache_hit']:>6.0%}"
+              f"{row['p50_ms']:>9.0f}{row['p95_ms']:>9.0f}{ttft:>8}"
+              f"{row['prompt_tokens']:>9}{row['completion_tokens']:>9}{row['cost_usd']:>9.4f}{row['errors']:>5}")
+    for name, row in metrics.check_summary().items():
+        print(f"check {name:<26}{row['count']:>6}  mean {row['mean_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
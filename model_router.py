@@ -0,0 +1,205 @@
+# --- 도우미 함수별 모델 선택 + 헤지 요청 ---
+# 작업(task)마다 쓸 모델과 지연 목표(SLO)를 정하고, 요청이 최근 p90 을 넘도록
+# 안 끝나면 같은 요청을 한 번 더 (원하면 더 빠른 모델로) 보내 먼저 온 응답을 씁니다.
+# 늦은 쪽 응답은 버리고 (스트리밍이면 닫고) 토큰/비용만 기록합니다.
+#  - 스트리밍은 첫 토큰까지 시간(TTFT)을, 나머지는 전체 시간을 기준으로 삼음
+#  - 스케줄러 대기열이 밀려 있거나 미리 생성(prefetch) 요청이면 헤지하지 않음 → 부하를 키우지 않음
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import get_metrics
+from perf import percentile
+from scheduler import PRIORITY_PREFETCH, get_default_scheduler
+
+DEFAULT_MODEL = "gpt-4o"
+
+# 질문 3줄처럼 짧고 쉬운 작업은 작은 모델로
+TASK_MODELS = {
+    "generate_questions": "gpt-4o-mini",
+}
+
+# 지연 목표(초). 헤지 기준은 min(최근 p90, 목표). 여기 없는 작업(최종 다듬기 등)은 헤지하지 않음
+TASK_SLO = {
+    "generate_feedback": 6.0,
+    "generate_questions": 4.0,
+    "refine_extension": 6.0,
+}
+
+
+def _env_key(prefix: str, task: str) -> str:
+    return f"{prefix}_{task.upper()}"
+
+
+class ModelRouter:
+    def __init__(self, models: dict[str, str] | None = None, hedge_models: dict[str, str] | None = None,
+                 slo: dict[str, float] | None = None, hedge: bool = True, quantile: float = 90,
+                 min_samples: int = 10, min_delay: float = 0.3, max_workers: int = 64, window: int = 500):
+        self.models = dict(TASK_MODELS if models is None else models)
+        self.hedge_models = dict(hedge_models or {})
+        self.slo = dict(TASK_SLO if slo is None else slo)
+        self.hedge = hedge
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._max_workers = max_workers
+        self._window = window
+        self._pool = None
+        self._lock = threading.Lock()
+        self._latency: dict[tuple[str, bool], deque] = {}   # (task, stream) → 최근 시도 시간
+        self.hedged: dict[tuple[str, bool], int] = {}
+        self.hedge_wins: dict[tuple[str, bool], int] = {}
+
+    def model_for(self, task: str) -> str:
+        return self.models.get(task, DEFAULT_MODEL)
+
+    def hedge_model_for(self, task: str) -> str:
+        return self.hedge_models.get(task) or self.model_for(task)
+
+    def observe(self, task: str, seconds: float, stream: bool = False):
+        with self._lock:
+            values = self._latency.get((task, stream))
+            if values is None:
+                values = self._latency[(task, stream)] = deque(maxlen=self._window)
+            values.append(seconds)
+
+    def hedge_delay(self, task: str, stream: bool = False) -> float | None:
+        # None 이면 이 작업은 헤지하지 않음
+        budget = self.slo.get(task)
+        if not self.hedge or not budget:
+            return None
+        with self._lock:
+            values = list(self._latency.get((task, stream), ()))
+        # 꼬리(최근 p90)에 걸린 요청만 다시 보냄. 목표보다 늦게는 보내지 않음.
+        # 중앙값 근처에서 보내면 대부분의 요청이 두 번 나가 토큰이 두 배가 됨.
+        # 기록이 모이기 전(워밍업)에만 목표의 절반
+        if len(values) < self.min_samples:
+            return max(self.min_delay, budget / 2)
+        return max(self.min_delay, min(percentile(values, self.quantile), budget))
+
+    def _attempt(self, task: str, stream: bool, fn, model: str):
+        started = time.perf_counter()
+        result = fn(model)
+        seconds = time.perf_counter() - started
+        self.observe(task, seconds, stream)
+        return result, model, seconds
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="llm-hedge")
+            return self._pool
+
+    def run(self, task: str, fn, model: str, priority: int, stream: bool = False, on_discard=None):
+        # fn(model) 을 실행해 (결과, 실제로 쓴 모델)을 돌려줌.
+        # on_discard(결과, 모델, 초)는 진 쪽 응답이 도착하면 불림 (스트림 닫기, 기록 등)
+        delay = self.hedge_delay(task, stream) if priority < PRIORITY_PREFETCH else None
+        if delay is None:
+            result, model, _ = self._attempt(task, stream, fn, model)
+            return result, model
+
+        pool = self._executor()
+        primary = pool.submit(self._attempt, task, stream, fn, model)
+        if not wait([primary], timeout=delay).done and get_default_scheduler().has_capacity():
+            hedge = pool.submit(self._attempt, task, stream, fn, self.hedge_model_for(task))
+            with self._lock:
+                self.hedged[(task, stream)] = self.hedged.get((task, stream), 0) + 1
+            pending, winner, error = {primary, hedge}, None, None
+            while pending and winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = future.exception()
+                    elif winner is None:
+                        winner = future
+            if winner is None:
+                raise error
+            if winner is hedge:
+                with self._lock:
+                    self.hedge_wins[(task, stream)] = self.hedge_wins.get((task, stream), 0) + 1
+            for future in pending | done:
+                if future is not winner and on_discard is not None:
+                    future.add_done_callback(
+                        lambda f: f.exception() is None and on_discard(*f.result())
+                    )
+            result, model, _ = winner.result()
+            return result, model
+        result, model, _ = primary.result()
+        return result, model
+
+    def stats(self) -> list[dict]:
+        # 운영자용 표: 작업별 최근 꼬리 지연과 헤지 횟수
+        with self._lock:
+            keys = sorted(self._latency)
+            rows = []
+            for task, stream in keys:
+                values = list(self._latency[(task, stream)])
+                rows.append({
+                    "task": task,
+                    "kind": "ttft" if stream else "wall",
+                    "model": self.model_for(task),
+                    "n": len(values),
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p90_ms": percentile(values, 90) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000,
+                    "hedged": self.hedged.get((task, stream), 0),
+                    "hedge_wins": self.hedge_wins.get((task, stream), 0),
+                })
+        for row in rows:
+            delay = self.hedge_delay(row["task"], row["kind"] == "ttft")
+            row["hedge_after_ms"] = None if delay is None else delay * 1000
+        return rows
+
+    def prometheus_lines(self) -> list[str]:
+        rows = self.stats()
+        lines = [
+            "# HELP story_llm_attempt_seconds Recent per-attempt latency by task (TTFT for streams).",
+            "# TYPE story_llm_attempt_seconds summary",
+        ]
+        for row in rows:
+            base = f'task="{row["task"]}",kind="{row["kind"]}"'
+            for q in (50, 90, 99):
+                lines.append(f'story_llm_attempt_seconds{{{base},quantile="0.{q}"}} {row[f"p{q}_ms"] / 1000:.4f}')
+        lines += ["# HELP story_llm_hedges_total Duplicate requests sent after the hedge delay.",
+                  "# TYPE story_llm_hedges_total counter"]
+        lines += [f'story_llm_hedges_total{{task="{r["task"]}",kind="{r["kind"]}"}} {r["hedged"]}' for r in rows]
+        lines += ["# HELP story_llm_hedge_wins_total Hedged requests whose duplicate answered first.",
+                  "# TYPE story_llm_hedge_wins_total counter"]
+        lines += [f'story_llm_hedge_wins_total{{task="{r["task"]}",kind="{r["kind"]}"}} {r["hedge_wins"]}'
+                  for r in rows]
+        return lines
+
+
+_default_router = None
+_default_lock = threading.Lock()
+
+
+def get_default_router() -> ModelRouter:
+    # LLM_MODEL_<TASK> / LLM_HEDGE_MODEL_<TASK> / LLM_SLO_<TASK> 로 작업별 설정
+    # (예: LLM_MODEL_GENERATE_FEEDBACK=gpt-4o-mini, LLM_SLO_REFINE_STORY=30)
+    global _default_router
+    with _default_lock:
+        if _default_router is None:
+            tasks = set(TASK_MODELS) | set(TASK_SLO) | {"refine_story"}
+            models = dict(TASK_MODELS)
+            hedge_models = {}
+            slo = dict(TASK_SLO)
+            for task in tasks:
+                if os.getenv(_env_key("LLM_MODEL", task)):
+                    models[task] = os.environ[_env_key("LLM_MODEL", task)]
+                if os.getenv(_env_key("LLM_HEDGE_MODEL", task)):
+                    hedge_models[task] = os.environ[_env_key("LLM_HEDGE_MODEL", task)]
+                if os.getenv(_env_key("LLM_SLO", task)) is not None:
+                    slo[task] = float(os.environ[_env_key("LLM_SLO", task)] or 0)
+            _default_router = ModelRouter(
+                models=models,
+                hedge_models=hedge_models,
+                slo=slo,
+                hedge=os.getenv("LLM_HEDGE", "1") != "0",
+                quantile=float(os.getenv("LLM_HEDGE_QUANTILE", "90")),
+                min_delay=float(os.getenv("LLM_HEDGE_MIN_MS", "300")) / 1000,
+            )
+            get_metrics().add_collector(_default_router.prometheus_lines)
+        return _default_router
@@ -0,0 +1,52 @@
+# --- 스크립트 실행 시간 기록 ---
+# 세션 첫 실행(startup)과 위젯 상호작용으로 인한 재실행(rerun), 조각(fragment)만 다시 실행한 시간을
+# 프로세스 전체에서 모아 백분위로 보여줍니다.
+import logging
+import math
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values, q: float) -> float:
+    # 최근접 순위 방식 (q: 0~100)
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class RunTimer:
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._runs = {kind: deque(maxlen=window) for kind in ("startup", "rerun", "fragment")}
+
+    def record(self, kind: str, seconds: float, stage: str = ""):
+        with self._lock:
+            self._runs[kind].append(seconds)
+        logger.debug("script %s (%s): %.1f ms", kind, stage, seconds * 1000)
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                kind: {
+                    "count": len(values),
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p95_ms": percentile(values, 95) * 1000,
+                }
+                for kind, values in self._runs.items()
+            }
+
+
+_run_timer = None
+_run_timer_lock = threading.Lock()
+
+
+def get_run_timer() -> RunTimer:
+    global _run_timer
+    with _run_timer_lock:
+        if _run_timer is None:
+            _run_timer = RunTimer()
+        return _run_timer
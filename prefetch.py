@@ -0,0 +1,65 @@
+# --- 다음 단계 미리 생성(prefetch) ---
+# 학생이 decide_continue 화면에서 이야기를 읽는 동안 다음 질문(또는 최종 다듬기)을
+# 스레드 풀에서 미리 만들어 두고, 필요 없어지면 취소/폐기합니다.
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+class Prefetcher:
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+
+    def submit(self, fn, *args) -> Future:
+        with self._lock:
+            self.started += 1
+        return self._pool.submit(fn, *args)
+
+    def take(self, future: Future, timeout: float | None = None):
+        # 끝났으면 결과를 바로, 아직이면 timeout 만큼 기다림. 그래도 안 끝났을 때
+        #   - 아직 시작 전(풀에서 대기)이면 취소하고 None → 호출한 쪽이 직접 호출
+        #   - 이미 요청을 보냈으면 끝까지 기다림 (같은 요청을 두 번 보내 토큰을 두 번 쓰지 않게)
+        # 백그라운드 작업이 실패하면 None → 호출한 쪽에서 동기 호출로 대체
+        try:
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeout:
+                if future.cancel():
+                    with self._lock:
+                        self.discarded += 1
+                    return None
+                result = future.result()
+        except Exception:
+            with self._lock:
+                self.discarded += 1
+            return None
+        with self._lock:
+            self.used += 1
+        return result
+
+    def discard(self, future: Future):
+        # 시작 전이면 취소, 이미 돌고 있으면 결과만 버림 (응답은 캐시에 남음)
+        future.cancel()
+        with self._lock:
+            self.discarded += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"started": self.started, "used": self.used, "discarded": self.discarded}
+
+
+_default_prefetcher = None
+_default_lock = threading.Lock()
+
+
+def get_default_prefetcher() -> Prefetcher:
+    global _default_prefetcher
+    with _default_lock:
+        if _default_prefetcher is None:
+            _default_prefetcher = Prefetcher(max_workers=int(os.getenv("PREFETCH_WORKERS", "4")))
+        return _default_prefetcher
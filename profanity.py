@@ -0,0 +1,332 @@
+# --- 비속어 필터 ---
+# 모듈을 처음 import 할 때 한 번만 만들어지고, 모든 세션/재실행이 같은 엔진을 공유합니다.
+#
+# 1) 입력을 한 번만 정규화: 한글 음절 → 자모, 숫자 제거, 숫자 뒤 공백 제거, 연속 공백 하나로
+# 2) 글자 그대로 비교하면 되는 패턴들은 자모 단위 Aho-Corasick 자동자로 한 번에 검사
+#    (자동자는 파이썬 루프라 느리므로, 먼저 글자 단위 정규식으로 걸러 후보가 있을 때만 돌림)
+# 3) 앞뒤 글자 범위 조건이 필요한 패턴만 정규식(선형 시간으로 고쳐 쓴 것)으로 검사
+import re
+from itertools import product
+from typing import NamedTuple
+
+# 기존 단일 정규식. 새 엔진과의 동등성 확인/벤치마크 기준으로 남겨 둡니다.
+KOR_PROFANITY_REGEX = re.compile("[시씨씪슈쓔쉬쉽쒸쓉](?:[0-9]*|[0-9]+ *)[바발벌빠빡빨뻘파팔펄]|[섊좆좇졷좄좃좉졽썅춍봊]|[ㅈ조][0-9]*까|ㅅㅣㅂㅏㄹ?|ㅂ[0-9]*ㅅ|[ㅄᄲᇪᄺᄡᄣᄦᇠ]|[ㅅㅆᄴ][0-9]*[ㄲㅅㅆᄴㅂ]|[존좉좇][0-9 ]*나|[자보][0-9]+지|보빨|[봊봋봇봈볻봁봍] *[빨이]|[후훚훐훛훋훗훘훟훝훑][장앙]|[엠앰]창|애[미비]|애자|[가-탏탑-힣]색기|(?:[샊샛세쉐쉑쉨쉒객갞갟갯갰갴겍겎겏겤곅곆곇곗곘곜걕걖걗걧걨걬] *[끼키퀴])|새 *[키퀴]|[병븅][0-9]*[신딱딲]|미친[가-닣닥-힣]|[믿밑]힌|[염옘][0-9]*병|[샊샛샜샠섹섺셋셌셐셱솃솄솈섁섂섓섔섘]기|[섹섺섻쎅쎆쎇쎽쎾쎿섁섂섃썍썎썏][스쓰]|[지야][0-9]*랄|니[애에]미|갈[0-9]*보[^가-힣]|[뻐뻑뻒뻙뻨][0-9]*[뀨큐킹낑)|꼬[0-9]*추|곧[0-9]*휴|[가-힣]슬아치|자[0-9]*박꼼|빨통|[사싸](?:이코|가지|[0-9]*까시)|육[0-9]*시[랄럴]|육[0-9]*실[알얼할헐]|즐[^가-힣]|찌[0-9]*(?:질이|랭이)|찐[0-9]*따|찐[0-9]*찌버거|창[녀놈]|[가-힣]{2,}충[^가-힣]|[가-힣]{2,}츙|부녀자|화냥년|환[양향]년|호[0-9]*[구모]|조[선센][징]|조센|[쪼쪽쪾](?:[발빨]이|[바빠]리)|盧|무현|찌끄[레래]기|(?:하악){2,}|하[앍앜]|[낭당랑앙항남담람암함][ ]?[가-힣]+[띠찌]|느[금급]마|文在|在寅|(?<=[^\n])[家哥]|속냐|[tT]l[qQ]kf|Wls|[ㅂ]신|[ㅅ]발|[ㅈ]밥")
+
+
+# --- 1) 정규화 ---
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+             "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+
+# 음절 11,172자 → 자모 문자열 표 (import 시 한 번)
+_SYLLABLE_JAMO = {
+    chr(0xAC00 + code): CHOSEONG[code // 588] + JUNGSEONG[code % 588 // 28] + JONGSEONG[code % 28]
+    for code in range(11172)
+}
+
+
+def decompose(text: str) -> str:
+    return "".join(_SYLLABLE_JAMO.get(ch, ch) for ch in text)
+
+
+def fold(text: str):
+    # 남길 글자마다 (원문 위치, 자모 문자열) 을 돌려줌.
+    # 숫자 끼워 넣기(시1발, 존 1 나)와 그 뒤 공백은 없애고, 연속 공백은 하나로 접음
+    after_digit = False
+    prev_space = False
+    for i, ch in enumerate(text):
+        if "0" <= ch <= "9":
+            after_digit = True
+            continue
+        if ch == " ":
+            if after_digit or prev_space:
+                continue
+            prev_space = True
+        else:
+            after_digit = False
+            prev_space = False
+        yield i, _SYLLABLE_JAMO.get(ch, ch)
+
+
+# --- 2) 글자 패턴 (Aho-Corasick) ---
+# [..] 는 글자 하나 선택, " ?" 는 공백 하나 있어도 되고 없어도 됨.
+# 숫자 끼워 넣기는 정규화에서 접히므로 기존 정규식의 [0-9]* 는 쓰지 않습니다.
+LITERAL_PATTERNS = [
+    "[시씨씪슈쓔쉬쉽쒸쓉][바발벌빠빡빨뻘파팔펄]",
+    "[섊좆좇졷좄좃좉졽썅춍봊]",
+    "[ㅈ조]까",
+    "ㅅㅣㅂㅏ",
+    "ㅂㅅ",
+    "[ㅄᄲᇪᄺᄡᄣᄦᇠ]",
+    "[ㅅㅆᄴ][ㄲㅅㅆᄴㅂ]",
+    "[존좉좇] ?나",
+    "보빨",
+    "[봊봋봇봈볻봁봍] ?[빨이]",
+    "[후훚훐훛훋훗훘훟훝훑][장앙]",
+    "[엠앰]창",
+    "애[미비자]",
+    "[샊샛세쉐쉑쉨쉒객갞갟갯갰갴겍겎겏겤곅곆곇곗곘곜걕걖걗걧걨걬] ?[끼키퀴]",
+    "새 ?[키퀴]",
+    "[병븅][신딱딲]",
+    "[믿밑]힌",
+    "[염옘]병",
+    "[샊샛샜샠섹섺셋셌셐셱솃솄솈섁섂섓섔섘]기",
+    "[섹섺섻쎅쎆쎇쎽쎾쎿섁섂섃썍썎썏][스쓰]",
+    "[지야]랄",
+    "니[애에]미",
+    "곧휴",
+    "자박꼼",
+    "빨통",
+    "[사싸]이코",
+    "[사싸]가지",
+    "[사싸]까시",
+    "육시[랄럴]",
+    "육실[알얼할헐]",
+    "찌질이",
+    "찌랭이",
+    "찐따",
+    "찐찌버거",
+    "창[녀놈]",
+    "부녀자",
+    "화냥년",
+    "환[양향]년",
+    "호[구모]",
+    "조[선센]징",
+    "조센",
+    "[쪼쪽쪾][발빨]이",
+    "[쪼쪽쪾][바빠]리",
+    "盧",
+    "무현",
+    "찌끄[레래]기",
+    "하악하악",
+    "하[앍앜]",
+    "느[금급]마",
+    "文在",
+    "在寅",
+    "속냐",
+    "[tT]l[qQ]kf",
+    "Wls",
+    "ㅂ신",
+    "ㅅ발",
+    "ㅈ밥",
+]
+
+
+def expand_pattern(spec: str) -> set[str]:
+    parts = re.findall(r"\[[^\]]+\]| \?|.", spec)
+    choices = [
+        list(part[1:-1]) if part.startswith("[") else ["", " "] if part == " ?" else [part]
+        for part in parts
+    ]
+    return {"".join(combo) for combo in product(*choices)}
+
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._out = [[]]          # 이 상태에서 끝나는 패턴 길이들
+        for pattern in patterns:
+            state = 0
+            for unit in pattern:
+                nxt = self._goto[state].get(unit)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][unit] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            if len(pattern) not in self._out[state]:
+                self._out[state].append(len(pattern))
+        self.alphabet = {unit for edges in self._goto for unit in edges}
+
+        # BFS 로 실패 링크를 만들고, 실패 체인의 출력을 미리 합쳐 둠
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for unit, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and unit not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(unit, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + [n for n in self._out[self._fail[nxt]]
+                                                   if n not in self._out[nxt]]
+        # 실제로 만난 전이는 DFA 처럼 상태별로 기억 (알파벳 밖 글자는 항상 루트로)
+        self._delta = [dict(edges) for edges in self._goto]
+        # 음절 하나(자모 여러 개)를 통째로 넘기는 전이도 기억. 메모리 상한을 둠
+        self._chunk_delta = [{} for _ in self._goto]
+        self._chunk_entries = 0
+        self.max_chunk_entries = 200_000
+
+    def step(self, state: int, unit: str) -> int:
+        delta = self._delta[state]
+        nxt = delta.get(unit)
+        if nxt is None:
+            if unit not in self.alphabet:
+                return 0
+            fallback = state
+            while fallback and unit not in self._goto[fallback]:
+                fallback = self._fail[fallback]
+            nxt = self._goto[fallback].get(unit, 0)
+            delta[unit] = nxt
+        return nxt
+
+    def outputs(self, state: int) -> list[int]:
+        return self._out[state]
+
+    def step_chunk(self, state: int, units: str) -> tuple[int, list[int]]:
+        # units 를 모두 읽은 뒤의 상태와, 그 위치에서 끝나는 패턴 길이들
+        hit = self._chunk_delta[state].get(units)
+        if hit is None:
+            nxt = state
+            for unit in units:
+                nxt = self.step(nxt, unit)
+            hit = (nxt, self._out[nxt])
+            if self._chunk_entries < self.max_chunk_entries:
+                self._chunk_delta[state][units] = hit
+                self._chunk_entries += 1
+        return hit
+
+
+_LITERAL_AUTOMATON_PATTERNS = sorted(
+    {decompose(literal) for spec in LITERAL_PATTERNS for literal in expand_pattern(spec)}
+)
+_LITERAL_AUTOMATON = AhoCorasick(_LITERAL_AUTOMATON_PATTERNS)
+
+
+# 빠른 선별: 자동자 매치는 글자 경계에서 시작/끝나므로, 패턴 자모열을 "글자 통째" 로
+# 나눠 쓰는 모든 철자(시바, ㅅㅣ바, ㅅㅣㅂㅏ …)를 모으면 정규화된 원문에서 같은 매치를 찾을 수 있음.
+# 이 목록을 트라이 모양 정규식 하나로 만들어 C 로 검사합니다.
+_JAMO_SYLLABLE = {jamo: ch for ch, jamo in _SYLLABLE_JAMO.items()}
+
+
+def _spellings(units: str):
+    if not units:
+        yield ""
+        return
+    for size in range(1, min(3, len(units)) + 1):
+        piece = units[:size]
+        ch = piece if size == 1 else _JAMO_SYLLABLE.get(piece)
+        if ch is not None:
+            for rest in _spellings(units[size:]):
+                yield ch + rest
+
+
+def _trie_regex(words) -> str:
+    tree = {}
+    for word in words:
+        node = tree
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node):
+        # 더 짧은 철자가 이미 끝나면 그 뒤는 볼 필요 없음 (있는지 여부만 필요)
+        if "" in node:
+            return ""
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items())]
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    return emit(tree)
+
+
+_LITERAL_SCREEN = re.compile(_trie_regex(
+    {spelling for units in _LITERAL_AUTOMATON_PATTERNS for spelling in _spellings(units)}
+))
+# fold() 와 같은 규칙을 글자 단위로: 숫자로 시작하는 숫자/공백 덩어리 제거, 연속 공백 하나로
+_DIGIT_RUN = re.compile("[0-9][0-9 ]*")
+_SPACE_RUN = re.compile(" {2,}")
+
+
+def _literal_candidate(text: str) -> bool:
+    return bool(_LITERAL_SCREEN.search(_SPACE_RUN.sub(" ", _DIGIT_RUN.sub("", text))))
+
+
+# --- 3) 정규식이 꼭 필요한 패턴 (원문에 대해 검사) ---
+# [가-힣]{2,}충 → [가-힣]{2}충: 있는지 여부는 같고 되돌아가기가 없음.
+# [0-9]*[...0-9...]* → [...0-9...]*: 같은 언어를 별표 하나로.
+# (원래 정규식에서 이 문자 클래스는 '|꼬[0-9' 까지 삼키는 모양이지만, 동작을 그대로 유지합니다.)
+_RESIDUAL_REGEX = re.compile(
+    "[자보][0-9]+지"
+    "|[가-탏탑-힣]색기"
+    "|미친[가-닣닥-힣]"
+    "|갈[0-9]*보[^가-힣]"
+    "|[뻐뻑뻒뻙뻨][뀨큐킹낑)|꼬\\[0-9]*추"
+    "|[가-힣]슬아치"
+    "|즐[^가-힣]"
+    "|[가-힣]{2}충[^가-힣]"
+    "|[가-힣]{2}츙"
+    "|(?<=[^\n])[家哥]"
+)
+
+# [낭당..][ ]?[가-힣]+[띠찌] 는 정규식으로 쓰면 O(n^2) 이라 한글 덩어리 단위로 직접 검사
+_HANGUL_RUN = re.compile("[가-힣]+")
+_DDI_LEADS = "낭당랑앙항남담람암함"
+
+
+def _lead_ddi_spans(text: str) -> list[tuple[int, int]]:
+    if "띠" not in text and "찌" not in text:
+        return []
+    spans = []
+    prev_end = -2          # 앞 한글 덩어리가 끝난 위치 (그 덩어리 마지막 글자가 lead 일 때만)
+    for m in _HANGUL_RUN.finditer(text):
+        start, end = m.span()
+        run = m.group()
+        last_ddi = max(run.rfind("띠"), run.rfind("찌"))
+        if last_ddi > 0:
+            # 같은 덩어리 안: lead 뒤에 한 글자 이상 + 띠/찌
+            first_lead = min((i for i in map(run.find, _DDI_LEADS) if i >= 0), default=-1)
+            if first_lead >= 0 and last_ddi >= first_lead + 2:
+                spans.append((start + first_lead, start + last_ddi + 1))
+            # 공백 하나를 사이에 둔 경우: "낭 ..띠"
+            elif prev_end >= 0 and start == prev_end + 1 and text[prev_end] == " ":
+                spans.append((prev_end - 1, start + last_ddi + 1))
+        prev_end = end if run[-1] in _DDI_LEADS else -2
+    return spans
+
+
+# --- 검사 API ---
+class ProfanityMatch(NamedTuple):
+    start: int
+    end: int
+    text: str
+
+
+def _literal_spans(text: str, first_only: bool = False) -> list[tuple[int, int]]:
+    if not _literal_candidate(text):
+        return []
+    step_chunk = _LITERAL_AUTOMATON.step_chunk
+    spans = []
+    char_starts = {}      # unit 번호 → 그 글자의 원문 위치 (글자의 첫 unit 만)
+    n_units = 0
+    state = 0
+    for i, jamo in fold(text):
+        char_starts[n_units] = i
+        n_units += len(jamo)
+        state, lengths = step_chunk(state, jamo)
+        # 글자 경계에서 시작해 글자 경계에서 끝난 매치만 인정 (예: '갖까' 의 ㅈ까 는 제외)
+        for length in lengths:
+            start = char_starts.get(n_units - length)
+            if start is not None:
+                spans.append((start, i + 1))
+                if first_only:
+                    return spans
+    return spans
+
+
+def find_profanity(text: str) -> list[ProfanityMatch]:
+    spans = set(_literal_spans(text))
+    spans.update(m.span() for m in _RESIDUAL_REGEX.finditer(text))
+    spans.update(_lead_ddi_spans(text))
+    return [ProfanityMatch(s, e, text[s:e]) for s, e in sorted(spans)]
+
+
+def contains_profanity(text: str) -> bool:
+    # C 로 도는 정규식 → 덩어리 검사 → (선별을 통과하면) 자동자 순으로, 하나라도 찾으면 바로 종료
+    return bool(
+        _RESIDUAL_REGEX.search(text)
+        or _lead_ddi_spans(text)
+        or _literal_spans(text, first_only=True)
+    )
@@ -0,0 +1,278 @@
+# --- 프로세스 전체 LLM 요청 스케줄러 ---
+# 모든 도우미 함수의 chat.completions.create 호출이 여기를 거칩니다.
+#  - 동시에 날아가는 요청 수 상한
+#  - 분당 요청 수 / 분당 토큰 수 토큰 버킷 (OpenAI 계정 한도에 맞춤)
+#  - 우선순위: 학생이 기다리는 피드백이 미리 생성(prefetch)이나 최종 다듬기보다 먼저
+#  - 429 / 연결 오류 / 5xx 는 지터를 섞은 지수 백오프로 재시도 (Retry-After 가 있으면 따름)
+#  - 429 를 받으면 대기열 전체를 잠시 멈추고 요청 속도를 줄였다가 성공할수록 되돌림
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import openai
+
+from metrics import get_metrics
+from perf import percentile
+
+# 숫자가 작을수록 먼저
+PRIORITY_FEEDBACK = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_FINAL = 2
+PRIORITY_PREFETCH = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_FEEDBACK: "feedback",
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_FINAL: "final",
+    PRIORITY_PREFETCH: "prefetch",
+}
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        # per_minute <= 0 이면 제한 없음
+        self.capacity = per_minute
+        self.max_rate = per_minute / 60
+        self.rate = self.max_rate
+        self.level = float(per_minute)
+        self._stamp = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        # amount 만큼 꺼낼 수 있을 때까지 남은 시간 (한 번에 용량보다 큰 요청은 용량만큼만 요구)
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def slow_down(self):
+        # 429: 실제 한도가 설정보다 낮다는 뜻 → 채워지는 속도를 절반으로 (최소 설정의 1/16)
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def speed_up(self):
+        # 성공할 때마다 설정 속도 쪽으로 조금씩 회복
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+    def take(self, amount: float):
+        # 실제 사용량으로 정산할 때는 음수(돌려받기)나 잔량 초과(빚)도 허용
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level - amount)
+
+
+class _Ticket:
+    __slots__ = ("priority", "tokens", "queued", "granted")
+
+    def __init__(self, priority: int, tokens: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.queued = time.monotonic()
+        self.granted = 0.0
+
+
+class RequestScheduler:
+    def __init__(self, max_concurrency: int = 16, rpm: float = 500, tpm: float = 30000, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0, prefetch_reserve: float = 0.2,
+                 window: int = 1000):
+        self.max_concurrency = max_concurrency if max_concurrency > 0 else float("inf")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        # 미리 생성 요청은 버킷의 이 비율만큼을 남겨 둠 → 곧 올 학생 요청 몫
+        self.prefetch_reserve = prefetch_reserve
+        self._cond = threading.Condition()
+        self._heap: list[tuple[int, int, _Ticket]] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0   # 429 를 받으면 Retry-After 동안 모든 요청을 멈춤
+        self._waits = {p: deque(maxlen=window) for p in PRIORITY_NAMES}
+        self.granted = 0
+        self.throttled = 0      # 버킷이 비어 기다린 요청
+        self.retries = 0
+        self.gave_up = 0        # 재시도를 다 쓰고 실패
+        self.max_queue_depth = 0
+
+    def acquire(self, priority: int, tokens: int) -> _Ticket:
+        ticket = _Ticket(priority, tokens)
+        throttled = False
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), ticket))
+            self.max_queue_depth = max(self.max_queue_depth, len(self._heap))
+            while True:
+                if self._heap[0][2] is ticket and self._active < self.max_concurrency:
+                    now = time.monotonic()
+                    reserve = self.prefetch_reserve if priority >= PRIORITY_PREFETCH else 0.0
+                    wait = max(
+                        self._requests.wait_time(1 + reserve * self._requests.capacity, now),
+                        self._tokens.wait_time(tokens + reserve * self._tokens.capacity, now),
+                        self._paused_until - now,
+                    )
+                    if wait <= 0:
+                        break
+                    throttled = True
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            heapq.heappop(self._heap)
+            self._active += 1
+            self._requests.take(1)
+            self._tokens.take(min(tokens, self._tokens.capacity))
+            ticket.granted = time.monotonic()
+            self._waits[priority].append(ticket.granted - ticket.queued)
+            self.granted += 1
+            self.throttled += throttled
+            # 다음 순번이 바로 들어갈 수 있으면 깨움
+            self._cond.notify_all()
+        return ticket
+
+    def release(self, ticket: _Ticket, used_tokens: int | None = None):
+        with self._cond:
+            self._active -= 1
+            if used_tokens is not None:
+                # 추정치와 실제 사용량의 차이를 정산
+                self._tokens.take(used_tokens - min(ticket.tokens, self._tokens.capacity))
+            self._cond.notify_all()
+
+    def adjust_tokens(self, estimated: int, used: int):
+        # 자리를 이미 돌려준 뒤 실제 사용량(usage)으로 토큰 버킷 정산
+        with self._cond:
+            self._tokens.take(used - min(estimated, self._tokens.capacity))
+
+    def has_capacity(self) -> bool:
+        # 기다리는 요청이 없고 자리가 남았는지 (헤지 요청을 보내도 되는지 판단용)
+        with self._cond:
+            return not self._heap and self._active < self.max_concurrency and time.monotonic() >= self._paused_until
+
+    def _on_rate_limited(self, retry_after: float | None):
+        # 계정 한도에 걸렸으면 이 요청만이 아니라 대기열 전체를 멈추고, 요청 버킷을 비워
+        # 다시 열릴 때 한꺼번에 몰리지 않고 설정한 속도로 흘러가게 함
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + (retry_after or self.backoff_base))
+            self._requests.level = min(self._requests.level, 0.0)
+            if not self._requests.unlimited:
+                self._requests.slow_down()
+            self._cond.notify_all()
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                pass
+        if isinstance(error, openai.RateLimitError):
+            self._on_rate_limited(retry_after)
+        # full jitter: 0 ~ min(max, base * 2^attempt), Retry-After 보다 앞당기지는 않음
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return (retry_after or 0.0) + delay
+
+    def call(self, fn, priority: int, tokens: int, hold: bool = False):
+        # fn 을 순서/한도에 맞춰 실행하고 재시도 가능한 오류는 다시 시도.
+        # hold=True 면 (결과, 티켓)을 돌려주고 자리를 계속 잡고 있음 → 스트리밍이 끝나면 release
+        for attempt in itertools.count():
+            ticket = self.acquire(priority, tokens)
+            try:
+                result = fn()
+            except RETRYABLE_ERRORS as e:
+                self.release(ticket, used_tokens=0)
+                if attempt >= self.max_retries:
+                    with self._cond:
+                        self.gave_up += 1
+                    raise
+                with self._cond:
+                    self.retries += 1
+                time.sleep(self._backoff(attempt, e))
+                continue
+            except BaseException:
+                self.release(ticket, used_tokens=0)
+                raise
+            if not self._requests.unlimited:
+                with self._cond:
+                    self._requests.speed_up()
+            if hold:
+                return result, ticket
+            self.release(ticket)
+            return result
+
+    def stats(self) -> dict:
+        with self._cond:
+            waits = {
+                PRIORITY_NAMES[p]: {
+                    "count": len(values),
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p95_ms": percentile(values, 95) * 1000,
+                }
+                for p, values in self._waits.items()
+            }
+            return {
+                "rpm_effective": self._requests.rate * 60,
+                "queue_depth": len(self._heap),
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self._active,
+                "granted": self.granted,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "gave_up": self.gave_up,
+                "wait": waits,
+            }
+
+    def prometheus_lines(self) -> list[str]:
+        stats = self.stats()
+        lines = [
+            "# HELP story_llm_queue_depth Requests waiting in the scheduler.",
+            "# TYPE story_llm_queue_depth gauge",
+            f"story_llm_queue_depth {stats['queue_depth']}",
+            "# HELP story_llm_in_flight Requests currently sent to the API.",
+            "# TYPE story_llm_in_flight gauge",
+            f"story_llm_in_flight {stats['in_flight']}",
+            "# HELP story_llm_retries_total Retried calls (429, connection errors, 5xx).",
+            "# TYPE story_llm_retries_total counter",
+            f"story_llm_retries_total {stats['retries']}",
+            "# HELP story_llm_throttled_total Requests delayed by the request/token buckets.",
+            "# TYPE story_llm_throttled_total counter",
+            f"story_llm_throttled_total {stats['throttled']}",
+            "# HELP story_llm_queue_wait_seconds Scheduler queue wait by priority (recent window).",
+            "# TYPE story_llm_queue_wait_seconds summary",
+        ]
+        for name, row in stats["wait"].items():
+            lines.append(f'story_llm_queue_wait_seconds{{priority="{name}",quantile="0.5"}} {row["p50_ms"] / 1000:.4f}')
+            lines.append(f'story_llm_queue_wait_seconds{{priority="{name}",quantile="0.95"}} {row["p95_ms"] / 1000:.4f}')
+        return lines
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RequestScheduler:
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler(
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+                rpm=float(os.getenv("LLM_RPM", "500")),
+                tpm=float(os.getenv("LLM_TPM", "30000")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+                backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+                backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "20")),
+                prefetch_reserve=float(os.getenv("LLM_PREFETCH_RESERVE", "0.2")),
+            )
+            get_metrics().add_collector(_default_scheduler.prometheus_lines)
+        return _default_scheduler
@@ -0,0 +1,143 @@
+# --- 세션 스냅샷 저장소 ---
+# StorySession 을 로컬 SQLite 에 필드 단위로 zlib 압축해 저장합니다.
+# 체크포인트마다 지난번과 달라진 필드만 다시 쓰고, 재접속이나 서버 재시작 뒤에는
+# 재개 토큰(URL 의 ?s=...)으로 세션을 되살려 이미 받은 질문/피드백/최종 이야기를 그대로 씁니다.
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from story_session import StorySession
+
+
+def new_token() -> str:
+    return secrets.token_urlsafe(12)
+
+
+def _encode(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class SessionStore:
+    def __init__(self, path: str | None = None, ttl: float = 7 * 24 * 3600, max_tracked: int = 4096):
+        self.ttl = ttl
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        # 토큰별로 마지막에 기록한 필드 해시 (여기 없으면 다음 체크포인트에서 전부 씀)
+        self._digests: OrderedDict[str, dict[str, bytes]] = OrderedDict()
+        self.checkpoints = 0
+        self.fields_written = 0
+        self.fields_skipped = 0
+        self.bytes_written = 0
+        self.restores = 0
+
+        # path가 비어 있으면 저장하지 않음 (save/load 는 아무 일도 하지 않음)
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " token TEXT PRIMARY KEY, updated REAL NOT NULL, stage TEXT NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS session_fields ("
+                " token TEXT NOT NULL, field TEXT NOT NULL, value BLOB NOT NULL,"
+                " PRIMARY KEY (token, field))"
+            )
+            expired = time.time() - ttl
+            self._db.execute(
+                "DELETE FROM session_fields WHERE token IN (SELECT token FROM sessions WHERE updated < ?)",
+                (expired,),
+            )
+            self._db.execute("DELETE FROM sessions WHERE updated < ?", (expired,))
+            self._db.commit()
+
+    def save(self, token: str, session: StorySession) -> int:
+        # 바뀐 필드만 기록하고 기록한 필드 수를 돌려줌
+        if self._db is None:
+            return 0
+        encoded = {name: _encode(value) for name, value in session.to_dict().items()}
+        with self._lock:
+            known = self._digests.get(token, {})
+            changed = {}
+            for name, raw in encoded.items():
+                digest = hashlib.blake2b(raw, digest_size=16).digest()
+                if known.get(name) != digest:
+                    changed[name] = (raw, digest)
+            self.checkpoints += 1
+            self.fields_skipped += len(encoded) - len(changed)
+            if not changed:
+                return 0
+            rows = [(token, name, zlib.compress(raw)) for name, (raw, _) in changed.items()]
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO session_fields (token, field, value) VALUES (?, ?, ?)", rows
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sessions (token, updated, stage) VALUES (?, ?, ?)",
+                    (token, time.time(), session.stage),
+                )
+            self._remember(token, {**known, **{name: digest for name, (_, digest) in changed.items()}})
+            self.fields_written += len(rows)
+            self.bytes_written += sum(len(row[2]) for row in rows)
+            return len(rows)
+
+    def load(self, token: str) -> StorySession | None:
+        if self._db is None or not token:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT updated FROM sessions WHERE token = ?", (token,)).fetchone()
+            if row is None or time.time() - row[0] > self.ttl:
+                return None
+            rows = self._db.execute(
+                "SELECT field, value FROM session_fields WHERE token = ?", (token,)
+            ).fetchall()
+            raw = {name: zlib.decompress(value) for name, value in rows}
+            try:
+                session = StorySession.from_dict({name: json.loads(value) for name, value in raw.items()})
+            except (KeyError, ValueError, TypeError):
+                # 예전 형식이거나 일부만 남은 스냅샷 → 새로 시작
+                return None
+            self._remember(token, {name: hashlib.blake2b(value, digest_size=16).digest()
+                                   for name, value in raw.items()})
+            self.restores += 1
+            return session
+
+    def _remember(self, token: str, digests: dict[str, bytes]):
+        self._digests[token] = digests
+        self._digests.move_to_end(token)
+        while len(self._digests) > self.max_tracked:
+            self._digests.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkpoints": self.checkpoints,
+                "fields_written": self.fields_written,
+                "fields_skipped": self.fields_skipped,
+                "bytes_written": self.bytes_written,
+                "restores": self.restores,
+            }
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_default_store() -> SessionStore:
+    # 프로세스 단위 싱글턴: 모든 Streamlit 세션이 같은 파일을 씀
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = SessionStore(
+                path=os.getenv("SESSION_STORE_PATH", ".cache/sessions.sqlite3"),
+                ttl=float(os.getenv("SESSION_STORE_TTL", str(7 * 24 * 3600))),
+            )
+        return _default_store
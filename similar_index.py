@@ -0,0 +1,224 @@
+# --- 비슷한 입력 재사용 색인 (MinHash / LSH) ---
+# 같은 반 학생들은 예시를 조금만 바꾼 요약이나 거의 같은 답을 자주 냅니다. 프롬프트가 한 글자만 달라도
+# llm_cache 의 정확 일치 캐시는 놓치므로, 정규화한 입력의 글자 3-gram MinHash 서명을 LSH 버킷에 넣어
+# 비슷한 입력(추정 Jaccard 유사도가 기준 이상)을 찾고 저장된 결과를 돌려줍니다.
+#  - 질문 생성: 같은 요약에 질문 세트 변형을 몇 개까지 모은 뒤 돌아가며 내줌 → 반 전체가 같은 질문만 받지 않음
+#    이어쓰기 질문은 모두가 같은 요약을 공유해 전체 맥락으로는 다른 이야기도 비슷해 보이므로
+#    마지막 조각만으로 더 엄격한 기준에서 찾음 (generate_questions_next)
+#  - 피드백: 공백만 다른 같은 답(+ 비슷한 이야기 맥락)일 때만 재사용. 오타 하나, 이름 하나만 달라도
+#    errors/improved 가 다른 학생 것이 되므로 (추천 예시는 그대로 이야기에 붙음) 비슷한 답은 모델에 물음
+#  - 메모리 안에서만, 항목 수 상한을 넘으면 가장 오래 안 쓴 항목부터 버림
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import get_metrics
+
+_NOISE = re.compile(r"[^0-9a-z가-힣]+")
+_PRIME = 4294967311  # 2^32 보다 큰 소수
+
+# 작업별 기본 유사도 기준과 모아 둘 결과 변형 수
+TASK_THRESHOLDS = {"generate_questions": 0.7, "generate_questions_next": 0.9, "generate_feedback": 0.85}
+TASK_VARIANTS = {"generate_questions": 3, "generate_questions_next": 3, "generate_feedback": 1}
+# 입력이 정확히 같아야(exact_text 기준) 재사용하는 작업. 유사도 기준은 guard(맥락)에만 의미가 있음
+EXACT_TASKS = frozenset({"generate_feedback"})
+
+
+def normalize(text: str) -> str:
+    # 전각/호환 문자 통일, 소문자, 마크다운 강조·문장부호·공백 제거
+    return _NOISE.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def exact_text(text: str) -> str:
+    # 정확 일치용: 전각/호환 문자와 공백만 통일 (문장부호·글자는 피드백 내용을 바꾸므로 그대로)
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class _Entry:
+    __slots__ = ("task", "signature", "guard", "exact", "results", "served")
+
+    def __init__(self, task: str, signature, guard, exact: str | None):
+        self.task = task
+        self.signature = signature
+        self.guard = guard          # 함께 비슷해야 하는 입력의 서명 (예: 피드백의 이야기 맥락), 없으면 None
+        self.exact = exact          # EXACT_TASKS 면 exact_text(입력), 아니면 None
+        self.results = []
+        self.served = 0
+
+
+class SimilarIndex:
+    def __init__(self, max_entries: int = 2048, num_perm: int = 64, bands: int = 16, shingle: int = 3,
+                 thresholds: dict[str, float] | None = None, variants: dict[str, int] | None = None, seed: int = 1,
+                 exact_tasks=EXACT_TASKS):
+        # bands × rows = num_perm. rows=4, bands=16 이면 유사도 0.5 근처부터 후보가 됨 (최종 판정은 기준값으로)
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self.thresholds = dict(TASK_THRESHOLDS if thresholds is None else thresholds)
+        self.variants = dict(TASK_VARIANTS if variants is None else variants)
+        self.exact_tasks = frozenset(exact_tasks)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 31, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 31, num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._buckets: dict[tuple[str, int, bytes], set[int]] = {}
+        self._next_id = 0
+        self.lookups = 0
+        self.hits = 0
+        self.fills = 0          # 비슷한 항목은 있지만 변형을 더 모으려고 새로 호출한 경우
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def signature(self, text: str) -> np.ndarray:
+        text = normalize(text)
+        n = self.shingle
+        shingles = {text[i:i + n] for i in range(max(len(text) - n + 1, 1))}
+        # 프로세스 안에서만 쓰는 색인이라 내장 hash 로 충분
+        hashes = np.fromiter((hash(s) & 0xFFFFFFFF for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    @staticmethod
+    def similarity(sig1: np.ndarray, sig2: np.ndarray) -> float:
+        return float(np.mean(sig1 == sig2))
+
+    def _band_keys(self, task: str, signature: np.ndarray):
+        for band in range(self.bands):
+            yield task, band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _exact(self, task: str, text: str) -> str | None:
+        return exact_text(text) if task in self.exact_tasks else None
+
+    def _find(self, task: str, signature, guard, exact: str | None) -> tuple[int, _Entry] | tuple[None, None]:
+        # LSH 후보 중 기준을 넘는 가장 비슷한 항목 (exact 가 있으면 입력이 정확히 같은 항목만)
+        candidates = set()
+        for key in self._band_keys(task, signature):
+            candidates |= self._buckets.get(key, set())
+        threshold = self.thresholds.get(task, 1.0)
+        best, best_score = (None, None), threshold
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry.exact != exact:
+                continue
+            score = self.similarity(signature, entry.signature)
+            if score < best_score:
+                continue
+            if guard is not None and (entry.guard is None or self.similarity(guard, entry.guard) < threshold):
+                continue
+            best, best_score = (entry_id, entry), score
+        return best
+
+    def lookup(self, task: str, text: str, guard_text: str | None = None) -> tuple[object | None, int]:
+        # (저장된 결과, 새로 만들 변형 번호). 결과가 None 이면 호출한 쪽이 새로 만들어 add 로 넣음.
+        # 변형 번호는 정확 일치 캐시 키에 넣어, 같은 프롬프트로도 서로 다른 결과를 모을 수 있게 함
+        if not self.enabled:
+            return None, 0
+        signature = self.signature(text)
+        guard = None if guard_text is None else self.signature(guard_text)
+        with self._lock:
+            self.lookups += 1
+            entry_id, entry = self._find(task, signature, guard, self._exact(task, text))
+            if entry is None:
+                return None, 0
+            self._entries.move_to_end(entry_id)
+            if len(entry.results) < self.variants.get(task, 1):
+                self.fills += 1
+                return None, len(entry.results)
+            # 모아 둔 변형을 돌아가며
+            result = entry.results[entry.served % len(entry.results)]
+            entry.served += 1
+            self.hits += 1
+            return result, 0
+
+    def add(self, task: str, text: str, result, guard_text: str | None = None):
+        if not self.enabled:
+            return
+        signature = self.signature(text)
+        guard = None if guard_text is None else self.signature(guard_text)
+        exact = self._exact(task, text)
+        with self._lock:
+            entry_id, entry = self._find(task, signature, guard, exact)
+            if entry is None:
+                entry_id, entry = self._next_id, _Entry(task, signature, guard, exact)
+                self._next_id += 1
+                self._entries[entry_id] = entry
+                for key in self._band_keys(task, signature):
+                    self._buckets.setdefault(key, set()).add(entry_id)
+            if result not in entry.results and len(entry.results) < self.variants.get(task, 1):
+                entry.results.append(result)
+            self._entries.move_to_end(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        entry_id, entry = self._entries.popitem(last=False)
+        for key in self._band_keys(entry.task, entry.signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+        self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "buckets": len(self._buckets),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "fills": self.fills,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            }
+
+    def prometheus_lines(self) -> list[str]:
+        stats = self.stats()
+        return [
+            "# HELP story_similar_lookups_total Near-duplicate index lookups.",
+            "# TYPE story_similar_lookups_total counter",
+            f"story_similar_lookups_total {stats['lookups']}",
+            "# HELP story_similar_hits_total Lookups answered from a stored near-duplicate result.",
+            "# TYPE story_similar_hits_total counter",
+            f"story_similar_hits_total {stats['hits']}",
+            "# HELP story_similar_evictions_total Entries evicted to stay under the size limit.",
+            "# TYPE story_similar_evictions_total counter",
+            f"story_similar_evictions_total {stats['evictions']}",
+            "# HELP story_similar_entries Entries in the near-duplicate index.",
+            "# TYPE story_similar_entries gauge",
+            f"story_similar_entries {stats['entries']}",
+        ]
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_default_index() -> SimilarIndex:
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = SimilarIndex(
+                max_entries=int(os.getenv("SIMILAR_INDEX_MAX_ENTRIES", "2048")),
+                thresholds={
+                    "generate_questions": float(os.getenv("SIMILAR_QUESTIONS_THRESHOLD", "0.7")),
+                    "generate_questions_next": float(os.getenv("SIMILAR_NEXT_QUESTIONS_THRESHOLD", "0.9")),
+                    "generate_feedback": float(os.getenv("SIMILAR_FEEDBACK_THRESHOLD", "0.85")),
+                },
+                variants={
+                    "generate_questions": int(os.getenv("SIMILAR_QUESTION_VARIANTS", "3")),
+                    "generate_questions_next": int(os.getenv("SIMILAR_QUESTION_VARIANTS", "3")),
+                    "generate_feedback": 1,
+                },
+            )
+            get_metrics().add_collector(_default_index.prometheus_lines)
+        return _default_index
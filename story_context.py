@@ -0,0 +1,134 @@
+# --- 프롬프트에 넣을 이야기 맥락 ---
+# 이야기가 길어질수록 current_segment 전체를 매번 보내면 토큰과 지연이 계속 늘어납니다.
+# 최근 N 조각은 그대로, 그보다 앞부분은 조각마다 첫/마지막 문장만 남긴 요약으로 접고,
+# 전체가 토큰 예산을 넘지 않게 잘라서 보냅니다. (토큰 수는 로컬 추정치)
+import logging
+import math
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+_HANGUL = re.compile("[가-힣]")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    # gpt-4o 토크나이저 기준 대략: 한글 음절 1개 ≈ 1토큰, 그 밖의 글자는 4글자 ≈ 1토큰
+    hangul = len(_HANGUL.findall(text))
+    others = len(text) - hangul - text.count(" ")
+    return hangul + math.ceil(max(others, 0) / 4)
+
+
+def _summarize_segment(segment: str) -> list[str]:
+    sentences = [s.strip() for s in _SENTENCE_END.split(segment.strip()) if s.strip()]
+    if len(sentences) <= 2:
+        return sentences
+    return [sentences[0], sentences[-1]]
+
+
+class StoryContext:
+    def __init__(self, keep_last: int = 4, token_budget: int = 1500):
+        self.keep_last = keep_last
+        self.token_budget = token_budget
+        self.segments: list[str] = []
+        self.summary: list[str] = []    # 접힌 앞부분의 요약 문장들
+        self._folded = 0                # summary 에 접힌 조각 수
+
+    def append(self, segment: str):
+        self.segments.append(segment)
+        # 창 밖으로 밀려난 조각만 새로 요약에 더함
+        while len(self.segments) - self._folded > self.keep_last:
+            self._fold_next()
+
+    def _fold_next(self):
+        self.summary += _summarize_segment(self.segments[self._folded])
+        self._folded += 1
+
+    def full_text(self) -> str:
+        return "\n".join(self.segments)
+
+    def render(self) -> str:
+        # 저장된 상태는 건드리지 않고 복사본으로 예산에 맞춘 보기만 만듦 (상태는 append 에서만 바뀜)
+        summary, folded = list(self.summary), self._folded
+        text = self._compose(summary, folded)
+        # 예산 초과 시: 최근 조각을 하나씩 더 접고(최소 1개는 그대로), 그래도 넘치면 요약의 오래된 문장부터 버림
+        while estimate_tokens(text) > self.token_budget and len(self.segments) - folded > 1:
+            summary += _summarize_segment(self.segments[folded])
+            folded += 1
+            text = self._compose(summary, folded)
+        while estimate_tokens(text) > self.token_budget and len(summary) > 1:
+            # 첫 문장(처음 요약의 도입부)은 남김
+            del summary[1]
+            text = self._compose(summary, folded)
+        return text
+
+    def _compose(self, summary: list[str], folded: int) -> str:
+        recent = "\n".join(self.segments[folded:])
+        if not summary:
+            return recent
+        return f"(앞부분 요약) {' '.join(summary)}\n\n{recent}"
+
+    def to_dict(self) -> dict:
+        return {
+            "keep_last": self.keep_last,
+            "token_budget": self.token_budget,
+            "segments": list(self.segments),
+            "summary": list(self.summary),
+            "folded": self._folded,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StoryContext":
+        ctx = cls(keep_last=data["keep_last"], token_budget=data["token_budget"])
+        ctx.segments = list(data["segments"])
+        ctx.summary = list(data["summary"])
+        ctx._folded = data["folded"]
+        return ctx
+
+
+class ContextStats:
+    # 프롬프트마다 전체 이야기 대비 아낀 토큰 수 (프로세스 전체 누적)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.full_tokens = 0
+        self.sent_tokens = 0
+
+    def record(self, task: str, full_text: str, sent_text: str) -> int:
+        full, sent = estimate_tokens(full_text), estimate_tokens(sent_text)
+        with self._lock:
+            self.calls += 1
+            self.full_tokens += full
+            self.sent_tokens += sent
+        logger.info("context %s: %d → %d tokens (saved %d)", task, full, sent, full - sent)
+        return full - sent
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "full_tokens": self.full_tokens,
+                "sent_tokens": self.sent_tokens,
+                "saved_tokens": self.full_tokens - self.sent_tokens,
+            }
+
+
+def new_story_context() -> StoryContext:
+    return StoryContext(
+        keep_last=int(os.getenv("STORY_CONTEXT_SEGMENTS", "4")),
+        token_budget=int(os.getenv("STORY_CONTEXT_TOKENS", "1500")),
+    )
+
+
+_context_stats = None
+_context_stats_lock = threading.Lock()
+
+
+def get_context_stats() -> ContextStats:
+    global _context_stats
+    with _context_stats_lock:
+        if _context_stats is None:
+            _context_stats = ContextStats()
+        return _context_stats
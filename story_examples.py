@@ -0,0 +1,21 @@
+# --- 요약 예시 (init 화면) ---
+# 한 번만 import 되어 모든 세션이 공유합니다.
+
+example_title=[
+    "✅ 1. **시간**의 흐름에 따라 요약",
+    "✅ 2. **장소**의 이동에 따라 요약",
+    "✅ 3. **이야기 구조**에 따라 요약 \n\n(발단–전개–위기–절정–결말)",
+    "✅ 4. **육하원칙**에 따라 요약 \n\n(누가, 언제, 어디서, 무엇을, 어떻게, 왜)",
+    "✅ 5. **등장인물** 중심 요약"
+]
+
+examples=[
+    "**옛날**에 흥부와 놀부 형제가 살았어요. **그러던 어느 날,** 욕심 많은 형 놀부는 착한 동생 흥부를 집에서 내쫓았고, 흥부는 가난하지만 성실하게 살아갔어요. **그러던 중,** 어느 날 흥부는 다친 제비를 우연히 발견하고 정성껏 치료해 주었어요. **며칠 뒤,** 제비는 고마움의 표시로 박씨 한 알을 물어다 주었고, 흥부는 그 박씨를 정성껏 가꾸었어요. **그러자** 박이 자라 열매가 맺혔고, 그 속에서는 금은보화가 나와 흥부는 큰 부자가 되었어요. **이 소식을 들은** 놀부는 욕심을 부려 일부러 제비 다리를 부러뜨린 뒤 박씨를 얻었어요. 하지만 **박을 가르고 나자** 그 안에서는 괴물과 벌이 튀어나와 놀부는 크게 혼쭐이 났어요.",
+    "흥부는 **자신의 집**에서 아내와 아이들과 함께 가난하게 살고 있었어요. 어느 날, **집 앞 마당**에서 다친 제비를 발견하고 정성껏 치료해 주었죠. 그 후 제비가 물어다 준 박씨를 받아 **집 근처 밭에** 심었고, 시간이 지나 박을 따 보니 그 속에는 금은보화가 가득 들어 있었어요. 이 소식을 들은 놀부는 **흥부의 집**을 찾아가 어떤 일이 있었는지 듣고 그대로 따라 하기로 해요.**자기 집 마당**에 박씨를 심고 박이 자라자 자르는데, 그 속에서 괴물이 튀어나와 **집 안이** 엉망이 되어 버렸어요.결국 놀부는 **자신의 집**에서 큰 혼쭐이 나고, 스스로의 잘못을 깨닫게 되었답니다.",
+    "**발단:** 흥부와 놀부는 성격이 매우 달랐고, 놀부는 흥부를 집에서 내쫓았어요.\n\n**전개:** 흥부는 다친 제비를 치료해 주고, 제비는 박씨를 물어다 주었어요.\n\n**위기:** 박 속에서 금은보화가 나와 흥부는 부자가 되었고, 놀부는 이를 보고 흉내를 냈어요.\n\n**절정:** 놀부는 일부러 제비를 다치게 해 박씨를 얻었지만, 박 속에서는 괴물과 벌이 나왔어요.\n\n**결말:** 놀부는 벌을 받고 자신의 잘못을 뉘우쳤으며, 형제는 다시 화해하게 되었어요.",
+    "**누가:** 흥부와 놀부 형제가\n\n**언제:** 옛날에\n\n**어디서:** 같은 마을에서 살았어요.\n\n**무엇을:** 흥부는 제비를 도와 박씨를 얻고 부자가 되었고, 놀부는 그걸 따라 하다가 벌을 받았어요.\n\n**어떻게:** 흥부는 착하게 행동했고, 놀부는 욕심을 부렸어요.\n\n**왜:** 흥부는 제비를 진심으로 도와주었고, 놀부는 부자가 되고 싶은 마음에 따라 했기 때문이에요.",
+    "**흥부**는 가난했지만 마음이 착해 다친 **제비**를 정성껏 돌봐 주었어요. 제비가 가져온 박씨를 심었더니, 박 속에서 금은보화가 나와 큰 부자가 되었어요. \n\n**놀부**는 그 이야기를 듣고 흥부를 따라 했지만, 욕심을 부려 제비를 일부러 다치게 했어요. 결국 놀부가 키운 박에서는 괴물과 벌이 나왔고, 놀부는 크게 혼이 났어요. 그 일로 놀부는 자신의 잘못을 깨닫고 흥부와 화해하게 되었어요."
+    ]
+
+# init 화면 카드에 그대로 넣을 마크다운 (재실행마다 다시 만들지 않도록 미리 조립)
+example_cards = [f" {title} \n\n{body}" for title, body in zip(example_title, examples)]
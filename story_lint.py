@@ -0,0 +1,152 @@
+# --- 입력 검사 + 로컬 한국어 린터 ---
+# 1) check_input: 요약/답변 제출 전에 막는 검사 (빈 입력 → 비속어 → 20자). 화면과 batch.py 가 같이 씀
+# 2) lint: 피드백 프롬프트가 gpt-4o 에 찾아 달라고 하던 기계적인 문제를 정규식으로 바로 찾음
+#    - 자음/모음만 쓴 줄임말 (ㅋㅋ, ㅎㅎ, ㅠㅠ, ㅇㅋ)
+#    - 같은 글자 4번 이상 (아아아아), 같은 문장부호 반복 (!!, ??, ....)
+#    - 짝이 안 맞는 따옴표
+#    - 기본 띄어쓰기 (문장부호 앞 공백, 문장부호/쉼표 뒤 붙여 쓰기)
+#    찾은 문제는 모델을 기다리지 않고 바로 보여 주고, story_llm 은 그 결과(또는 "로컬 검사 통과")를 적은
+#    짧은 프롬프트로 내용/맞춤법만 봐 달라고 합니다. 고치고 나면 볼 내용이 남지 않는 답(ㅋㅋ만 잔뜩 등)만
+#    LINT_SHORT_CIRCUIT 일 때 모델 없이 local_feedback 으로 끝냄
+import re
+from typing import NamedTuple
+
+from metrics import timed_check
+from profanity import contains_profanity as _contains_profanity
+
+# 피드백 dict 의 "source" 값. 로컬 피드백의 추천 예시는 다듬은 글이 아님
+LOCAL_SOURCE = "lint"
+
+# 이야기로 볼 최소 글자 수 (입력 검사와 "검토할 내용이 남았는지" 판단에 같이 씀)
+MIN_CHARS = 20
+
+INPUT_MESSAGES = {
+    "summary": ("이야기를 입력해주세요.", "비속어가 포함되지 않은 이야기를 작성해주세요.",
+                "최소 20자 이상의 이야기 요약을 입력해주세요."),
+    "answer": ("답변을 입력해주세요.", "비속어가 포함되지 않은 답변을 작성해주세요.",
+               "최소 20자 이상의 답변을 입력해주세요."),
+}
+
+contains_profanity = timed_check("contains_profanity")(_contains_profanity)
+
+
+@timed_check("is_story_related")
+def is_story_related(text: str) -> bool:
+    # 최소 글자 수 기준만 사용
+    return len(text.strip()) >= MIN_CHARS
+
+
+def check_input(text: str, kind: str = "answer") -> str | None:
+    # 통과하면 None, 아니면 학생에게 보여줄 안내 문구
+    empty, profane, short = INPUT_MESSAGES[kind]
+    if not text.strip():
+        return empty
+    if contains_profanity(text):
+        return profane
+    if not is_story_related(text):
+        return short
+    return None
+
+
+class LintIssue(NamedTuple):
+    kind: str          # slang | repeat | quote | spacing
+    start: int
+    end: int
+    message: str       # 틀린 부분 (errors)
+    suggestion: str    # 고칠 방법 (suggestions)
+
+
+_JAMO = re.compile(r"[ㄱ-ㅎㅏ-ㅣ]+")
+_REPEAT_CHAR = re.compile(r"([가-힣a-zA-Z])\1{3,}")
+_REPEAT_MARK = re.compile(r"([!?~])\1+|\.{4,}")
+# 말줄임표(... / …)는 앞을 띄어 써도 됨
+_SPACE_BEFORE_MARK = re.compile(r"(?<=[가-힣]) +(?=[,!?]|\.(?!\.))")
+_NO_SPACE_AFTER_MARK = re.compile(r"(?<![.\d])[.!?,](?=[가-힣])")
+_SPACES = re.compile(r"[ \t]{2,}")
+_QUOTE_PAIRS = (("“", "”"), ("‘", "’"))
+_STRAIGHT_QUOTES = ('"', "'")
+
+
+def _slang_issue(match) -> LintIssue:
+    run = match.group()
+    if set(run) <= set("ㅋㅎ"):
+        message, suggestion = f"‘{run}’ 같은 웃음 줄임말을 썼어요.", "‘깔깔 웃었어요’처럼 문장으로 나타내 보세요."
+    elif set(run) <= set("ㅠㅜ"):
+        message, suggestion = f"‘{run}’ 같은 울음 표시를 썼어요.", "‘눈물이 났어요’처럼 문장으로 나타내 보세요."
+    else:
+        message, suggestion = f"‘{run}’처럼 자음이나 모음만 쓴 줄임말이 있어요.", "완전한 낱말로 써 보세요."
+    return LintIssue("slang", match.start(), match.end(), message, suggestion)
+
+
+def lint(text: str) -> list[LintIssue]:
+    # 입력 순서대로 문제 목록. 연속 공백은 고쳐서 보내기만 하고 문제로 치지 않음
+    issues = [_slang_issue(m) for m in _JAMO.finditer(text)]
+    for m in _REPEAT_CHAR.finditer(text):
+        issues.append(LintIssue("repeat", m.start(), m.end(), f"‘{m.group()}’처럼 같은 글자를 여러 번 썼어요.",
+                                "소리를 길게 나타내고 싶으면 ‘길게 소리쳤어요’처럼 문장으로 써 보세요."))
+    for m in _REPEAT_MARK.finditer(text):
+        issues.append(LintIssue("repeat", m.start(), m.end(), f"‘{m.group()}’처럼 문장부호를 겹쳐 썼어요.",
+                                "문장부호는 하나만 써요. (말줄임표는 ‘...’)"))
+    for opening, closing in _QUOTE_PAIRS:
+        if text.count(opening) != text.count(closing):
+            at = max(text.rfind(opening), text.rfind(closing))
+            issues.append(LintIssue("quote", at, at + 1,
+                                    f"여는 따옴표({opening})와 닫는 따옴표({closing})의 수가 달라요.",
+                                    "대화가 끝나는 곳에 따옴표를 닫아 주세요."))
+    for quote in _STRAIGHT_QUOTES:
+        if text.count(quote) % 2:
+            at = text.rfind(quote)
+            issues.append(LintIssue("quote", at, at + 1, f"따옴표({quote})가 짝이 맞지 않아요.",
+                                    "대화가 끝나는 곳에 따옴표를 닫아 주세요."))
+    for m in _SPACE_BEFORE_MARK.finditer(text):
+        issues.append(LintIssue("spacing", m.start(), m.end(), "문장부호 앞에 띄어쓰기를 했어요.",
+                                "마침표, 쉼표, 물음표, 느낌표는 앞 글자에 붙여 써요."))
+    for m in _NO_SPACE_AFTER_MARK.finditer(text):
+        joined = text[m.start():m.end() + 1]
+        issues.append(LintIssue("spacing", m.start(), m.end(), f"‘{joined}’처럼 문장부호 뒤를 붙여 썼어요.",
+                                "문장부호 다음에는 한 칸 띄어 써요."))
+    issues.sort(key=lambda issue: issue.start)
+    return issues
+
+
+lint_answer = timed_check("lint_answer")(lint)
+
+
+def autofix(text: str) -> str:
+    # 확실히 고칠 수 있는 것만 고친 글 (따옴표 짝은 어디를 닫을지 몰라 그대로 둠)
+    text = _JAMO.sub("", text)
+    text = _REPEAT_CHAR.sub(lambda m: m.group(1) * 2, text)
+    text = _REPEAT_MARK.sub(lambda m: "..." if m.group().startswith(".") else m.group(1), text)
+    text = _SPACE_BEFORE_MARK.sub("", text)
+    text = _NO_SPACE_AFTER_MARK.sub(lambda m: m.group() + " ", text)
+    return compact(text)
+
+
+def compact(text: str) -> str:
+    # 연속 공백/줄 끝 공백 정리 (프롬프트에 보낼 때도 사용)
+    lines = [_SPACES.sub(" ", line).strip() for line in text.strip().splitlines()]
+    return "\n".join(lines)
+
+
+def _unique(items) -> list[str]:
+    return list(dict.fromkeys(items))
+
+
+def local_feedback(text: str, issues: list[LintIssue]) -> dict:
+    # 모델 호출 없이 바로 보여줄 피드백 (화면의 네 칸 + source)
+    return {
+        "positives": ["이야기를 이어서 끝까지 써 주었어요. 아래 부분만 고치면 더 멋진 글이 돼요!"],
+        "errors": _unique(issue.message for issue in issues),
+        "suggestions": _unique(issue.suggestion for issue in issues),
+        "improved": autofix(text),
+        "source": LOCAL_SOURCE,
+    }
+
+
+def reviewable(text: str) -> bool:
+    # 기계적인 문제를 고친 뒤에도 모델이 볼 내용(맞춤법, 이야기)이 남아 있는지
+    return len(autofix(text)) >= MIN_CHARS
+
+
+def is_local_feedback(feedback: dict | None) -> bool:
+    return bool(feedback) and feedback.get("source") == LOCAL_SOURCE
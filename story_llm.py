@@ -0,0 +1,505 @@
+# --- LLM 도우미 함수 ---
+# 질문 생성 / 피드백 / 이어쓰기 다듬기 / 최종 다듬기 프롬프트와 호출.
+# Streamlit 에 의존하지 않아 화면(streamlit_app.py)과 일괄 처리(batch.py)가 함께 씁니다.
+import copy
+import itertools
+import os
+import queue
+import threading
+import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+from feedback_schema import (
+    FEEDBACK_FIELDS,
+    FEEDBACK_RESPONSE_FORMAT,
+    PARSE_ERROR,
+    Feedback,
+    feedback_readable,
+    parse_feedback,
+)
+from feedback_stream import FeedbackStreamParser
+from llm_cache import get_default_cache, make_key
+from llm_client import get_client
+from metrics import get_metrics
+from model_router import get_default_router
+from scheduler import PRIORITY_FEEDBACK, PRIORITY_FINAL, PRIORITY_INTERACTIVE, get_default_scheduler
+from similar_index import get_default_index
+from story_context import estimate_tokens
+from story_lint import compact, lint, lint_answer, local_feedback, reviewable
+
+# 피드백을 JSON 스키마 구조화 출력으로 받을지
+FEEDBACK_STRUCTURED = os.getenv("FEEDBACK_STRUCTURED", "1") != "0"
+
+# 로컬 린터가 찾은 문제(ㅋㅋ, 반복 글자, 따옴표, 띄어쓰기)는 늘 먼저 보여 주고 모델에도 적어 보냄.
+# 켜면 고친 뒤 볼 내용이 남지 않는 답(ㅋㅋ만 잔뜩 등)에 한해 모델을 부르지 않음
+LINT_SHORT_CIRCUIT = os.getenv("LINT_SHORT_CIRCUIT", "0") == "1"
+
+# 최종 다듬기에서 한 요청에 묶을 다듬지 않은 조각의 토큰 수(추정)와 동시 요청 수
+FINAL_CHUNK_TOKENS = int(os.getenv("FINAL_CHUNK_TOKENS", "600"))
+FINAL_CHUNK_WORKERS = int(os.getenv("FINAL_CHUNK_WORKERS", "4"))
+
+# 도우미 함수별 스케줄러 우선순위 (미리 생성은 호출하는 쪽에서 PRIORITY_PREFETCH 로 넘김)
+TASK_PRIORITY = {
+    "generate_feedback": PRIORITY_FEEDBACK,
+    "generate_questions": PRIORITY_INTERACTIVE,
+    "refine_extension": PRIORITY_INTERACTIVE,
+    "refine_story": PRIORITY_FINAL,
+}
+
+# 토큰 버킷용 응답 길이 추정 (refine_story 는 다듬을 부분을 다시 쓰므로 프롬프트만큼)
+COMPLETION_TOKENS = {
+    "generate_feedback": 400,
+    "generate_questions": 150,
+    "refine_extension": 300,
+}
+
+
+def _token_estimate(prompt: str, task: str) -> int:
+    prompt_tokens = estimate_tokens(prompt)
+    return prompt_tokens + COMPLETION_TOKENS.get(task, prompt_tokens)
+
+
+def _chat(prompt: str, temperature: float, model: str | None = None, response_format: dict | None = None,
+          task: str = "other", priority: int | None = None, variant: int = 0, cacheable=None) -> str | None:
+    # 같은 (model, prompt, temperature, response_format) 호출은 캐시에서 바로 돌려줌.
+    # variant 가 0 이 아니면 같은 프롬프트의 다른 결과로 따로 캐시 (비슷한 입력 색인이 변형을 모을 때)
+    # cacheable(내용) 이 False 인 응답과 내용이 없는 응답(구조화 출력 거절)은 캐시하지 않음
+    # 헤지에서 다른 모델이 답했으면 그 모델의 키로 저장 (기본 모델 이름으로 다른 모델 답을 돌려주지 않게)
+    started = time.perf_counter()
+    router = get_default_router()
+    model = model or router.model_for(task)
+    cache = get_default_cache()
+
+    def key_for(key_model):
+        return make_key(key_model, prompt, temperature, *([response_format] if response_format else []),
+                        *([variant] if variant else []))
+
+    cached = cache.get(key_for(model))
+    if cached is not None:
+        get_metrics().record_llm(task, model, "hit", time.perf_counter() - started)
+        return cached
+    scheduler = get_default_scheduler()
+    estimate = _token_estimate(prompt, task)
+    priority = TASK_PRIORITY.get(task, PRIORITY_INTERACTIVE) if priority is None else priority
+
+    def attempt(attempt_model):
+        # 동시 요청/분당 한도/우선순위를 지키며 보내고, 429 등은 백오프 후 재시도
+        resp = scheduler.call(
+            lambda: get_client().chat.completions.create(
+                model=attempt_model,
+                messages=[{"role":"user","content":prompt}],
+                temperature=temperature,
+                **({"response_format": response_format} if response_format else {}),
+            ),
+            priority=priority,
+            tokens=estimate,
+        )
+        if resp.usage:
+            scheduler.adjust_tokens(estimate, resp.usage.total_tokens)
+        return resp
+
+    def discard(resp, attempt_model, seconds):
+        # 헤지에서 진 응답: 쓰지 않지만 토큰/비용은 나갔으므로 기록
+        usage = resp.usage
+        get_metrics().record_llm(
+            task, attempt_model, "hedge", seconds,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    try:
+        # p90 을 넘도록 안 오면 한 번 더 보내 먼저 온 응답을 씀
+        resp, used_model = router.run(task, attempt, model, priority, on_discard=discard)
+    except Exception as e:
+        get_metrics().record_llm(task, model, "miss", time.perf_counter() - started, error=type(e).__name__)
+        raise
+    content = resp.choices[0].message.content
+    usage = resp.usage
+    get_metrics().record_llm(
+        task, used_model, "miss", time.perf_counter() - started,
+        prompt_tokens=usage.prompt_tokens if usage else 0,
+        completion_tokens=usage.completion_tokens if usage else 0,
+        error="refusal" if content is None else None,
+    )
+    if content is not None and (cacheable is None or cacheable(content)):
+        cache.put(key_for(used_model), content)
+    return content
+
+
+def _chat_stream(prompt: str, temperature: float, model: str | None = None, response_format: dict | None = None,
+                 task: str = "other", priority: int | None = None, cacheable=None):
+    # _chat 과 같지만 stream=True 로 받은 조각을 바로바로 yield (거절이면 아무것도 yield 하지 않음)
+    started = time.perf_counter()
+    router = get_default_router()
+    model = model or router.model_for(task)
+    cache = get_default_cache()
+
+    def key_for(key_model):
+        return make_key(key_model, prompt, temperature, *([response_format] if response_format else []))
+
+    cached = cache.get(key_for(model))
+    if cached is not None:
+        get_metrics().record_llm(task, model, "hit", time.perf_counter() - started, stream=True)
+        yield cached
+        return
+    scheduler = get_default_scheduler()
+    priority = TASK_PRIORITY.get(task, PRIORITY_INTERACTIVE) if priority is None else priority
+
+    def attempt(attempt_model):
+        # 스트림을 열고 첫 글자 조각까지 받아 둠 → 헤지는 첫 토큰까지 시간 기준
+        # 스트림을 다 받을 때까지 스케줄러 자리를 잡고 있음 (재시도는 첫 응답 전까지만)
+        stream, ticket = scheduler.call(
+            lambda: get_client().chat.completions.create(
+                model=attempt_model,
+                messages=[{"role":"user","content":prompt}],
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},  # 마지막 조각(choices 없음)에 토큰 수가 옴
+                **({"response_format": response_format} if response_format else {}),
+            ),
+            priority=priority,
+            tokens=_token_estimate(prompt, task),
+            hold=True,
+        )
+        chunks, head = iter(stream), []
+        try:
+            for chunk in chunks:
+                head.append(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    break
+        except BaseException:
+            stream.close()
+            scheduler.release(ticket)
+            raise
+        return stream, chunks, ticket, head
+
+    def discard(opened, attempt_model, seconds):
+        # 헤지에서 진 스트림은 닫고 자리를 돌려줌 (토큰 수는 끝까지 안 받아 모름)
+        stream, _, ticket, _ = opened
+        stream.close()
+        scheduler.release(ticket)
+        get_metrics().record_llm(task, attempt_model, "hedge", seconds, ttft=seconds, stream=True)
+
+    parts, ttft, usage, error, ticket, used_model = [], None, None, None, None, model
+    try:
+        (stream, chunks, ticket, head), used_model = router.run(
+            task, attempt, model, priority, stream=True, on_discard=discard
+        )
+        try:
+            for chunk in itertools.chain(head, chunks):
+                if chunk.usage:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    parts.append(delta)
+                    yield delta
+        finally:
+            stream.close()
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if ticket is not None:
+            scheduler.release(ticket, used_tokens=usage.total_tokens if usage else None)
+        # 소비하는 쪽이 중간에 멈춰도(GeneratorExit) 받은 만큼은 기록
+        get_metrics().record_llm(
+            task, used_model, "miss", time.perf_counter() - started, ttft=ttft,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            stream=True, error=error or (None if parts else "refusal"),
+        )
+    content = "".join(parts)
+    if parts and (cacheable is None or cacheable(content)):
+        cache.put(key_for(used_model), content)
+
+
+def refine_extension(context: str, extension: str) -> str:
+    prompt = (
+        "아래 두 부분을 **초등학생이 만든 동화책** 어투로 자연스럽게 이어붙일 수 있게,"
+        "말투와 문법을 통일하고, 비속어 없이 다듬어주세요."
+        "작은 따옴표(\')와 큰 따옴표(\")를 적절한 사용법에 맞게 고쳐주도록 고려해줘."
+        "\n\n"
+        f"■ 앞이야기:\n{context}\n\n"
+        f"■ 새로 쓴 부분:\n{extension}\n\n"
+        "=> 다듬어진 ‘새로 쓴 부분’만 출력해주세요."
+    )
+    return _chat(prompt, temperature=0.3, task="refine_extension").strip()
+
+
+def plan_final_chunks(segments: list[str], refined: list[bool],
+                      chunk_tokens: int | None = None) -> list[tuple[int, int, bool]]:
+    # 이어 붙일 순서대로 (시작, 끝, 다듬을지) 구간.
+    # 이미 다듬어진 조각은 하나씩 그대로, 다듬지 않은 조각이 이어지면 토큰 예산까지 한 덩어리로 묶음
+    chunk_tokens = FINAL_CHUNK_TOKENS if chunk_tokens is None else chunk_tokens
+    plan, start, tokens = [], None, 0
+    for i, segment in enumerate(segments):
+        if refined[i]:
+            if start is not None:
+                plan.append((start, i, True))
+                start = None
+            plan.append((i, i + 1, False))
+            continue
+        size = estimate_tokens(segment)
+        if start is not None and tokens + size > chunk_tokens:
+            plan.append((start, i, True))
+            start = None
+        if start is None:
+            start, tokens = i, 0
+        tokens += size
+    if start is not None:
+        plan.append((start, len(segments), True))
+    return plan
+
+
+def _childrens_book_chunk_prompt(before: str, chunk: str, after: str) -> str:
+    return (
+        "아래 ‘다듬을 부분’을 **초등학생이 만든 동화책**처럼 읽히도록,"
+        "말투와 문법을 통일하고, 비속어를 모두 제거한"
+        "자연스러운 한국어 이야기로 바꿔주세요."
+        "단, 새로운 내용이나 창의적 요소를 추가하지 말고,"
+        "오직 문장 표현과 어투만 부드럽게 다듬어주세요."
+        "앞부분과 뒷부분은 이미 다듬어져 있으니 그 말투에 맞춰 자연스럽게 이어지게 해주세요.\n\n"
+        f"■ 앞부분:\n{before or '(없음)'}\n\n"
+        f"■ 다듬을 부분:\n{chunk}\n\n"
+        f"■ 뒷부분:\n{after or '(없음)'}\n\n"
+        "=> 다듬어진 ‘다듬을 부분’만 텍스트로 출력해주세요."
+    )
+
+
+def refine_story_chunk(before: str, chunk: str, after: str, priority: int | None = None) -> str:
+    prompt = _childrens_book_chunk_prompt(before, chunk, after)
+    return _chat(prompt, temperature=0.2, task="refine_story", priority=priority).strip()
+
+
+def _chunk_parts(segments: list[str], start: int, end: int) -> tuple[str, str, str]:
+    # (앞 조각, 다듬을 덩어리, 뒤 조각)
+    return (
+        segments[start - 1] if start > 0 else "",
+        "\n".join(segments[start:end]),
+        segments[end] if end < len(segments) else "",
+    )
+
+
+def iter_refined_segments(segments: list[str], refined: list[bool], priority: int | None = None,
+                          chunk_tokens: int | None = None):
+    # 최종 다듬기: 다듬지 않은 덩어리만 앞뒤 조각을 맥락으로 병렬 요청하고, 이야기 순서대로 조각을 yield.
+    # 이미 다듬어진 조각은 기다리지 않고 바로 나옴
+    plan = plan_final_chunks(segments, refined, chunk_tokens)
+    with ThreadPoolExecutor(max_workers=FINAL_CHUNK_WORKERS, thread_name_prefix="final") as pool:
+        futures = {
+            start: pool.submit(refine_story_chunk, *_chunk_parts(segments, start, end), priority)
+            for start, end, dirty in plan if dirty
+        }
+        for start, end, dirty in plan:
+            if dirty:
+                yield futures[start].result()
+            else:
+                yield from segments[start:end]
+
+
+def stream_refined_segments(segments: list[str], refined: list[bool], priority: int | None = None,
+                            chunk_tokens: int | None = None):
+    # iter_refined_segments 의 스트리밍판 (화면용): (몇 번째 조각, 글 조각)을 이야기 순서대로 yield.
+    # 다듬지 않은 덩어리는 모두 한꺼번에 스트림을 열어 받아 두고, 차례가 오면 받은 토큰부터 바로 흘려보냄.
+    # 맨 앞의 처음 요약도 다 다듬을 때까지 기다리지 않고 첫 토큰부터 보임
+    plan = plan_final_chunks(segments, refined, chunk_tokens)
+    stop = threading.Event()
+
+    def pump(start: int, end: int, out: queue.Queue):
+        # 보는 쪽이 중간에 멈추면(화면 재실행) 스트림을 닫아 스케줄러 자리를 돌려줌
+        try:
+            prompt = _childrens_book_chunk_prompt(*_chunk_parts(segments, start, end))
+            with closing(_chat_stream(prompt, temperature=0.2, task="refine_story", priority=priority)) as deltas:
+                for delta in deltas:
+                    if stop.is_set():
+                        break
+                    out.put(delta)
+        except Exception as e:
+            out.put(e)
+        out.put(None)
+
+    pool = ThreadPoolExecutor(max_workers=FINAL_CHUNK_WORKERS, thread_name_prefix="final")
+    try:
+        queues = {}
+        for start, end, dirty in plan:
+            if dirty:
+                queues[start] = queue.Queue()
+                pool.submit(pump, start, end, queues[start])
+        for n, (start, end, dirty) in enumerate(plan):
+            if not dirty:
+                yield n, segments[start]
+                continue
+            text = ""
+            while (delta := queues[start].get()) is not None:
+                if isinstance(delta, Exception):
+                    raise delta
+                delta = delta if text else delta.lstrip()
+                if delta:
+                    text += delta
+                    yield n, delta
+            if not text:
+                # 아무것도 오지 않으면(거절) 원래 덩어리를 그대로
+                yield n, _chunk_parts(segments, start, end)[1]
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def refine_segments(segments: list[str], refined: list[bool], priority: int | None = None,
+                    chunk_tokens: int | None = None) -> list[str]:
+    return list(iter_refined_segments(segments, refined, priority, chunk_tokens))
+
+
+def generate_questions(context: str, priority: int | None = None, latest: str | None = None) -> list[str]:
+    # latest: 이어쓰기 질문이면 마지막 조각 (없으면 요약만 있는 첫 질문)
+    prompt = (
+        "다음 이야기를 이어쓰기 위해 적절한 질문을 3가지 만들어주세요.\n"
+        "초등학생들이 이야기를 이어쓰는 질문이니까 뒷 이야기를 계속 이어나갈 수 있도록 유도할만한 질문들을 아래의 질문 타입들을 적절하게 섞어서 3가지만 생성해주세요.\n"
+        "초등학생들의 수준에 맞게 호기심을 유발하면서, 어렵지 않은 단어들로 구성된 질문들로 뒷 이야기를 잘 이어가도록 유도해주세요.\n"
+        "반드시 한국어로만 작성해주세요\n"
+        "질문 타입의 예시\n"
+        "1. 만약~라면 어떻게 될까? (가정형 질문) ex) 만약 도깨비 방망이가 말하는 물건이라면 어떻게 될까요?, ...\n"
+        "2. 무슨 일이 생겼을까? 이어가기 질문...\n"
+        "3. 인물의 마음이나 선택을 묻는 질문...\n"
+        f"현재 이야기:\n{context}\n"
+        "세 가지 질문을 각 줄에 하나씩 작성하세요."
+    )
+    # 거의 같은 이야기에 이미 만든 질문 세트가 있으면 (변형을 돌아가며) 재사용.
+    # 첫 질문은 요약으로, 이어쓰기 질문은 공통 요약에 묻히지 않게 마지막 조각만으로 (더 엄격한 기준)
+    index = get_default_index()
+    task, key = ("generate_questions", context) if latest is None else ("generate_questions_next", latest)
+    questions, variant = index.lookup(task, key)
+    if questions is None:
+        text = _chat(prompt, temperature=0.9, task="generate_questions", priority=priority, variant=variant)
+        questions = [line.strip() for line in text.splitlines() if line.strip()][:3]
+        index.add(task, key, questions)
+    return list(questions)+["나 자신의 창의적인 이야기를 이어나갈래!"]
+
+
+def _feedback_prompt(raw_text: str, context: str, issues=()) -> str:
+    # 줄임말/반복 글자/따옴표/띄어쓰기는 로컬 린터가 이미 봤다고 표시하고, 모델에는 맞춤법과 내용만 맡김.
+    # 구조화 출력이면 스키마가 형식을 정하므로 예시 형식도 뺌
+    if issues:
+        checked = "로컬 검사가 이미 알려 준 문제(다시 쓰지 마세요): " + " / ".join(issue.message for issue in issues)
+    else:
+        checked = "줄임말(ㅋㅋ 등)·반복 글자·따옴표·띄어쓰기는 로컬 검사를 통과했어요."
+    prompt = (
+        "다음은 이야기 맥락과 사용자가 작성한 부분입니다.\n"
+        f"맥락:\n{context}\n"
+        f"사용자 작성:\n{compact(raw_text)}\n\n"
+        "잘한 부분(positives), 틀린 부분(errors), 고칠 방법(suggestions), 개선된 버전(improved)을 JSON 객체로 주세요.\n"
+        "초등학생이 이해하기 쉽게, 한국어로만, 긍정적으로 써주세요.\n"
+        f"{checked} 맞춤법과 이야기 내용을 봐주세요."
+    )
+    if not FEEDBACK_STRUCTURED:
+        prompt += "\n예시 형식:\n{\n  \"positives\": [...], \"errors\": [...], \"suggestions\": [...], \"improved\": \"...\"\n}"
+    return prompt
+
+
+def _feedback_response_format() -> dict | None:
+    # 구조화 출력(JSON 스키마) 모드. FEEDBACK_STRUCTURED=0 이면 예전처럼 자유 형식 JSON
+    return FEEDBACK_RESPONSE_FORMAT if FEEDBACK_STRUCTURED else None
+
+
+def _read_feedback(content: str | None, raw_text: str) -> dict:
+    # 모델이 거절해 내용이 없으면(message.refusal) 파싱 오류로 보여주고, 추천 예시는 학생 답 그대로
+    feedback = parse_feedback(content)
+    if content is None:
+        feedback.improved = raw_text
+    return feedback.to_dict()
+
+
+def _remember_feedback(raw_text: str, context: str, feedback: dict):
+    # 파싱까지 실패한 피드백은 다른 학생에게 재사용하지 않음
+    if PARSE_ERROR not in feedback.get("errors", []):
+        get_default_index().add("generate_feedback", raw_text, feedback, guard_text=context)
+
+
+def _local_first(raw_text: str):
+    # (로컬 피드백 또는 None, 린터가 찾은 문제). 모델에 맡길 내용이 남지 않을 때만 모델 없이 돌려줄 피드백을 만듦
+    started = time.perf_counter()
+    issues = lint_answer(raw_text)
+    if issues and LINT_SHORT_CIRCUIT and not reviewable(raw_text):
+        feedback = local_feedback(raw_text, issues)
+        get_metrics().record_check("feedback_local", time.perf_counter() - started, len(issues))
+        return feedback, issues
+    return None, issues
+
+
+def local_findings(raw_text: str, issues=None) -> dict:
+    # 모델을 기다리는 동안 먼저 보여줄 린터 결과 {"errors": [...], "suggestions": [...]} (문제가 없으면 빈 dict)
+    issues = lint(raw_text) if issues is None else issues
+    if not issues:
+        return {}
+    feedback = local_feedback(raw_text, issues)
+    return {field: feedback[field] for field in ("errors", "suggestions")}
+
+
+def _with_local_issues(field: str, value, issues):
+    # 린터 결과를 모델 피드백 앞에 붙임 (LINT_SHORT_CIRCUIT=0 일 때)
+    if not issues or field not in ("errors", "suggestions"):
+        return value
+    local = local_feedback("", issues)[field]
+    return local + [item for item in value if item not in local]
+
+
+def generate_feedback(raw_text: str, context: str) -> dict:
+    feedback, issues = _local_first(raw_text)
+    if feedback is not None:
+        return feedback
+    # 같은 답(공백만 다른) + 비슷한 이야기 맥락에 대한 피드백이 있으면 재사용
+    cached, _ = get_default_index().lookup("generate_feedback", raw_text, guard_text=context)
+    if cached is not None:
+        feedback = copy.deepcopy(cached)
+    else:
+        content = _chat(
+            _feedback_prompt(raw_text, context, issues),
+            temperature=0.9,
+            response_format=_feedback_response_format(),
+            task="generate_feedback",
+            cacheable=feedback_readable,
+        )
+        feedback = _read_feedback(content, raw_text)
+        _remember_feedback(raw_text, context, feedback)
+    return {field: _with_local_issues(field, value, issues) for field, value in feedback.items()}
+
+
+def stream_feedback(raw_text: str, context: str):
+    # 필드가 하나 완성될 때마다 (필드, 값)을 yield
+    feedback, issues = _local_first(raw_text)
+    if feedback is None:
+        feedback = get_default_index().lookup("generate_feedback", raw_text, guard_text=context)[0]
+    if feedback is not None:
+        for field, value in copy.deepcopy(feedback).items():
+            yield field, _with_local_issues(field, value, issues)
+        return
+    parser = FeedbackStreamParser()
+    # 린터가 찾은 문제는 모델 응답을 기다리지 않고 먼저 (모델 결과가 오면 그 앞에 붙여 다시 보냄)
+    shown = local_findings(raw_text, issues)
+    yield from shown.items()
+    for delta in _chat_stream(
+        _feedback_prompt(raw_text, context, issues),
+        temperature=0.9,
+        response_format=_feedback_response_format(),
+        task="generate_feedback",
+        cacheable=feedback_readable,
+    ):
+        for field, value in parser.feed(delta):
+            if field not in FEEDBACK_FIELDS:
+                continue
+            # 필드 하나만 미리 검증해서 화면에 쓸 수 있는 모양으로
+            value = _with_local_issues(field, getattr(Feedback.from_dict({field: value}), field), issues)
+            shown[field] = value
+            yield field, value
+    # 검증/복구된 최종 결과와 다른 필드는 다시 보내서 덮어씀
+    feedback = _read_feedback(parser.text or None, raw_text)
+    for field, value in feedback.items():
+        value = _with_local_issues(field, value, issues)
+        if shown.get(field) != value:
+            yield field, value
+    _remember_feedback(raw_text, context, feedback)
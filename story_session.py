@@ -0,0 +1,189 @@
+# --- 이야기 이어쓰기 상태 머신 ---
+# init → choose_q → write → review → decide_continue → done 흐름과 이야기 데이터를
+# Streamlit 없이 다루는 엔진입니다. 화면(streamlit_app.py)은 이 객체를 session_state 에 두고
+# 버튼마다 메서드를 부르기만 하고, 일괄 처리(batch.py)도 같은 메서드를 씁니다.
+# to_dict / from_dict 로 그대로 JSON 직렬화할 수 있습니다.
+import story_llm
+from story_context import StoryContext, get_context_stats, new_story_context
+from story_lint import is_local_feedback
+
+STAGES = ("init", "choose_q", "write", "review", "decide_continue", "done", "storybook")
+
+# 같은 질문에서 "고칠래요" 후 다시 제출할 수 있는 횟수. 넘으면 그대로 이야기에 붙임
+MAX_FEEDBACK_ROUNDS = 2
+
+
+class StoryStageError(RuntimeError):
+    pass
+
+
+class StorySession:
+    def __init__(self):
+        self.stage = "init"
+        self.summary = ""
+        self.current_segment = ""
+        self.context: StoryContext = new_story_context()
+        self.segment_refined: list[bool] = []   # context.segments 와 같은 순서: 이미 다듬어진 조각인지
+        self.questions: list[str] = []
+        self.raw_inputs: list[str] = []
+        self.feedback_counts: list[int] = []
+        self.selected_q_idx: int | None = None
+        self.feedback: dict | None = None       # None 이면 아직 (또는 다시) 만들어야 함
+        self.refined_story: str | None = None
+
+    def _expect(self, *stages: str):
+        if self.stage not in stages:
+            raise StoryStageError(f"{self.stage} 단계에서는 할 수 없는 동작입니다 (필요: {', '.join(stages)})")
+
+    # --- 프롬프트 맥락 ---
+
+    def prompt_context(self, task: str) -> str:
+        # 프롬프트용 맥락: 최근 조각은 그대로 + 앞부분은 요약 (토큰 예산 안에서)
+        context = self.context.render()
+        get_context_stats().record(task, self.current_segment, context)
+        return context
+
+    def _append_segment(self, text: str, refined: bool = True):
+        self.current_segment += "\n" + text
+        self.context.append(text)
+        self.segment_refined.append(refined)
+
+    # --- 상태 전환 ---
+
+    def start(self, summary: str, questions: list[str] | None = None):
+        self._expect("init")
+        self.summary = summary
+        self.current_segment = summary
+        self.context = new_story_context()
+        self.context.append(summary)
+        # 학생이 쓴 요약은 아직 다듬지 않음 → 최종 다듬기에서 다시 씀
+        self.segment_refined = [False]
+        # 질문이 주어지지 않으면 요약으로 생성
+        self.set_questions(questions if questions is not None else story_llm.generate_questions(summary))
+
+    def set_questions(self, questions: list[str]):
+        # 질문마다 입력과 피드백 횟수를 초기화
+        self.questions = list(questions)
+        n = len(self.questions)
+        self.raw_inputs = [""] * n
+        self.feedback_counts = [0] * n
+        self.stage = "choose_q"
+
+    def choose_question(self, idx: int):
+        self._expect("choose_q", "write")
+        self.selected_q_idx = idx
+        self.feedback = None
+        self.stage = "write"
+
+    @property
+    def current_question(self) -> str:
+        return self.questions[self.selected_q_idx]
+
+    @property
+    def current_input(self) -> str:
+        return self.raw_inputs[self.selected_q_idx]
+
+    def submit(self, text: str):
+        # 답변 제출(또는 review 에서 고쳐 쓴 답변 재제출) → 피드백을 새로 만들어야 함
+        self._expect("write", "review")
+        self.raw_inputs[self.selected_q_idx] = text
+        self.feedback = None
+        self.stage = "review"
+
+    def generate_feedback(self) -> dict:
+        self._expect("review")
+        self.feedback = story_llm.generate_feedback(self.current_input, self.prompt_context("generate_feedback"))
+        return self.feedback
+
+    def stream_feedback(self):
+        # 필드가 완성되는 대로 (필드, 값)을 넘기고, 끝나면 피드백으로 저장
+        self._expect("review")
+        feedback = {}
+        for field, value in story_llm.stream_feedback(self.current_input, self.prompt_context("generate_feedback")):
+            feedback[field] = value
+            yield field, value
+        self.feedback = feedback
+
+    def decide_feedback(self, is_done: bool):
+        self._expect("review")
+        idx = self.selected_q_idx
+        if is_done or self.feedback_counts[idx] >= MAX_FEEDBACK_ROUNDS:
+            # 앞이야기(최근 부분 + 앞부분 요약)에 맞춰 톤을 통일해 붙임
+            context = self.prompt_context("refine_extension")
+            self._append_segment(story_llm.refine_extension(context, self.raw_inputs[idx]))
+            self.stage = "decide_continue"
+        else:
+            self.feedback_counts[idx] += 1
+            self.stage = "write"
+
+    def accept_improved(self):
+        # 추천 예시를 다듬지 않고 그대로 붙임. 로컬 린터 예시는 기계적으로만 고친 글이라 최종 다듬기 대상
+        self._expect("review")
+        self._append_segment(self.feedback["improved"], refined=not is_local_feedback(self.feedback))
+        self.stage = "decide_continue"
+
+    def continue_story(self, questions: list[str] | None = None):
+        self._expect("decide_continue")
+        if questions is None:
+            questions = story_llm.generate_questions(self.prompt_context("generate_questions"),
+                                                     latest=self.context.segments[-1])
+        self.set_questions(questions)
+
+    def finish(self):
+        self._expect("decide_continue")
+        self.stage = "done"
+
+    def refine_final(self, segments: list[str] | None = None) -> str:
+        # 이어 붙인 부분은 이미 refine_extension / 추천 예시로 다듬어져 있으므로
+        # 다듬지 않은 조각(처음 요약 등)만 다시 다듬어 순서대로 이어 붙임. 이후 스토리북에도 이 버전을 씀
+        self._expect("done")
+        if segments is None:
+            segments = story_llm.refine_segments(self.context.segments, self.segment_refined)
+        self.context = new_story_context()
+        for segment in segments:
+            self.context.append(segment)
+        self.segment_refined = [True] * len(segments)
+        self.refined_story = "\n".join(segments)
+        self.current_segment = self.refined_story
+        return self.refined_story
+
+    def open_storybook(self):
+        # 다듬은 이야기로 PDF 스토리북 만들기 (PDF 는 storybook.py 가 화면 밖 프로세스에서 만듦)
+        self._expect("done")
+        if self.refined_story is None:
+            raise StoryStageError("최종 이야기를 다듬은 뒤에 스토리북을 만들 수 있습니다")
+        self.stage = "storybook"
+
+    # --- 직렬화 ---
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "summary": self.summary,
+            "current_segment": self.current_segment,
+            "context": self.context.to_dict(),
+            "segment_refined": list(self.segment_refined),
+            "questions": list(self.questions),
+            "raw_inputs": list(self.raw_inputs),
+            "feedback_counts": list(self.feedback_counts),
+            "selected_q_idx": self.selected_q_idx,
+            "feedback": self.feedback,
+            "refined_story": self.refined_story,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StorySession":
+        session = cls()
+        session.stage = data["stage"]
+        session.summary = data["summary"]
+        session.current_segment = data["current_segment"]
+        session.context = StoryContext.from_dict(data["context"])
+        # 조각별 표시가 없던 예전 스냅샷은 전부 다시 다듬음
+        session.segment_refined = list(data.get("segment_refined", [False] * len(session.context.segments)))
+        session.questions = list(data["questions"])
+        session.raw_inputs = list(data["raw_inputs"])
+        session.feedback_counts = list(data["feedback_counts"])
+        session.selected_q_idx = data["selected_q_idx"]
+        session.feedback = data["feedback"]
+        session.refined_story = data["refined_story"]
+        return session
@@ -0,0 +1,333 @@
+# --- 스토리북 PDF 내보내기 ---
+# 최종 다듬은 이야기(refined_story)를 쪽 번호가 있는 A5 PDF 로 만듭니다 (fpdf 1.7, 한글 TTF).
+# - 한글 글꼴 메트릭은 프로세스당 한 번만 읽고, 글자 목록이 같은 부분 글꼴(subset)은 LRU 로 재사용
+# - fpdf 는 쓴 글자를 중복까지 list 에 모아 두고 글자 폭 표/부분 글꼴을 만들 때마다 그 list 를 훑어서
+#   이야기가 길수록 제곱으로 느려짐 → 중복 없는 집합 기반 목록(_CharSet)으로 바꿔 끼움
+# - 화면은 StorybookRenderer 의 작업 스레드에서 만들고 준비되면 내려받기 버튼을 보여줌 (한 권 수십~백여 ms,
+#   CPU 를 쓰는 스레드도 5ms 마다 GIL 을 넘겨주므로 다른 학생의 화면 실행을 막지 않음).
+#   Streamlit 은 스크립트 실행 중 __main__ 을 앱 스크립트로 바꿔 두어 spawn 프로세스가 앱을 다시 실행하므로 화면에서는 스레드만 씀
+# - batch.py 는 export_class 로 학급 전체를 프로세스 풀에서 한 번에 (작업자 프로세스마다 글꼴은 한 번만 읽음)
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import fpdf
+import fpdf.fpdf
+from fpdf.ttfonts import TTFontFile
+
+from metrics import get_metrics
+
+DEFAULT_TITLE = "나의 이야기책"
+
+# 한글 TTF 후보 (fpdf 1.7 은 .ttc/.otf 를 못 읽음). Streamlit Cloud 는 packages.txt 의 fonts-nanum 으로 설치됨
+FONT_CANDIDATES = (
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "NanumGothic.ttf"),
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/nanum/NanumGothic.ttf",
+    "/Library/Fonts/NanumGothic.ttf",
+    "C:/Windows/Fonts/malgun.ttf",
+)
+_FAMILY = "story"
+
+# A5, mm
+_MARGIN = 18
+_BODY_PT = 13
+_LINE_MM = 8
+_TITLE_PT = 26
+
+# 아래의 전역 설정과 클래스 교체는 fpdf 1.7.2 내부(add_font/_putfonts 가 모듈 전역 TTFontFile 을 부르는 방식,
+# font["subset"] list)에 기대므로 requirements.txt 에서 버전을 고정합니다.
+# 글꼴 메트릭은 메모리에만 (시스템 글꼴 옆에 .pkl 을 쓰려고 하지 않게)
+fpdf.set_global("FPDF_CACHE_MODE", 1)
+
+
+class StorybookError(RuntimeError):
+    pass
+
+
+def find_font() -> str:
+    path = os.getenv("STORYBOOK_FONT_PATH")
+    if path:
+        if not os.path.exists(path):
+            raise StorybookError(f"STORYBOOK_FONT_PATH 글꼴이 없습니다: {path}")
+        return path
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    raise StorybookError("한글 TTF 글꼴을 찾지 못했습니다. STORYBOOK_FONT_PATH 를 지정해 주세요.")
+
+
+class _CharSet(list):
+    # fpdf 가 font["subset"] 으로 쓰는 list 자리에 넣는 중복 없는 글자 목록 (in 검사가 O(1))
+    def __init__(self, codes=()):
+        super().__init__()
+        self._seen = set()
+        for code in codes:
+            self.append(code)
+
+    def append(self, code):
+        if code not in self._seen:
+            self._seen.add(code)
+            super().append(code)
+
+    def __contains__(self, code):
+        return code in self._seen
+
+    def __delitem__(self, index):
+        removed = self[index]
+        super().__delitem__(index)
+        for code in removed if isinstance(index, slice) else (removed,):
+            self._seen.discard(code)
+
+
+class _CachedTTFontFile(TTFontFile):
+    # cmap 파싱 결과는 글꼴 파일당 한 번, 완성된 부분 글꼴은 글자 목록별로 LRU 재사용
+    _cmaps: dict = {}
+    _subsets: OrderedDict = OrderedDict()
+    _lock = threading.Lock()
+    max_subsets = 64
+
+    def makeSubset(self, file, subset):
+        key = (file, frozenset(subset))
+        with self._lock:
+            cached = self._subsets.get(key)
+            if cached is not None:
+                self._subsets.move_to_end(key)
+        if cached is not None:
+            stream, self.codeToGlyph, self.maxUni = cached
+            return stream
+        with warnings.catch_warnings():
+            # 한글 글꼴의 idDelta 가 16비트 부호 범위를 넘을 때마다 경고 (글리프 매핑은 CIDToGIDMap 이 하므로 무해)
+            warnings.filterwarnings("ignore", message="cmap value too big/small")
+            stream = super().makeSubset(file, subset)
+        with self._lock:
+            self._subsets[key] = (stream, self.codeToGlyph, self.maxUni)
+            while len(self._subsets) > self.max_subsets:
+                self._subsets.popitem(last=False)
+        return stream
+
+    def _cached_cmap(self, parse, offset, glyphToChar, charToGlyph):
+        key = (self.filename, offset)
+        cached = self._cmaps.get(key)
+        if cached is None:
+            cached = {}, {}
+            parse(offset, *cached)
+            self._cmaps[key] = cached
+        glyphToChar.update(cached[0])
+        charToGlyph.update(cached[1])
+
+    def getCMAP4(self, unicode_cmap_offset, glyphToChar, charToGlyph):
+        self._cached_cmap(super().getCMAP4, unicode_cmap_offset, glyphToChar, charToGlyph)
+
+    def getCMAP12(self, unicode_cmap_offset, glyphToChar, charToGlyph):
+        self._cached_cmap(super().getCMAP12, unicode_cmap_offset, glyphToChar, charToGlyph)
+
+
+# fpdf 가 부분 글꼴을 만들 때 쓰는 클래스를 캐시 버전으로 교체 (_putfonts 가 모듈 전역 이름으로 찾으므로
+# _StorybookPDF 에만 한정할 수 없음. 다른 FPDF 문서도 결과는 같고 캐시만 함께 씀)
+fpdf.fpdf.TTFontFile = _CachedTTFontFile
+
+_fonts: dict = {}
+_fonts_lock = threading.Lock()
+
+
+def _font_entry(path: str) -> tuple[dict, dict]:
+    # 글꼴 메트릭(글자 폭 표 포함)은 프로세스당 한 번만 파싱
+    with _fonts_lock:
+        entry = _fonts.get(path)
+        if entry is None:
+            probe = fpdf.FPDF()
+            probe.add_font(_FAMILY, "", path, uni=True)
+            entry = _fonts[path] = (probe.fonts[_FAMILY], probe.font_files[_FAMILY])
+        return entry
+
+
+class _StorybookPDF(fpdf.FPDF):
+    def __init__(self, font_path: str):
+        super().__init__(format="A5")
+        font, font_file = _font_entry(font_path)
+        # add_font 가 하는 등록을 캐시된 메트릭으로 (글자 폭 표는 읽기만 하므로 공유)
+        self.fonts[_FAMILY] = dict(font, i=len(self.fonts) + 1, subset=_CharSet(range(32)))
+        self.font_files[_FAMILY] = dict(font_file)
+        self.font_files[font_path] = {"type": "TTF"}
+        self.set_margins(_MARGIN, _MARGIN)
+        self.set_auto_page_break(True, _MARGIN)
+
+    def footer(self):
+        # 표지에는 쪽 번호를 넣지 않음
+        if self.page_no() > 1:
+            self.set_y(-_MARGIN + 4)
+            self.set_font(_FAMILY, "", 10)
+            self.cell(0, 6, f"- {self.page_no() - 1} -", align="C")
+
+
+def paragraphs(text: str) -> list[str]:
+    # 마크다운 강조를 지우고 빈 줄/줄바꿈 기준으로 문단 나누기
+    text = text.replace("**", "")
+    return [p.strip() for p in re.split(r"\n+", text) if p.strip()]
+
+
+def _render(text: str, title: str, font_path: str) -> bytes:
+    pdf = _StorybookPDF(font_path)
+    # 문서 정보는 latin-1 로 쓰이므로 BOM 붙은 UTF-16BE 로 (PDF 텍스트 문자열 규칙)
+    pdf.set_title(("\ufeff" + title).encode("utf-16-be").decode("latin1"))
+
+    # 표지
+    pdf.add_page()
+    pdf.set_font(_FAMILY, "", _TITLE_PT)
+    pdf.set_y(pdf.h / 3)
+    pdf.multi_cell(0, _TITLE_PT * 0.5, title, align="C")
+
+    # 본문
+    pdf.add_page()
+    pdf.set_font(_FAMILY, "", _BODY_PT)
+    for paragraph in paragraphs(text):
+        pdf.multi_cell(0, _LINE_MM, paragraph)
+        pdf.ln(_LINE_MM / 2)
+    return pdf.output(dest="S").encode("latin1")
+
+
+def render_pdf(text: str, title: str = DEFAULT_TITLE, font_path: str | None = None) -> bytes:
+    if not text.strip():
+        raise StorybookError("내보낼 이야기가 없습니다.")
+    return _render(text, title.strip() or DEFAULT_TITLE, font_path or find_font())
+
+
+def _render_timed(text: str, title: str, font_path: str) -> tuple[bytes, float]:
+    # 작업자에서 실행. 메트릭 기록은 부모 프로세스에서 (작업자 프로세스가 같은 로그 파일을 쓰지 않게)
+    started = time.perf_counter()
+    data = _render(text, title, font_path)
+    return data, time.perf_counter() - started
+
+
+class StorybookRenderer:
+    # 같은 (제목, 이야기)는 한 번만 만들고, 최근 결과는 max_entries 개까지 메모리에 둠.
+    # 재실행마다 submit 을 불러도 같은 Future 를 돌려받으므로 화면은 Future 를 따로 저장하지 않아도 됨
+    def __init__(self, max_workers: int = 2, max_entries: int = 32, processes: bool = False):
+        self.max_workers = max_workers
+        self.processes = processes
+        self.max_entries = max_entries
+        self._pool = None
+        self._jobs: OrderedDict[str, Future] = OrderedDict()
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.reused = 0
+        self.failed = 0
+
+    def _executor(self):
+        if self._pool is None:
+            if self.processes:
+                # fork 는 스레드가 많은 프로세스에서 안전하지 않아 spawn (작업자는 처음 한 번만 뜸)
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="storybook")
+        return self._pool
+
+    def submit(self, text: str, title: str = DEFAULT_TITLE) -> Future:
+        if not text.strip():
+            raise StorybookError("내보낼 이야기가 없습니다.")
+        title = title.strip() or DEFAULT_TITLE
+        font_path = find_font()
+        key = hashlib.sha256("\0".join((font_path, title, text)).encode("utf-8")).hexdigest()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done() and job.exception() is not None):
+                self._jobs.move_to_end(key)
+                self.reused += 1
+                return job
+            job = Future()
+            self._jobs[key] = job
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+            if self.max_workers > 0:
+                pool = self._executor()
+        if self.max_workers <= 0:
+            self._finish(job, lambda: _render_timed(text, title, font_path))
+        else:
+            pool.submit(_render_timed, text, title, font_path).add_done_callback(
+                lambda done: self._finish(job, done.result))
+        return job
+
+    def _finish(self, job: Future, result):
+        try:
+            data, seconds = result()
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            job.set_exception(e)
+            return
+        with self._lock:
+            self.rendered += 1
+        get_metrics().record_check("storybook_render", seconds, len(data))
+        job.set_result(data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"rendered": self.rendered, "reused": self.reused, "failed": self.failed,
+                    "entries": len(self._jobs)}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+def _pdf_names(names) -> list[str]:
+    # 이름마다 PDF 파일 이름. 같은 id 나 특수문자/대소문자만 다른 id 가 겹치면 두 번째부터 -2, -3 … 을 붙임
+    seen, files = set(), []
+    for name in names:
+        base = re.sub(r"[^\w.-]", "_", str(name))
+        candidate, n = base, 1
+        while candidate.lower() in seen:
+            n += 1
+            candidate = f"{base}-{n}"
+        seen.add(candidate.lower())
+        files.append(candidate + ".pdf")
+    return files
+
+
+def export_class(stories: list[tuple[str, str, str]], out_dir: str, workers: int | None = None) -> list:
+    # (이름, 제목, 이야기) 목록 → 입력 순서대로 PDF 경로 (실패한 자리에는 예외). 모두 프로세스 풀에 넣고 순서대로 저장.
+    # 파일 이름은 실패와 상관없이 입력 순서대로 정해 두어 같은 입력이면 늘 같은 파일에 씀
+    renderer = StorybookRenderer(max_workers=workers or os.cpu_count() or 1, max_entries=len(stories) + 1,
+                                 processes=True)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = []
+    for _, title, text in stories:
+        try:
+            jobs.append(renderer.submit(text, title))
+        except StorybookError as e:
+            jobs.append(e)
+    paths = []
+    for job, file_name in zip(jobs, _pdf_names(name for name, _, _ in stories)):
+        try:
+            if isinstance(job, Exception):
+                raise job
+            data = job.result()
+        except Exception as e:
+            paths.append(e)
+            continue
+        path = os.path.join(out_dir, file_name)
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    renderer.shutdown()
+    return paths
+
+
+_default_renderer = None
+_default_lock = threading.Lock()
+
+
+def get_default_renderer() -> StorybookRenderer:
+    global _default_renderer
+    with _default_lock:
+        if _default_renderer is None:
+            _default_renderer = StorybookRenderer(max_workers=int(os.getenv("STORYBOOK_WORKERS", "2")))
+        return _default_renderer
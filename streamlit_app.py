@@ -1,60 +1,36 @@
+import time
+_run_started = time.perf_counter()
+
 import streamlit as st
-import openai
-import ast
-import json
-import re
+import functools
+import os
 import warnings
+from concurrent.futures import wait
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from feedback_schema import get_parse_stats
+from llm_cache import get_default_cache
+from llm_client import get_client
+from metrics import get_metrics
+from model_router import get_default_router
+from perf import get_run_timer
+from prefetch import get_default_prefetcher
+from scheduler import PRIORITY_PREFETCH, get_default_scheduler
+from session_store import get_default_store, new_token
+from similar_index import get_default_index
+from story_context import get_context_stats
+from story_examples import example_cards
+from story_lint import check_input, is_local_feedback
+from story_llm import (
+    generate_questions,
+    local_findings,
+    refine_segments,
+    stream_refined_segments,
+)
+from story_session import StorySession, StoryStageError
+from storybook import DEFAULT_TITLE, StorybookError, get_default_renderer
 warnings.filterwarnings("ignore", message=".*widget with key.*default value.*")
 
 
-def _on_accept_improved():
-    # 1) FB에서 받은 improved 문장을 꺼내 붙이기
-    improved = st.session_state.fb["improved"]
-    st.session_state.current_segment += "\n" + improved
-
-    # 2) recommend_phase 초기화
-    st.session_state.recommend_phase = False
-
-    # 3) 다음 단계로 이동
-    st.session_state.stage = "decide_continue"
-
-
-def refine_extension(context: str, extension: str) -> str:
-    prompt = (
-        "아래 두 부분을 **초등학생이 만든 동화책** 어투로 자연스럽게 이어붙일 수 있게,"
-        "말투와 문법을 통일하고, 비속어 없이 다듬어주세요."
-        "작은 따옴표(\')와 큰 따옴표(\")를 적절한 사용법에 맞게 고쳐주도록 고려해줘."
-        "\n\n"
-        f"■ 앞이야기:\n{context}\n\n"
-        f"■ 새로 쓴 부분:\n{extension}\n\n"
-        "=> 다듬어진 ‘새로 쓴 부분’만 출력해주세요."
-    )
-    resp = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role":"user","content":prompt}],
-        temperature=0.3,
-    )
-    return resp.choices[0].message.content.strip()
-
-
-def refine_story_to_childrens_book(story: str) -> str:
-    prompt = (
-        "아래 이야기를 **초등학생이 만든 동화책**처럼 읽히도록,"
-        "말투와 문법을 통일하고, 비속어를 모두 제거한"
-        "자연스러운 한국어 이야기로 바꿔주세요."
-        "단, 새로운 내용이나 창의적 요소를 추가하지 말고,"
-        "오직 문장 표현과 어투만 부드럽게 다듬어주세요.\n\n"
-        f"원본 이야기:\n{story}\n\n"
-        "=> 다듬어진 최종 이야기만 텍스트로 출력해주세요."
-    )
-    resp = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role":"user","content":prompt}],
-        temperature=0.2,
-    )
-    return resp.choices[0].message.content.strip()
-
-
 # Page configuration
 st.set_page_config(layout="wide")
 
@@ -64,269 +40,322 @@ api_key = st.secrets["OPENAI_API_KEY"]
 if not api_key:
     st.error("OpenAI API key not found. Set it in .streamlit/secrets.toml or as environment variable OPENAI_API_KEY.")
     st.stop()
-openai.api_key = api_key
-client = openai.OpenAI()
+# 프로세스 전체에서 하나의 keep-alive 커넥션 풀을 공유 (story_llm 도 같은 클라이언트를 씀)
+get_client(api_key)
+# 피드백/최종 다듬기를 토큰 단위로 보여줄지 (LLM_STREAMING=0 이면 끔)
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+# decide_continue 화면에서 미리 생성할 것들
+PREFETCH_QUESTIONS = os.getenv("PREFETCH_QUESTIONS", "1") != "0"
+PREFETCH_FINAL_STORY = os.getenv("PREFETCH_FINAL_STORY", "0") == "1"
+# 입력창/버튼 상호작용이 앱 전체 대신 그 단계의 조각(fragment)만 다시 실행하도록 (UI_FRAGMENTS=0 이면 전체 재실행)
+UI_FRAGMENTS = os.getenv("UI_FRAGMENTS", "1") != "0"
+# 스토리북 PDF 가 준비됐는지 확인하는 간격 (만드는 동안만 그 조각이 다시 실행됨)
+STORYBOOK_POLL = "0.5s"
+
+FEEDBACK_SECTIONS = [
+    ("positives", "**🟢 잘한 부분:**"),
+    ("errors", "**❌ 다시 생각해 볼 부분:**"),
+    ("suggestions", "**💡 이렇게 바꿔보면 어때요?**"),
+    ("improved", "**✨ 추천 예시:**"),
+]
 
-# --- filtering ---
-KOR_PROFANITY_REGEX = re.compile("[시씨씪슈쓔쉬쉽쒸쓉](?:[0-9]*|[0-9]+ *)[바발벌빠빡빨뻘파팔펄]|[섊좆좇졷좄좃좉졽썅춍봊]|[ㅈ조][0-9]*까|ㅅㅣㅂㅏㄹ?|ㅂ[0-9]*ㅅ|[ㅄᄲᇪᄺᄡᄣᄦᇠ]|[ㅅㅆᄴ][0-9]*[ㄲㅅㅆᄴㅂ]|[존좉좇][0-9 ]*나|[자보][0-9]+지|보빨|[봊봋봇봈볻봁봍] *[빨이]|[후훚훐훛훋훗훘훟훝훑][장앙]|[엠앰]창|애[미비]|애자|[가-탏탑-힣]색기|(?:[샊샛세쉐쉑쉨쉒객갞갟갯갰갴겍겎겏겤곅곆곇곗곘곜걕걖걗걧걨걬] *[끼키퀴])|새 *[키퀴]|[병븅][0-9]*[신딱딲]|미친[가-닣닥-힣]|[믿밑]힌|[염옘][0-9]*병|[샊샛샜샠섹섺셋셌셐셱솃솄솈섁섂섓섔섘]기|[섹섺섻쎅쎆쎇쎽쎾쎿섁섂섃썍썎썏][스쓰]|[지야][0-9]*랄|니[애에]미|갈[0-9]*보[^가-힣]|[뻐뻑뻒뻙뻨][0-9]*[뀨큐킹낑)|꼬[0-9]*추|곧[0-9]*휴|[가-힣]슬아치|자[0-9]*박꼼|빨통|[사싸](?:이코|가지|[0-9]*까시)|육[0-9]*시[랄럴]|육[0-9]*실[알얼할헐]|즐[^가-힣]|찌[0-9]*(?:질이|랭이)|찐[0-9]*따|찐[0-9]*찌버거|창[녀놈]|[가-힣]{2,}충[^가-힣]|[가-힣]{2,}츙|부녀자|화냥년|환[양향]년|호[0-9]*[구모]|조[선센][징]|조센|[쪼쪽쪾](?:[발빨]이|[바빠]리)|盧|무현|찌끄[레래]기|(?:하악){2,}|하[앍앜]|[낭당랑앙항남담람암함][ ]?[가-힣]+[띠찌]|느[금급]마|文在|在寅|(?<=[^\n])[家哥]|속냐|[tT]l[qQ]kf|Wls|[ㅂ]신|[ㅅ]발|[ㅈ]밥")
 
-def go_storybook():
-    st.session_state.stage = "storybook"
-
-def contains_profanity(text: str) -> bool:
-    return bool(KOR_PROFANITY_REGEX.search(text))
-
-def is_story_related(text: str) -> bool:
-    # 최소 20자 기준만 사용
-    return len(text.strip()) >= 20
-# --- Helper Functions ---
-
-def generate_questions(context: str) -> list[str]:
-    prompt = (
-        "다음 이야기를 이어쓰기 위해 적절한 질문을 3가지 만들어주세요.\n"
-        "초등학생들이 이야기를 이어쓰는 질문이니까 뒷 이야기를 계속 이어나갈 수 있도록 유도할만한 질문들을 아래의 질문 타입들을 적절하게 섞어서 3가지만 생성해주세요.\n"
-        "초등학생들의 수준에 맞게 호기심을 유발하면서, 어렵지 않은 단어들로 구성된 질문들로 뒷 이야기를 잘 이어가도록 유도해주세요.\n"
-        "반드시 한국어로만 작성해주세요\n"
-        "질문 타입의 예시\n"
-        "1. 만약~라면 어떻게 될까? (가정형 질문) ex) 만약 도깨비 방망이가 말하는 물건이라면 어떻게 될까요?, ...\n"
-        "2. 무슨 일이 생겼을까? 이어가기 질문...\n"
-        "3. 인물의 마음이나 선택을 묻는 질문...\n"
-        f"현재 이야기:\n{context}\n"
-        "세 가지 질문을 각 줄에 하나씩 작성하세요."
-    )
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.9,
-    )
-    text = response.choices[0].message.content
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    return lines[:3]+["나 자신의 창의적인 이야기를 이어나갈래!"]
-
-
-def generate_feedback(raw_text: str, context: str) -> dict:
-    prompt = (
-        "다음은 이야기 맥락과 사용자가 작성한 부분입니다.\n"
-        f"맥락:\n{context}\n"
-        f"사용자 작성:\n{raw_text}\n\n"
-       "이 텍스트의 *잘한 부분*(positives), *틀린 부분*(errors), *고칠 방법*(suggestions), "
-        "그리고 *개선된 버전*(improved) 세 가지를 반드시 JSON 객체 형식으로 반환해주세요.\n"
-        "이 피드백은 초등학생들을 위한 피드백임으로 초등학생들이 이해하기 쉽게 기초적인 내용으로 반드시 한국어로만 작성해주세요.\n"
-        "교육적인 목적의 피드백을 위하여 반드시 맞춤법을 맞추고 비속어 약어 (ㅋㅋ, ㅎㅎ 등)의 사용을 지적해주고 교육적인 내용을 긍정적으로보게 해주세요.\n"
-        "예시 형식:\n{\n  \"positives\": [...], \"errors\": [...], \"suggestions\": [...], \"improved\": \"...\"\n}"
-    )
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.9,
-    )
-    content = response.choices[0].message.content
-    content = content.strip()
-    if content.startswith("```"):
-        content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content, flags=re.IGNORECASE)
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        pass
-        match = re.search(r"(\{.*\})", content, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group(1))
-            except json.JSONDecodeError:
-                pass
-        try:
-            return ast.literal_eval(content)
-        except (ValueError, SyntaxError):
-            return {"errors": ["피드백 생성 중 파싱 오류"], "suggestions": [], "improved": content}
+def _render_feedback_field(slot, field: str, value):
+    with slot.container():
+        if field == "improved":
+            st.markdown(f"> {value.replace(chr(10), ' ')}")
+        else:
+            for item in value:
+                st.markdown(f"- {item}")
+
+
+def _story_box(text: str, height: int = 200, **kwargs):
+    # 지금까지의 이야기 (읽기 전용). 조각 밖에서만 그려서 입력할 때마다 이야기 전체를 다시 보내지 않음
+    st.text_area("", value=text or "이야기가 아직 없습니다.", height=height, disabled=True, **kwargs)
 
 # --- State Transition Helpers ---
+# 상태와 이야기 데이터는 StorySession(st.session_state.story)에 있고,
+# 여기서는 화면 전용 상태(edit_mode, edit_text, recommend_phase, prefetch)만 다룹니다.
+
+def _story() -> StorySession:
+    return st.session_state.story
+
+
+def _checkpoint():
+    # 지난 체크포인트 이후 바뀐 필드만 저장 (재접속/재시작 시 ?s= 토큰으로 복구)
+    get_default_store().save(st.session_state.resume_token, _story())
 
+
+def _ui_action(fn):
+    # 재실행이 끝나기 전에 버튼을 두 번 누르면 이미 지난 단계의 콜백이 다시 옴 → 무시
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            fn(*args, **kwargs)
+        except StoryStageError:
+            return
+        # 단계 전환마다 체크포인트
+        _checkpoint()
+        # 조각 안의 버튼이어도 화면 전체가 바뀌므로 앱 전체를 다시 실행 (콜백이 여기서 끝남)
+        st.rerun()
+    return wrapper
+
+
+def _stage_fragment(stage: str, run_every=None):
+    # 한 단계 안에서만 바뀌는 입력창/버튼 묶음. 입력이나 화면 전용 상태만 바뀌면 이 조각만 다시 그림.
+    # 그사이 단계가 바뀌었으면(다른 탭에서 진행 등) 앱 전체를 다시 그림
+    def decorate(fn):
+        @functools.wraps(fn)
+        def body():
+            if _story().stage != stage:
+                st.rerun()
+            started = time.perf_counter()
+            fn()
+            ctx = get_script_run_ctx()
+            if ctx is not None and ctx.fragment_ids_this_run:
+                get_run_timer().record("fragment", time.perf_counter() - started, stage)
+        return st.fragment(body, run_every=run_every) if UI_FRAGMENTS else body
+    return decorate
+
+
+@_ui_action
 def handle_start(summary: str):
-    st.session_state.summary = summary
-    st.session_state.current_segment = summary
-    # 질문 생성 후, 각 질문에 대한 입력과 피드백 카운트를 초기화
-    st.session_state.questions = generate_questions(summary)
-    n = len(st.session_state.questions)
-    st.session_state.raw_inputs = [""] * n
-    st.session_state.feedback_counts = [0] * n
-    st.session_state.stage = "choose_q"
+    _story().start(summary)
 
 
+@_ui_action
 def choose_question(idx: int):
-    st.session_state.selected_q_idx = idx
+    _story().choose_question(idx)
 
     # --- 새 질문마다 review 상태 초기화 ---
     st.session_state.edit_mode = False
-    st.session_state.fb_needs_update = True
-    st.session_state.pop("fb", None)
     st.session_state.pop("edit_text", None)
     st.session_state.recommend_phase = False
     # ----------------------------------------
 
-    st.session_state.stage = "write"
-
 
+@_ui_action
 def submit_raw_input(text: str):
-    idx = st.session_state.selected_q_idx
-    st.session_state.raw_inputs[idx] = text
-    st.session_state.stage = "review"
-    
-def _on_raw_submit_with_spinner(text: str):
-    # 1) 빈 입력 체크
-    if not text.strip():
-        st.error("답변을 입력해주세요.")
-        return
+    _story().submit(text)
 
-    # 2) 욕설 검출
-    if contains_profanity(text):
-        st.error("비속어가 포함되지 않은 답변을 작성해주세요.")
-        return
+def _validated(text: str, kind: str = "answer") -> bool:
+    # 빈 입력 → 비속어 → 길이 검사 (story_lint.check_input). 막히면 안내 문구를 보여줌
+    message = check_input(text, kind)
+    if message is not None:
+        st.error(message)
+    return message is None
 
-    # 3) 길이 체크
-    if not is_story_related(text):
-        st.error("최소 20자 이상의 답변을 입력해주세요.")
+def _on_raw_submit_with_spinner(text: str):
+    if not _validated(text):
         return
 
-    # 모두 통과 시, 스피너와 함께 피드백 단계로 이동
+    # 통과 시, 스피너와 함께 피드백 단계로 이동
     with st.spinner("피드백 생성 중... 잠시만 기다려주세요…"):
         submit_raw_input(text)
 
-def handle_raw_submit(text: str):
-    # 1) 빈 입력 체크
-    if not text.strip():
-        st.error("답변을 입력해주세요.")
-        return
+@_ui_action
+def on_feedback_decision(is_done: bool):
+    _story().decide_feedback(is_done)
+    if _story().stage == "decide_continue":
+        # 읽는 동안 다음 질문을 미리 생성
+        _start_prefetch()
 
-    # 2) 욕설 검출
-    if contains_profanity(text):
-        st.error("비속어가 포함되지 않은 답변을 작성해주세요.")
-        return
 
-    # 3) 길이 체크
-    if not is_story_related(text):
-        st.error("최소 20자 이상의 답변을 입력해주세요.")
-        return
+@_ui_action
+def _on_accept_improved():
+    # 1) FB에서 받은 improved 문장을 그대로 붙이기
+    _story().accept_improved()
 
-    # 모두 통과 시 제출
-    submit_raw_input(text)
+    # 2) recommend_phase 초기화
+    st.session_state.recommend_phase = False
+
+    # 3) 읽는 동안 다음 질문을 미리 생성
+    _start_prefetch()
 
-def on_feedback_decision(is_done: bool):
-    idx = st.session_state.selected_q_idx
-    if is_done or st.session_state.feedback_counts[idx] >= 2:
-        # 1) 원본 앞이야기
-        context = st.session_state.current_segment
-        # 2) 사용자가 쓴 새 부분
-        ext = st.session_state.raw_inputs[idx]
-        # 3) 톤 통일 다듬기
-        refined_ext = refine_extension(context, ext)
-        # 4) 붙이기
-        st.session_state.current_segment += "\n" + refined_ext
-        # 5) 다음으로
-        st.session_state.stage = "decide_continue"
-    else:
-        st.session_state.feedback_counts[idx] += 1
-        st.session_state.stage = "write"
 
 def _on_apply_improved():
-    idx = st.session_state.selected_q_idx
     # 1) 추천 예시를 edit buffer에 넣고
-    st.session_state.edit_text = st.session_state.fb["improved"]
+    st.session_state.edit_text = _story().feedback["improved"]
     # 2) recommend_phase를 켜서 두 가지 선택지 화면으로 전환
     st.session_state.recommend_phase = True
 
+def _start_prefetch():
+    # 지금 이야기 기준으로 다음 단계 결과를 백그라운드에서 미리 요청
+    _discard_prefetch()
+    prefetcher = get_default_prefetcher()
+    story = _story().current_segment
+    jobs = {}
+    if PREFETCH_QUESTIONS:
+        context = _story().prompt_context("generate_questions")
+        # 스케줄러에서 학생이 기다리는 요청보다 뒤로
+        jobs["questions"] = (story, prefetcher.submit(
+            generate_questions, context, PRIORITY_PREFETCH, _story().context.segments[-1]
+        ))
+    if PREFETCH_FINAL_STORY:
+        # 최종 다듬기는 다듬지 않은 조각만 다시 씀
+        jobs["final"] = (story, prefetcher.submit(
+            refine_segments, list(_story().context.segments), list(_story().segment_refined), PRIORITY_PREFETCH
+        ))
+    st.session_state.prefetch = jobs
+
+
+def _take_prefetched(kind: str, timeout: float | None = None):
+    # 같은 이야기로 시작한 작업만 사용, 없거나 실패하면 None.
+    # timeout 안에 안 끝났는데 아직 시작 전이면 취소하고 None → 호출한 쪽이 (헤지되는) 직접 호출로 대체.
+    # 이미 요청을 보낸 작업은 끝까지 기다림 (Prefetcher.take)
+    job = st.session_state.get("prefetch", {}).pop(kind, None)
+    if job is None:
+        return None
+    story, future = job
+    prefetcher = get_default_prefetcher()
+    if story != _story().current_segment:
+        prefetcher.discard(future)
+        return None
+    return prefetcher.take(future, timeout=timeout)
+
+
+def _discard_prefetch(kind: str | None = None):
+    jobs = st.session_state.get("prefetch", {})
+    for name in [kind] if kind else list(jobs):
+        job = jobs.pop(name, None)
+        if job is not None:
+            get_default_prefetcher().discard(job[1])
+
+
+@_ui_action
 def decide_continue(continue_story: bool):
     if continue_story:
-        # 다음 질문들 재생성
-        st.session_state.questions = generate_questions(st.session_state.current_segment)
-        n = len(st.session_state.questions)
-        st.session_state.raw_inputs = [""] * n
-        st.session_state.feedback_counts = [0] * n
-        st.session_state.stage = "choose_q"
+        # 다음 질문들 (미리 생성된 게 있으면 그대로 사용, 없으면 엔진이 생성)
+        _discard_prefetch("final")
+        # 미리 만들 질문이 아직 풀에서 대기 중이면 취소하고 학생이 기다리는 요청으로 보냄 (미리 생성은 헤지하지 않음)
+        _story().continue_story(
+            _take_prefetched("questions", timeout=get_default_router().hedge_delay("generate_questions"))
+        )
     else:
-        st.session_state.stage = "done"
-        
-example_title=[
-    "✅ 1. **시간**의 흐름에 따라 요약",
-    "✅ 2. **장소**의 이동에 따라 요약",
-    "✅ 3. **이야기 구조**에 따라 요약 \n\n(발단–전개–위기–절정–결말)",
-    "✅ 4. **육하원칙**에 따라 요약 \n\n(누가, 언제, 어디서, 무엇을, 어떻게, 왜)",
-    "✅ 5. **등장인물** 중심 요약"
-]
+        # 이야기 완성 → 미리 만들던 질문은 취소/폐기
+        _discard_prefetch("questions")
+        _story().finish()
 
-examples=[
-    "**옛날**에 흥부와 놀부 형제가 살았어요. **그러던 어느 날,** 욕심 많은 형 놀부는 착한 동생 흥부를 집에서 내쫓았고, 흥부는 가난하지만 성실하게 살아갔어요. **그러던 중,** 어느 날 흥부는 다친 제비를 우연히 발견하고 정성껏 치료해 주었어요. **며칠 뒤,** 제비는 고마움의 표시로 박씨 한 알을 물어다 주었고, 흥부는 그 박씨를 정성껏 가꾸었어요. **그러자** 박이 자라 열매가 맺혔고, 그 속에서는 금은보화가 나와 흥부는 큰 부자가 되었어요. **이 소식을 들은** 놀부는 욕심을 부려 일부러 제비 다리를 부러뜨린 뒤 박씨를 얻었어요. 하지만 **박을 가르고 나자** 그 안에서는 괴물과 벌이 튀어나와 놀부는 크게 혼쭐이 났어요.",
-    "흥부는 **자신의 집**에서 아내와 아이들과 함께 가난하게 살고 있었어요. 어느 날, **집 앞 마당**에서 다친 제비를 발견하고 정성껏 치료해 주었죠. 그 후 제비가 물어다 준 박씨를 받아 **집 근처 밭에** 심었고, 시간이 지나 박을 따 보니 그 속에는 금은보화가 가득 들어 있었어요. 이 소식을 들은 놀부는 **흥부의 집**을 찾아가 어떤 일이 있었는지 듣고 그대로 따라 하기로 해요.**자기 집 마당**에 박씨를 심고 박이 자라자 자르는데, 그 속에서 괴물이 튀어나와 **집 안이** 엉망이 되어 버렸어요.결국 놀부는 **자신의 집**에서 큰 혼쭐이 나고, 스스로의 잘못을 깨닫게 되었답니다.",
-    "**발단:** 흥부와 놀부는 성격이 매우 달랐고, 놀부는 흥부를 집에서 내쫓았어요.\n\n**전개:** 흥부는 다친 제비를 치료해 주고, 제비는 박씨를 물어다 주었어요.\n\n**위기:** 박 속에서 금은보화가 나와 흥부는 부자가 되었고, 놀부는 이를 보고 흉내를 냈어요.\n\n**절정:** 놀부는 일부러 제비를 다치게 해 박씨를 얻었지만, 박 속에서는 괴물과 벌이 나왔어요.\n\n**결말:** 놀부는 벌을 받고 자신의 잘못을 뉘우쳤으며, 형제는 다시 화해하게 되었어요.",
-    "**누가:** 흥부와 놀부 형제가\n\n**언제:** 옛날에\n\n**어디서:** 같은 마을에서 살았어요.\n\n**무엇을:** 흥부는 제비를 도와 박씨를 얻고 부자가 되었고, 놀부는 그걸 따라 하다가 벌을 받았어요.\n\n**어떻게:** 흥부는 착하게 행동했고, 놀부는 욕심을 부렸어요.\n\n**왜:** 흥부는 제비를 진심으로 도와주었고, 놀부는 부자가 되고 싶은 마음에 따라 했기 때문이에요.",
-    "**흥부**는 가난했지만 마음이 착해 다친 **제비**를 정성껏 돌봐 주었어요. 제비가 가져온 박씨를 심었더니, 박 속에서 금은보화가 나와 큰 부자가 되었어요. \n\n**놀부**는 그 이야기를 듣고 흥부를 따라 했지만, 욕심을 부려 제비를 일부러 다치게 했어요. 결국 놀부가 키운 박에서는 괴물과 벌이 나왔고, 놀부는 크게 혼이 났어요. 그 일로 놀부는 자신의 잘못을 깨닫고 흥부와 화해하게 되었어요."
-    ]
+
+@_ui_action
+def go_storybook():
+    _story().open_storybook()
+
+
+def _storybook_job():
+    # 같은 제목/이야기면 재실행마다 같은 작업(Future)을 돌려받음
+    title = st.session_state.get("storybook_title", DEFAULT_TITLE)
+    return get_default_renderer().submit(_story().refined_story, title)
 
 # --- Initialize Session State ---
-if 'stage' not in st.session_state:
-    st.session_state.stage = "init"
-    
+# 세션의 첫 실행인지 (스크립트 시간 기록용)
+_run_kind = "rerun" if "story" in st.session_state else "startup"
+if "story" not in st.session_state:
+    # 재개 토큰이 있으면 저장된 세션(받아 둔 질문/피드백/최종 이야기 포함)으로 복구
+    token = st.query_params.get("s")
+    restored = get_default_store().load(token) if token else None
+    if restored is None:
+        token, restored = new_token(), StorySession()
+    st.session_state.story = restored
+    st.session_state.resume_token = token
+    st.query_params["s"] = token
+story = _story()
+
 if 'recommend_phase' not in st.session_state:
     st.session_state.recommend_phase = False
 
-# --- UI Flow ---
-if st.session_state.stage == "init":
-    st.title("🖋️ 인터랙티브 스토리로 만드는 나만의 이야기")
-    st.write("이야기를 쓰기 전에, 앞에서 어떤 일이 있었는지 요약해서 써 보세요. 아래 예시를 참고해도 좋아요!")
+# --- 운영자용 통계: 캐시/미리 생성/맥락 토큰/스크립트 시간 (STORY_APP_DEBUG=1 일 때만) ---
+if os.getenv("STORY_APP_DEBUG"):
+    cache_stats = get_default_cache().stats()
+    st.sidebar.caption(
+        f"LLM 캐시: hit {cache_stats['hits']} (disk {cache_stats['disk_hits']}) / "
+        f"miss {cache_stats['misses']} · 적중률 {cache_stats['hit_rate']:.0%}"
+    )
+    similar_stats = get_default_index().stats()
+    st.sidebar.caption(
+        f"비슷한 입력 재사용: {similar_stats['hits']} / {similar_stats['lookups']} "
+        f"({similar_stats['hit_rate']:.0%}) · 변형 채우기 {similar_stats['fills']} · "
+        f"항목 {similar_stats['entries']} (밀려남 {similar_stats['evictions']})"
+    )
+    prefetch_stats = get_default_prefetcher().stats()
+    st.sidebar.caption(
+        f"미리 생성: 시작 {prefetch_stats['started']} / 사용 {prefetch_stats['used']} / "
+        f"폐기 {prefetch_stats['discarded']}"
+    )
+    storybook_stats = get_default_renderer().stats()
+    st.sidebar.caption(
+        f"스토리북 PDF: 만듦 {storybook_stats['rendered']} / 재사용 {storybook_stats['reused']} / "
+        f"실패 {storybook_stats['failed']}"
+    )
+    parse_report = get_parse_stats().report()
+    st.sidebar.caption(
+        f"피드백 파싱: 정상 {parse_report['ok']} / 로컬 복구 {parse_report['repaired']} / "
+        f"실패 {parse_report['failed']}"
+    )
+    context_report = get_context_stats().report()
+    st.sidebar.caption(
+        f"맥락 토큰(추정): 호출 {context_report['calls']}회 · "
+        f"{context_report['full_tokens']} → {context_report['sent_tokens']} "
+        f"(절약 {context_report['saved_tokens']})"
+    )
+    run_report = get_run_timer().report()
+    st.sidebar.caption(
+        f"스크립트 시간: 첫 실행 p50 {run_report['startup']['p50_ms']:.0f}ms "
+        f"(n={run_report['startup']['count']}) · 재실행 p50 {run_report['rerun']['p50_ms']:.0f}ms "
+        f"/ p95 {run_report['rerun']['p95_ms']:.0f}ms (n={run_report['rerun']['count']}) · "
+        f"조각만 p50 {run_report['fragment']['p50_ms']:.0f}ms (n={run_report['fragment']['count']})"
+    )
+    sched = get_default_scheduler().stats()
+    st.sidebar.caption(
+        f"LLM 대기열: 지금 {sched['queue_depth']} (최대 {sched['max_queue_depth']}) · 요청 중 {sched['in_flight']} · "
+        f"피드백 대기 p95 {sched['wait']['feedback']['p95_ms']:.0f}ms · 미리 생성 대기 p95 "
+        f"{sched['wait']['prefetch']['p95_ms']:.0f}ms · 재시도 {sched['retries']} · 한도 대기 {sched['throttled']}"
+    )
+    store_stats = get_default_store().stats()
+    st.sidebar.caption(
+        f"세션 저장: 체크포인트 {store_stats['checkpoints']} · 기록 필드 {store_stats['fields_written']} "
+        f"(건너뜀 {store_stats['fields_skipped']}) · {store_stats['bytes_written'] / 1024:.1f}KB · "
+        f"복구 {store_stats['restores']}"
+    )
+    # 도우미 함수별 지연/토큰/비용 (METRICS_LOG_PATH 의 JSONL 은 `python metrics.py` 로 요약)
+    llm_rows = get_metrics().summary()
+    if llm_rows:
+        st.sidebar.dataframe(llm_rows, hide_index=True)
+    # 작업별 꼬리 지연(p50/p90/p99)과 헤지 기준/횟수
+    router_rows = get_default_router().stats()
+    if router_rows:
+        st.sidebar.dataframe(router_rows, hide_index=True)
+    for name, row in get_metrics().check_summary().items():
+        st.sidebar.caption(f"{name}: {row['count']}회 · 평균 {row['mean_ms']:.2f}ms")
+
+# --- 단계별 입력 조각 ---
+# 입력창을 고치거나 화면 전용 상태(edit_mode, recommend_phase)만 바꾸는 버튼은 이 조각만 다시 실행하고,
+# 예시 카드·피드백·지금까지 이야기 같은 나머지 화면은 단계가 바뀔 때 한 번만 그립니다.
+
+def _on_start(summary: str):
+    if not _validated(summary, "summary"):
+        return
 
-    # ─── 중앙에 입력창 + 버튼 ───────────────────────
-    c1, c2, c3 = st.columns([1, 8, 1])
-    with c2:
-        summary_input = st.text_area("이야기 요약 입력", height=100, width=4000)
-
-        def _on_start():
-            # 1) 빈 입력 체크
-            if not summary_input.strip():
-                st.error("이야기를 입력해주세요.")
-                return
-
-            # 2) 욕설 검출
-            if contains_profanity(summary_input):
-                st.error("비속어가 포함되지 않은 이야기를 작성해주세요.")
-                return
-
-            # 3) 길이 체크
-            if not is_story_related(summary_input):
-                st.error("최소 20자 이상의 이야기 요약을 입력해주세요.")
-                return
-
-            # 모두 통과 시 시작
-            with st.spinner("질문 생성 중... 잠시만 기다려주세요…"):
-                handle_start(summary_input.strip())
-
-        btn_l, btn_c, btn_r = st.columns([5, 2, 5])
-        with btn_c:
-            st.button("시작하기", on_click=_on_start)
-    
-    
+    # 통과 시 시작
+    with st.spinner("질문 생성 중... 잠시만 기다려주세요…"):
+        handle_start(summary.strip())
 
 
-    # ─── 상단에 5가지 예시 칸 ─────────────────────────
-    example_cols = st.columns(5)
-    for i, col in enumerate(example_cols, start=0):
-        col.markdown(f" {example_title[i]} \n\n{examples[i]}")
-    st.markdown("---")
-    # ────────────────────────────────────────────────
+@_stage_fragment("init")
+def _summary_form():
+    summary_input = st.text_area("이야기 요약 입력", height=100, width=4000)
 
-elif st.session_state.stage == "choose_q":
-    st.subheader("📖 지금까지 이야기")
-    st.text_area("", value=st.session_state.current_segment or "이야기가 아직 없습니다.", height=200,disabled=True)
-    st.subheader("다음 전개를 이어갈 질문을 골라주세요:")
-    for i, q in enumerate(st.session_state.questions):
-        st.button(q, key=f"q{i}", on_click=lambda i=i: choose_question(i))
+    btn_l, btn_c, btn_r = st.columns([5, 2, 5])
+    with btn_c:
+        st.button("시작하기", on_click=_on_start, args=(summary_input,))
 
-elif st.session_state.stage == "write":
-    idx = st.session_state.selected_q_idx
-    st.subheader(f"📖 지금까지 이야기")
-    st.text_area("", value=st.session_state.current_segment or "이야기가 아직 없습니다.", height=200,disabled=True)
-    st.subheader(f"질문: {st.session_state.questions[idx]}")
+
+@_stage_fragment("write")
+def _answer_form():
+    idx = _story().selected_q_idx
     user_text = st.text_area(
         "답변 입력",
-        value=st.session_state.raw_inputs[idx],
+        value=_story().raw_inputs[idx],
         height=200
     )
     st.button(
@@ -334,51 +363,28 @@ elif st.session_state.stage == "write":
         on_click=lambda t=user_text: _on_raw_submit_with_spinner(t)
     )
 
-elif st.session_state.stage == "review":
-    idx = st.session_state.selected_q_idx
 
-    # 1) edit_mode, fb_needs_update 초기화
-    if "edit_mode" not in st.session_state:
-        st.session_state.edit_mode = False
-    if "fb_needs_update" not in st.session_state:
-        st.session_state.fb_needs_update = True
+@_ui_action
+def _resubmit_edit(text: str):
+    _story().submit(text)
+    st.session_state.edit_mode = False
 
-    # 2) 피드백 생성 (최초 진입 또는 재제출 때만)
-    if st.session_state.fb_needs_update:
-        with st.spinner("피드백 생성 중... 잠시만 기다려주세요…"):
-            fb = generate_feedback(
-                st.session_state.raw_inputs[idx],
-                st.session_state.current_segment
-            )
-        st.session_state.fb = fb
-        st.session_state.fb_needs_update = False
-    else:
-        fb = st.session_state.fb
 
-    # 3) 피드백 출력
-       
-    st.markdown("**🟢 잘한 부분:**")
-    for good in fb.get("positives", []):
-        st.markdown(f"- {good}")
-    
-    st.markdown("**❌ 다시 생각해 볼 부분:**")
-    for err in fb.get("errors", []):
-        st.markdown(f"- {err}")
+def _on_edit_submit():
+    new_text = st.session_state.edit_text
+    if not _validated(new_text):
+        return
 
-    st.markdown("**💡 이렇게 바꿔보면 어때요?**")
-    for sug in fb.get("suggestions", []):
-        st.markdown(f"- {sug}")
+    # 통과 시 한 번 클릭으로 처리 (피드백을 새로 받으므로 앱 전체를 다시 실행)
+    with st.spinner("피드백 생성 중... 잠시만 기다려주세요…"):
+        _resubmit_edit(new_text)
 
-    st.markdown("**✨ 추천 예시:**")
-    st.markdown(f"> {fb.get('improved','').replace(chr(10), ' ')}")
-    
-    st.subheader(f"📖 지금까지 이야기")
-    st.text_area("", value=st.session_state.current_segment or "이야기가 아직 없습니다.", height=200,disabled=True)
- 
 
+@_stage_fragment("review")
+def _review_editor():
     # 4) edit_text 초기화
     if "edit_text" not in st.session_state:
-        st.session_state.edit_text = st.session_state.raw_inputs[idx]
+        st.session_state.edit_text = _story().raw_inputs[_story().selected_q_idx]
 
     st.subheader("✏️ 작성한 이야기")
     st.text_area(
@@ -426,53 +432,163 @@ elif st.session_state.stage == "review":
                 )
     else:
         # ─── 수정 모드 ───
-        def _on_edit_submit():
-            new_text = st.session_state.edit_text
-
-            # 1) 빈 입력
-            if not new_text.strip():
-                st.error("답변을 입력해주세요.")
-                return
-            # 2) 욕설 검출
-            if contains_profanity(new_text):
-                st.error("비속어가 포함되지 않은 답변을 작성해주세요.")
-                return
-            # 3) 길이 체크
-            if not is_story_related(new_text):
-                st.error("최소 20자 이상의 답변을 입력해주세요.")
-                return
-
-            # 통과 시 한 번 클릭으로 처리
-            with st.spinner("피드백 생성 중... 잠시만 기다려주세요…"):
-                st.session_state.raw_inputs[idx] = new_text
-                st.session_state.fb_needs_update = True
-                st.session_state.edit_mode = False
-
         # on_click에 콜백만 연결하면 single-click 동작
         st.button("수정을 완료했어요.", on_click=_on_edit_submit)
 
-elif st.session_state.stage == "decide_continue":
+
+@_stage_fragment("storybook", run_every=STORYBOOK_POLL)
+def _storybook_progress():
+    # PDF 를 만드는 동안만 불리는 조각. 다 되면 앱 전체를 다시 실행해 내려받기 버튼을 그림
+    job = _storybook_job()
+    if not UI_FRAGMENTS:
+        with st.spinner("스토리북 PDF 를 만드는 중… 잠시만 기다려주세요"):
+            wait([job])
+    if job.done():
+        st.rerun()
+    st.info("📚 스토리북 PDF 를 만드는 중이에요. 이야기를 읽으면서 잠시만 기다려 주세요.")
+
+
+# --- UI Flow ---
+if story.stage == "init":
+    st.title("🖋️ 인터랙티브 스토리로 만드는 나만의 이야기")
+    st.write("이야기를 쓰기 전에, 앞에서 어떤 일이 있었는지 요약해서 써 보세요. 아래 예시를 참고해도 좋아요!")
+
+    # ─── 중앙에 입력창 + 버튼 ───────────────────────
+    c1, c2, c3 = st.columns([1, 8, 1])
+    with c2:
+        _summary_form()
+
+    # ─── 상단에 5가지 예시 칸 (미리 조립한 카드, 요약을 고치는 동안에는 다시 그리지 않음) ───
+    example_cols = st.columns(5)
+    for i, col in enumerate(example_cols, start=0):
+        col.markdown(example_cards[i])
+    st.markdown("---")
+    # ────────────────────────────────────────────────
+
+elif story.stage == "choose_q":
+    st.subheader("📖 지금까지 이야기")
+    _story_box(story.current_segment)
+    st.subheader("다음 전개를 이어갈 질문을 골라주세요:")
+    for i, q in enumerate(story.questions):
+        st.button(q, key=f"q{i}", on_click=lambda i=i: choose_question(i))
+
+elif story.stage == "write":
+    idx = story.selected_q_idx
+    st.subheader(f"📖 지금까지 이야기")
+    _story_box(story.current_segment)
+    st.subheader(f"질문: {story.questions[idx]}")
+    _answer_form()
+
+elif story.stage == "review":
+    # 1) edit_mode 초기화
+    if "edit_mode" not in st.session_state:
+        st.session_state.edit_mode = False
+
+    # 2) 피드백 출력 자리 (스트리밍 중에는 필드가 완성되는 대로 채움)
+    feedback_slots = {}
+    for field, title in FEEDBACK_SECTIONS:
+        st.markdown(title)
+        feedback_slots[field] = st.empty()
+
+    # 3) 피드백 생성 (최초 진입 또는 재제출 때만)
+    if story.feedback is None:
+        with st.spinner("피드백 생성 중... 잠시만 기다려주세요…"):
+            if LLM_STREAMING:
+                for field, value in story.stream_feedback():
+                    if field in feedback_slots:
+                        _render_feedback_field(feedback_slots[field], field, value)
+            else:
+                # 모델을 기다리는 동안 린터가 찾은 문제부터 보여줌
+                for field, value in local_findings(story.current_input).items():
+                    _render_feedback_field(feedback_slots[field], field, value)
+                story.generate_feedback()
+    fb = story.feedback
+
+    for field, slot in feedback_slots.items():
+        _render_feedback_field(slot, field, fb.get(field, "" if field == "improved" else []))
+    if is_local_feedback(fb):
+        st.caption("띄어쓰기·줄임말처럼 바로 고칠 수 있는 부분이에요. 이야기를 더 써서 다시 내면 내용에 대한 피드백도 받을 수 있어요.")
+    
+    st.subheader(f"📖 지금까지 이야기")
+    _story_box(story.current_segment)
+
+    _review_editor()
+
+elif story.stage == "decide_continue":
     st.subheader("📖 지금까지 이어진 이야기")
-    st.text_area("", value=st.session_state.current_segment, height=300,disabled=True)
+    _story_box(story.current_segment, height=300)
     st.subheader("이야기를 계속 이어쓰시겠습니까?")
     col1, col2 = st.columns(2)
     with col1:
         st.button("계속 이어쓰기", on_click=lambda: decide_continue(True))
     with col2:
         st.button("이야기 완성하기", on_click=lambda: decide_continue(False))
-
-elif st.session_state.stage == "done":
-    st.subheader("✅ 최종 완성된 이야기")
-    st.text_area("Story", value=st.session_state.current_segment, height=400,disabled=True)
-    # 2-1. 처음 진입 시 한 번만 교정된 이야기 받아오기
-    if "refined_story" not in st.session_state:
+elif story.stage == "done":
+    # 2-1. 처음 진입 시 한 번만 교정된 이야기 받아오기 (그동안은 원본을 보여줌)
+    story_slot = st.empty()
+    if story.refined_story is None:
+        with story_slot.container():
+            st.subheader("✅ 최종 완성된 이야기")
+            # 이 실행에서만 그려지는 위젯: 다듬은 결과가 원본과 같아도 ID 가 겹치지 않게 key 지정
+            st.text_area("Story", value=story.current_segment, height=400, disabled=True, key="story_draft")
         with st.spinner("최종 이야기를 다듬는 중… 잠시만 기다려주세요"):
-            refined = refine_story_to_childrens_book(st.session_state.current_segment)
-            # session_state 에 저장하고, 이후 스토리북에도 이 버전을 사용
-            st.session_state.refined_story = refined
-            st.session_state.current_segment = refined
+            # 미리 다듬어 둔 결과가 있으면 그대로 사용
+            segments = _take_prefetched("final")
+            if segments is None and LLM_STREAMING:
+                # 이미 다듬어진 조각은 바로, 다시 다듬는 덩어리는 토큰이 오는 대로 이야기 순서대로 보여줌
+                parts = []
+
+                def _stream_segments():
+                    for n, delta in stream_refined_segments(story.context.segments, story.segment_refined):
+                        if n == len(parts):
+                            parts.append("")
+                            if n:
+                                yield "\n\n"
+                        parts[n] += delta
+                        yield delta
+
+                with story_slot.container():
+                    st.subheader("✅ 최종 완성된 이야기")
+                    st.write_stream(_stream_segments())
+                segments = [part.strip() for part in parts]
+            # 이후 스토리북에도 이 버전을 사용 (segments 가 None 이면 엔진이 직접 다듬음)
+            story.refine_final(segments)
 
     # 2-2. 다듬어진 이야기 보여주기
-    st.subheader("✅ 최종 완성된 이야기")
-    st.text_area("Story", value=st.session_state.refined_story, height=400,disabled=True)
+    with story_slot.container():
+        st.subheader("✅ 최종 완성된 이야기")
+        st.text_area("Story", value=story.refined_story, height=400,disabled=True)
     st.success("이야기가 완성되었습니다! 복사하여 사용하세요.")
+    # 버튼을 누르기 전에 기본 제목으로 미리 만들어 둠 (글꼴이 없으면 스토리북 화면에서 안내)
+    try:
+        _storybook_job()
+    except StorybookError:
+        pass
+    st.button("📚 스토리북 PDF 만들기", on_click=go_storybook)
+
+elif story.stage == "storybook":
+    st.subheader("📚 나의 스토리북")
+    if "storybook_title" not in st.session_state:
+        st.session_state.storybook_title = DEFAULT_TITLE
+    st.text_input("책 제목", key="storybook_title")
+    _story_box(story.refined_story, height=300)
+    try:
+        job = _storybook_job()
+    except StorybookError as e:
+        st.warning(f"{e}\n\n대신 글 파일로 내려받을 수 있어요.")
+        st.download_button("📥 이야기 글 파일 내려받기", story.refined_story, file_name="story.txt",
+                           mime="text/plain", on_click="ignore")
+    else:
+        if not job.done():
+            _storybook_progress()
+        elif job.exception() is not None:
+            st.error(f"스토리북을 만들지 못했어요: {job.exception()}")
+        else:
+            st.download_button("📥 스토리북 PDF 내려받기", job.result(), file_name="storybook.pdf",
+                               mime="application/pdf", on_click="ignore")
+
+# --- 이번 실행에서 만든 피드백/최종 이야기까지 저장 ---
+_checkpoint()
+
+# --- 스크립트 실행 시간 기록 ---
+get_run_timer().record(_run_kind, time.perf_counter() - _run_started, story.stage)
@@ -0,0 +1,70 @@
+# --- 테스트 공통 설정 ---
+# 모듈을 import 하기 전에 디스크 캐시/지표 파일/비슷한 입력 색인/헤지를 끄고, 저장소 루트를 import 경로에 둡니다.
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.update(
+    LLM_CACHE_PATH="", METRICS_LOG_PATH="", METRICS_PROM_PATH="", SIMILAR_INDEX_MAX_ENTRIES="0",
+    LLM_HEDGE="0", LLM_RPM="0", LLM_TPM="0", OPENAI_API_KEY="test",
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import story_llm  # noqa: E402
+from llm_cache import ResponseCache  # noqa: E402
+from similar_index import SimilarIndex  # noqa: E402
+
+
+class FakeClient:
+    # chat.completions.create 만 흉내. replies 를 차례로 돌려주고 (None 이면 구조화 출력 거절),
+    # 함수면 프롬프트로 응답을 만듦 (병렬 호출용)
+    def __init__(self, replies):
+        self.replies = replies[0] if len(replies) == 1 and callable(replies[0]) else list(replies)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        prompt = kwargs["messages"][0]["content"]
+        content = self.replies(prompt) if callable(self.replies) else self.replies.pop(0)
+        message = SimpleNamespace(content=content, refusal=None if content is not None else "거절합니다")
+        if kwargs.get("stream"):
+            return FakeStream(content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class FakeStream:
+    def __init__(self, content):
+        deltas = [SimpleNamespace(content=None, refusal="거절합니다")] if content is None else \
+            [SimpleNamespace(content=content[i:i + 20], refusal=None) for i in range(0, len(content), 20)]
+        self.chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=d)], usage=None) for d in deltas]
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    # 가짜 OpenAI 클라이언트 설치. 디스크 캐시까지 쓰는 새 캐시 (value TEXT NOT NULL 제약 확인용)
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(story_llm, "get_default_cache", lambda: cache)
+
+    def install(*replies):
+        client = FakeClient(replies)
+        monkeypatch.setattr(story_llm, "get_client", lambda: client)
+        return client, cache
+
+    return install
+
+
+@pytest.fixture
+def index(monkeypatch):
+    # 기본 기준값으로 켠 새 비슷한 입력 색인 (conftest 가 기본 색인은 꺼 둠)
+    index = SimilarIndex()
+    monkeypatch.setattr(story_llm, "get_default_index", lambda: index)
+    return index
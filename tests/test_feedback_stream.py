@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+import story_llm
+from feedback_schema import PARSE_ERROR, _parse
+from feedback_stream import FeedbackStreamParser
+
+ANSWER = "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요."
+CONTEXT = "흥부는 다친 제비의 다리를 고쳐 주었어요."
+FEEDBACK = {
+    "positives": ["장면이 생생해요", '"보물"이라는 말이 좋아요'],
+    "errors": [],
+    "suggestions": ["{괄호}나 [대괄호] 대신 쉼표, 마침표를 써 보세요"],
+    "improved": '흥부는 "와, 보물이다!" 하고 외쳤어요. \\ {끝} ]',
+}
+CONTENT = json.dumps(FEEDBACK, ensure_ascii=False)
+
+
+def _feed(chunks) -> list[tuple[str, object]]:
+    parser = FeedbackStreamParser()
+    return [item for chunk in chunks for item in parser.feed(chunk)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(CONTENT)])
+def test_fields_split_across_chunks(size):
+    chunks = [CONTENT[i:i + size] for i in range(0, len(CONTENT), size)]
+    assert _feed(chunks) == list(FEEDBACK.items())
+
+
+def test_each_field_is_emitted_once_its_member_closes():
+    parser = FeedbackStreamParser()
+    cut = CONTENT.index('"errors"')
+    assert parser.feed(CONTENT[:cut - 2]) == []                      # positives 의 ] 까지, 쉼표 전
+    assert parser.feed(CONTENT[cut - 2:cut]) == [("positives", FEEDBACK["positives"])]
+    assert parser.feed(CONTENT[cut:]) == [(name, FEEDBACK[name]) for name in ("errors", "suggestions", "improved")]
+    assert parser.feed("추가 조각") == []
+
+
+def test_escaped_quotes_and_braces_inside_strings():
+    # 역슬래시 바로 뒤에서 끊기는 조각, 문자열 안의 " { } [ ] , 는 구조로 세지 않음
+    text = CONTENT
+    splits = sorted({text.index("\\") + 1, text.index("{괄호}") + 1, text.index("] 대신") + 1, text.index('!\\"') + 2})
+    chunks = [text[a:b] for a, b in zip([0, *splits], [*splits, len(text)])]
+    assert dict(_feed(chunks)) == FEEDBACK
+
+
+def test_code_fence_and_preamble_are_skipped():
+    content = "다음은 피드백입니다.\n```json\n" + CONTENT + "\n```"
+    assert dict(_feed([content[:15], content[15:40], content[40:]])) == FEEDBACK
+
+
+def test_truncated_stream_keeps_closed_fields_and_schema_repairs_the_rest():
+    cut = CONTENT.index("하고 외쳤어요")
+    parser = FeedbackStreamParser()
+    fields = dict(parser.feed(CONTENT[:cut]))
+    assert set(fields) == {"positives", "errors", "suggestions"}
+    feedback, outcome = _parse(parser.text)
+    assert outcome == "repaired"
+    assert feedback.improved == FEEDBACK["improved"][:FEEDBACK["improved"].index("하고")].strip()
+
+
+def test_invalid_member_is_skipped_and_left_to_schema_repair():
+    content = '{"positives": ["좋아요",], "errors": [], "suggestions": [], "improved": "좋은 글"}'
+    assert dict(_feed([content])) == {"errors": [], "suggestions": [], "improved": "좋은 글"}
+    feedback, outcome = _parse(content)
+    assert (feedback.positives, outcome) == (["좋아요"], "repaired")
+
+
+def test_stream_feedback_overwrites_with_repaired_result(fake):
+    truncated = CONTENT[:CONTENT.index("하고 외쳤어요")]
+    client, cache = fake(truncated)
+    updates = list(story_llm.stream_feedback(ANSWER, CONTEXT))
+    fields = [field for field, _ in updates]
+    # 닫힌 필드는 스트림 중에, 끊긴 improved 는 끝난 뒤 복구한 값으로 한 번
+    assert fields == ["positives", "errors", "suggestions", "improved"]
+    assert dict(updates)["improved"].startswith("흥부는")
+    assert PARSE_ERROR not in dict(updates)["errors"]
@@ -0,0 +1,99 @@
+import sqlite3
+import types
+
+import pytest
+
+import llm_cache
+import story_llm
+from llm_cache import ResponseCache, make_key
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=lambda: clock[0]))
+    return clock
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(path="", max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"          # a 가 가장 최근 → b 가 밀려남
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.stats() == {"hits": 3, "disk_hits": 0, "misses": 1, "hit_rate": 0.75, "entries": 2}
+
+
+def test_entries_expire_after_ttl(now):
+    cache = ResponseCache(path="", ttl=60)
+    cache.put("k", "v")
+    now[0] += 60
+    assert cache.get("k") == "v"
+    now[0] += 1
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_sqlite_persists_across_instances(tmp_path, now):
+    path = str(tmp_path / "cache.sqlite3")
+    ResponseCache(path=path).put("k", "흥부와 놀부")
+    cache = ResponseCache(path=path, max_entries=1)
+    assert cache.get("k") == "흥부와 놀부"
+    assert cache.stats()["disk_hits"] == 1
+    # 디스크에서 읽은 값은 메모리로 올라와 다음에는 메모리에서 바로
+    assert cache.get("k") == "흥부와 놀부"
+    assert cache.stats()["disk_hits"] == 1
+    # LRU 에서 밀려나도 디스크에는 남음
+    cache.put("other", "x")
+    assert cache.get("k") == "흥부와 놀부"
+    assert cache.stats()["disk_hits"] == 2
+
+
+def test_expired_disk_entries_are_skipped_and_purged(tmp_path, now):
+    path = str(tmp_path / "cache.sqlite3")
+    ResponseCache(path=path, ttl=60).put("old", "v")
+    now[0] += 61
+    assert ResponseCache(path=path, ttl=3600).get("old") == "v"     # 더 긴 TTL 로 열면 아직 유효
+    assert ResponseCache(path=path, ttl=60).get("old") is None
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
+
+
+def test_make_key_separates_temperature_and_extras():
+    base = make_key("gpt-4o", "prompt", 0.7)
+    assert make_key("gpt-4o", "prompt", 0.7) == base
+    assert make_key("gpt-4o", "prompt", 0.7000001) == base      # 소수 셋째 자리까지만 구분
+    assert make_key("gpt-4o", "prompt", 0.8) != base
+    assert make_key("gpt-4o-mini", "prompt", 0.7) != base
+    assert make_key("gpt-4o", "prompt ", 0.7) != base
+    json_format = {"type": "json_object"}
+    assert make_key("gpt-4o", "prompt", 0.7, json_format) != base
+    assert make_key("gpt-4o", "prompt", 0.7, json_format) == make_key("gpt-4o", "prompt", 0.7, dict(json_format))
+    assert make_key("gpt-4o", "prompt", 0.7, 1) != make_key("gpt-4o", "prompt", 0.7, 2)
+
+
+@pytest.fixture
+def hedged(monkeypatch):
+    # 헤지한 모델이 이긴 것처럼: 요청을 hedge-model 로 보내고 그 모델이 답했다고 돌려줌
+    router = story_llm.get_default_router()
+    monkeypatch.setattr(router, "model_for", lambda task: "primary-model")
+    monkeypatch.setattr(router, "run", lambda task, fn, model, priority, **kwargs: (fn("hedge-model"), "hedge-model"))
+
+
+def test_hedged_answer_is_cached_under_the_answering_model(fake, hedged):
+    client, cache = fake("헤지 응답", "기본 모델 응답")
+    assert story_llm._chat("prompt", 0.7) == "헤지 응답"
+    assert cache.get(make_key("hedge-model", "prompt", 0.7)) == "헤지 응답"
+    assert cache.get(make_key("primary-model", "prompt", 0.7)) is None
+    # 기본 모델로 다시 물으면 다른 모델의 답을 돌려주지 않고 다시 호출
+    assert story_llm._chat("prompt", 0.7) == "기본 모델 응답"
+    assert client.calls == 2
+
+
+def test_hedged_stream_is_cached_under_the_answering_model(fake, hedged):
+    client, cache = fake("헤지 스트림 응답")
+    assert "".join(story_llm._chat_stream("prompt", 0.7)) == "헤지 스트림 응답"
+    assert cache.get(make_key("hedge-model", "prompt", 0.7)) == "헤지 스트림 응답"
+    assert cache.get(make_key("primary-model", "prompt", 0.7)) is None
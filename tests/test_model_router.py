@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+import model_router
+from model_router import DEFAULT_MODEL, TASK_MODELS, TASK_SLO, ModelRouter
+from scheduler import PRIORITY_FEEDBACK, PRIORITY_PREFETCH
+
+
+def _router(**kwargs) -> ModelRouter:
+    return ModelRouter(slo={"refine_extension": 6.0, "generate_feedback": 6.0}, **kwargs)
+
+
+def _observe(router: ModelRouter, task: str, seconds: list[float], stream: bool = False):
+    for value in seconds:
+        router.observe(task, value, stream)
+
+
+def test_hedge_delay_is_budget_half_during_warmup():
+    router = _router()
+    assert router.hedge_delay("refine_extension") == 3.0
+    _observe(router, "refine_extension", [5.0] * (router.min_samples - 1))
+    assert router.hedge_delay("refine_extension") == 3.0
+
+
+def test_hedge_delay_fires_at_p90_not_near_median():
+    # p50 ≈ 5s, p90 = 5.5s (최근접 순위), 목표 6s: 예전 공식은 max(0.3, min(6 - 5, 5.5)) = 1.0s 로 거의 모든 요청을 두 번 보냄
+    router = _router()
+    _observe(router, "refine_extension", [4.6, 4.8, 5.0, 5.0, 5.0, 5.1, 5.2, 5.3, 5.5, 5.9])
+    assert router.hedge_delay("refine_extension") == pytest.approx(5.5)
+
+
+def test_hedge_delay_is_capped_by_budget_when_p50_exceeds_it():
+    # p50 7s > 목표 6s: 예전 공식은 최저값 0.3s 에서 모든 요청을 헤지
+    router = _router()
+    _observe(router, "generate_feedback", [6.5, 7.0, 7.0, 7.0, 7.0, 7.2, 7.5, 8.0, 9.0, 10.0])
+    assert router.hedge_delay("generate_feedback") == 6.0
+
+
+def test_hedge_delay_floor_and_disabled_tasks():
+    router = _router(min_delay=0.3)
+    _observe(router, "refine_extension", [0.05] * 20)
+    assert router.hedge_delay("refine_extension") == 0.3
+    assert router.hedge_delay("refine_story") is None
+    assert _router(hedge=False).hedge_delay("refine_extension") is None
+
+
+def test_models_are_routed_by_task():
+    router = ModelRouter(models={"generate_questions": "gpt-4o-mini"}, hedge_models={"generate_feedback": "fast"})
+    assert router.model_for("generate_questions") == "gpt-4o-mini"
+    assert router.model_for("generate_feedback") == DEFAULT_MODEL
+    assert router.hedge_model_for("generate_feedback") == "fast"
+    # 헤지 모델을 따로 정하지 않으면 원래 모델로 다시 보냄
+    assert router.hedge_model_for("generate_questions") == "gpt-4o-mini"
+
+
+def test_default_router_reads_task_env(monkeypatch):
+    monkeypatch.setattr(model_router, "_default_router", None)
+    monkeypatch.setenv("LLM_MODEL_GENERATE_FEEDBACK", "gpt-4o-mini")
+    monkeypatch.setenv("LLM_HEDGE_MODEL_REFINE_EXTENSION", "gpt-4o-mini")
+    monkeypatch.setenv("LLM_SLO_REFINE_STORY", "30")
+    monkeypatch.setenv("LLM_SLO_GENERATE_QUESTIONS", "")
+    router = model_router.get_default_router()
+    assert router.model_for("generate_feedback") == "gpt-4o-mini"
+    assert router.model_for("generate_questions") == TASK_MODELS["generate_questions"]
+    assert router.hedge_model_for("refine_extension") == "gpt-4o-mini"
+    assert router.slo["refine_story"] == 30.0
+    assert router.slo["refine_extension"] == TASK_SLO["refine_extension"]
+    assert router.hedge_delay("generate_questions") is None
+
+
+def test_latency_history_is_windowed_per_task_and_kind():
+    router = ModelRouter(window=5, min_samples=1)
+    _observe(router, "generate_feedback", [9.0] * 5 + [1.0] * 5)
+    _observe(router, "generate_feedback", [0.5] * 3, stream=True)
+    rows = {(row["task"], row["kind"]): row for row in router.stats()}
+    # 오래된 9초 기록은 창 밖으로 밀려남, 스트리밍(TTFT)은 따로 셈
+    assert rows[("generate_feedback", "wall")]["n"] == 5
+    assert rows[("generate_feedback", "wall")]["p99_ms"] == 1000
+    assert rows[("generate_feedback", "ttft")]["n"] == 3
+    assert router.hedge_delay("generate_feedback", stream=True) == 0.5
+
+
+def test_run_hedges_slow_call_to_hedge_model():
+    router = ModelRouter(hedge_models={"generate_feedback": "fast"}, min_delay=0.05, min_samples=1)
+    _observe(router, "generate_feedback", [0.05])
+    release = threading.Event()
+    discarded = []
+
+    def call(model):
+        if model == "fast":
+            return "빠른 답"
+        release.wait(2)
+        return "느린 답"
+
+    result, model = router.run("generate_feedback", call, DEFAULT_MODEL, PRIORITY_FEEDBACK,
+                               on_discard=lambda *args: discarded.append(args[:2]))
+    release.set()
+    assert (result, model) == ("빠른 답", "fast")
+    assert router.hedged[("generate_feedback", False)] == 1
+    assert router.hedge_wins[("generate_feedback", False)] == 1
+    # 진 쪽 응답은 도착하면 on_discard 로 넘어감 (스트림 닫기/토큰 기록용)
+    deadline = time.monotonic() + 2
+    while not discarded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert discarded == [("느린 답", DEFAULT_MODEL)]
+
+
+def test_prefetch_is_never_hedged():
+    router = ModelRouter(min_delay=0.01, min_samples=1)
+    _observe(router, "generate_questions", [0.01])
+    models = []
+
+    def call(model):
+        models.append(model)
+        time.sleep(0.1)
+        return "질문"
+
+    assert router.run("generate_questions", call, "gpt-4o-mini", PRIORITY_PREFETCH) == ("질문", "gpt-4o-mini")
+    assert models == ["gpt-4o-mini"]
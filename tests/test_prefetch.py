@@ -0,0 +1,34 @@
+import threading
+import time
+
+from prefetch import Prefetcher
+
+
+def test_take_waits_for_running_job_instead_of_giving_up():
+    prefetcher = Prefetcher(max_workers=1)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "questions"
+
+    future = prefetcher.submit(slow)
+    time.sleep(0.05)
+    assert prefetcher.take(future, timeout=0.01) == "questions"
+    assert calls == [1]
+    assert prefetcher.stats()["used"] == 1
+
+
+def test_take_cancels_job_that_has_not_started():
+    prefetcher = Prefetcher(max_workers=1)
+    release = threading.Event()
+    ran = []
+    prefetcher.submit(release.wait)
+    queued = prefetcher.submit(lambda: ran.append(1))
+    assert prefetcher.take(queued, timeout=0.01) is None
+    assert queued.cancelled()
+    release.set()
+    time.sleep(0.05)
+    assert ran == []
+    assert prefetcher.stats()["discarded"] == 1
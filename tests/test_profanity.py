@@ -0,0 +1,44 @@
+import os
+import random
+
+import pytest
+
+import profanity
+from profanity import KOR_PROFANITY_REGEX, contains_profanity, find_profanity
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks",
+                           "profanity_corpus.tsv")
+# 라벨 → (기존 정규식, 새 엔진) 기대값
+EXPECTED = {"clean": (False, False), "both": (True, True), "new": (False, True)}
+
+
+def _corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        rows = [line.rstrip("\n").split("\t", 1) for line in f if line.strip() and not line.startswith("#")]
+    return [pytest.param(label, text, id=f"{label}-{text[:12]}") for label, text in rows]
+
+
+def _fuzz_texts(n: int, seed: int = 0):
+    # 정규식에 나오는 글자 + 숫자/공백/줄바꿈 + 흔한 글자로 짧은 문자열
+    pattern_chars = {ch for ch in KOR_PROFANITY_REGEX.pattern if ch not in "[]()?*+|^{}-:<=\\"}
+    alphabet = sorted(pattern_chars) + list("0123 \n가나다하는이를에ㅅㅂ")
+    rng = random.Random(seed)
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("label, text", _corpus())
+def test_corpus_matches_legacy_regex(label, text):
+    assert (bool(KOR_PROFANITY_REGEX.search(text)), contains_profanity(text)) == EXPECTED[label]
+    assert bool(find_profanity(text)) == contains_profanity(text)
+
+
+def test_catches_everything_the_legacy_regex_catches():
+    missed = [text for text in _fuzz_texts(20000) if KOR_PROFANITY_REGEX.search(text) and not contains_profanity(text)]
+    assert missed == []
+
+
+def test_screen_never_hides_an_automaton_match(monkeypatch):
+    texts = _fuzz_texts(20000, seed=1)
+    screened = [profanity._literal_spans(text) for text in texts]
+    monkeypatch.setattr(profanity, "_literal_candidate", lambda text: True)
+    assert screened == [profanity._literal_spans(text) for text in texts]
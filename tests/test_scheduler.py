@@ -0,0 +1,170 @@
+import threading
+import types
+
+import openai
+import pytest
+
+import scheduler
+from scheduler import PRIORITY_FEEDBACK, PRIORITY_FINAL, PRIORITY_INTERACTIVE, PRIORITY_PREFETCH, RequestScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeCondition(threading.Condition):
+    # 시간 제한이 있는 대기는 실제로 자지 않고 가짜 시계만 그만큼 넘김
+    def __init__(self, clock):
+        super().__init__()
+        self._clock = clock
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            return super().wait()
+        self._clock.now += timeout
+        return False
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: 0.0)
+    return clock
+
+
+def _scheduler(clock, **kwargs) -> RequestScheduler:
+    sched = RequestScheduler(**kwargs)
+    sched._cond = FakeCondition(clock)
+    return sched
+
+
+def _rate_limited(retry_after: str) -> openai.RateLimitError:
+    response = types.SimpleNamespace(status_code=429, headers={"retry-after": retry_after}, request=None)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_heap_grants_by_priority_then_arrival(clock):
+    sched = _scheduler(clock, max_concurrency=1, rpm=0, tpm=0)
+    holder = sched.acquire(PRIORITY_FEEDBACK, 10)
+    order = []
+
+    def worker(priority, name):
+        ticket = sched.acquire(priority, 10)
+        order.append(name)
+        sched.release(ticket)
+
+    arrivals = [(PRIORITY_PREFETCH, "prefetch"), (PRIORITY_INTERACTIVE, "questions-1"), (PRIORITY_FINAL, "final"),
+                (PRIORITY_FEEDBACK, "feedback"), (PRIORITY_INTERACTIVE, "questions-2")]
+    threads = []
+    for priority, name in arrivals:
+        thread = threading.Thread(target=worker, args=(priority, name))
+        thread.start()
+        threads.append(thread)
+        # 도착 순서를 고정: 앞 요청이 대기열에 들어간 뒤 다음 요청을 보냄
+        while True:
+            with sched._cond:
+                if len(sched._heap) == len(threads):
+                    break
+    assert sched.max_queue_depth == len(arrivals)
+    sched.release(holder)
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["feedback", "questions-1", "questions-2", "final", "prefetch"]
+
+
+def test_prefetch_leaves_reserve_for_students(clock):
+    sched = _scheduler(clock, rpm=10, tpm=0, prefetch_reserve=0.2)
+    for _ in range(7):
+        sched.release(sched.acquire(PRIORITY_FEEDBACK, 10))
+    started = clock.now
+    # 남은 3개 = 요청 1 + 예약 2 → 미리 생성도 바로 들어감
+    sched.release(sched.acquire(PRIORITY_PREFETCH, 10))
+    assert clock.now == started
+    # 남은 2개로는 예약을 못 지킴 → 1개가 찰 때까지 (10/분 = 6초) 기다림
+    sched.release(sched.acquire(PRIORITY_PREFETCH, 10))
+    assert clock.now == pytest.approx(started + 6)
+    assert sched.throttled == 1
+    # 학생 요청은 예약분을 쓸 수 있으므로 바로 들어감
+    waited_at = clock.now
+    sched.release(sched.acquire(PRIORITY_FEEDBACK, 10))
+    assert clock.now == waited_at
+    assert sched.throttled == 1
+
+
+def test_request_bucket_refills_at_rpm(clock):
+    sched = _scheduler(clock, rpm=60, tpm=0)
+    for _ in range(60):
+        sched.release(sched.acquire(PRIORITY_FEEDBACK, 1))
+    started = clock.now
+    sched.release(sched.acquire(PRIORITY_FEEDBACK, 1))
+    assert clock.now == pytest.approx(started + 1)
+
+
+def test_token_bucket_settles_estimate_against_usage(clock):
+    sched = _scheduler(clock, rpm=0, tpm=1200)
+    ticket = sched.acquire(PRIORITY_INTERACTIVE, 600)
+    assert sched._tokens.level == 600
+    sched.release(ticket, used_tokens=200)           # 추정보다 적게 씀 → 400 돌려받음
+    assert sched._tokens.level == 1000
+    sched.adjust_tokens(estimated=100, used=400)      # 스트리밍 뒤 정산: 300 더 씀
+    assert sched._tokens.level == 700
+    started = clock.now
+    sched.release(sched.acquire(PRIORITY_INTERACTIVE, 1000))   # 300 부족, 분당 1200 → 15초
+    assert clock.now == pytest.approx(started + 15)
+    # 용량보다 큰 요청은 용량만큼만 요구하고 빚을 지지 않음
+    started = clock.now
+    sched.release(sched.acquire(PRIORITY_INTERACTIVE, 5000))
+    assert clock.now == pytest.approx(started + 60)
+    assert sched._tokens.level == pytest.approx(0)
+
+
+def test_retry_after_is_honoured(clock):
+    sched = _scheduler(clock, rpm=0, tpm=0, backoff_base=0.5)
+    outcomes = iter([_rate_limited("7"), "ok"])
+
+    def fn():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert sched.call(fn, PRIORITY_FEEDBACK, 10) == "ok"
+    assert clock.sleeps == [7.0]
+    assert sched.retries == 1
+
+
+def test_gives_up_after_max_retries(clock):
+    sched = _scheduler(clock, rpm=0, tpm=0, max_retries=2)
+
+    def fn():
+        raise _rate_limited("1")
+
+    with pytest.raises(openai.RateLimitError):
+        sched.call(fn, PRIORITY_FEEDBACK, 10)
+    assert (sched.retries, sched.gave_up) == (2, 1)
+    assert sched.stats()["in_flight"] == 0
+
+
+def test_429_pauses_every_priority_and_slows_the_rate(clock):
+    sched = _scheduler(clock, rpm=60, tpm=0)
+    sched._backoff(0, _rate_limited("5"))
+    assert not sched.has_capacity()
+    assert sched.stats()["rpm_effective"] == pytest.approx(30)
+    started = clock.now
+    # 다른 우선순위 요청도 Retry-After 가 지날 때까지 기다림 (비워진 버킷은 그동안 줄어든 속도로 참)
+    sched.release(sched.acquire(PRIORITY_FEEDBACK, 10))
+    assert clock.now == pytest.approx(started + 5)
+    assert sched.has_capacity()
+    # 성공할수록 설정 속도 쪽으로 회복
+    sched.call(lambda: "ok", PRIORITY_FEEDBACK, 10)
+    assert sched.stats()["rpm_effective"] == pytest.approx(30 + 60 / 50)
@@ -0,0 +1,114 @@
+import sqlite3
+import types
+
+import pytest
+
+import session_store
+from session_store import SessionStore, new_token
+from story_session import StorySession
+
+SUMMARY = "흥부는 다친 제비의 다리를 고쳐 주었고, 제비는 박씨 하나를 물고 돌아왔어요."
+QUESTIONS = ["박 속에서 무엇이 나왔을까요?", "놀부는 어떻게 했을까요?", "제비는 어디로 갔을까요?"]
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(session_store, "time", types.SimpleNamespace(time=lambda: clock[0]))
+    return clock
+
+
+def _session() -> StorySession:
+    session = StorySession()
+    session.start(SUMMARY, questions=QUESTIONS)
+    session.choose_question(0)
+    session.submit("박 속에서 금은보화가 쏟아져 나왔어요.")
+    return session
+
+
+def _rows(path) -> dict[str, int]:
+    with sqlite3.connect(path) as db:
+        return dict(db.execute("SELECT token, COUNT(*) FROM session_fields GROUP BY token").fetchall())
+
+
+def test_round_trip_across_store_instances(tmp_path, now):
+    path = str(tmp_path / "sessions.sqlite3")
+    session = _session()
+    token = new_token()
+    assert SessionStore(path).save(token, session) == len(session.to_dict())
+
+    restored = SessionStore(path).load(token)
+    assert restored.to_dict() == session.to_dict()
+    assert restored.context.render() == session.context.render()
+    assert restored.current_question == QUESTIONS[0]
+
+
+def test_checkpoint_writes_only_changed_fields(tmp_path, now):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"))
+    session = _session()
+    store.save("t", session)
+    assert store.save("t", session) == 0
+
+    session.submit("박 속에서 반짝이는 보물이 나왔어요.")
+    assert store.save("t", session) == 1            # raw_inputs 만
+    session.feedback = {"errors": [], "suggestions": ["좋아요"], "improved": "보물이 나왔어요."}
+    session.decide_feedback(is_done=False)          # feedback + feedback_counts + stage
+    assert store.save("t", session) == 3
+    stats = store.stats()
+    assert stats["checkpoints"] == 4
+    assert stats["fields_written"] == len(session.to_dict()) + 4
+    assert stats["fields_skipped"] == 4 * len(session.to_dict()) - stats["fields_written"]
+
+
+def test_restored_session_does_not_rewrite_unchanged_fields(tmp_path, now):
+    path = str(tmp_path / "sessions.sqlite3")
+    SessionStore(path).save("t", _session())
+    store = SessionStore(path)
+    session = store.load("t")
+    # 되살린 값의 해시를 기억하므로 서버 재시작 뒤 첫 체크포인트도 바뀐 필드만 씀
+    assert store.save("t", session) == 0
+    session.submit("박이 열리자 제비가 다시 날아왔어요.")
+    assert store.save("t", session) == 1            # raw_inputs 만
+    assert SessionStore(path).load("t").current_input == session.current_input
+
+
+def test_resume_token_lookup(tmp_path, now):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"))
+    first, second = _session(), StorySession()
+    store.save("first", first)
+    store.save("second", second)
+    assert store.load("first").raw_inputs == first.raw_inputs
+    assert store.load("second").stage == "init"
+    assert store.load("missing") is None
+    assert store.load("") is None
+    assert store.stats()["restores"] == 2
+    assert new_token() != new_token()
+
+
+def test_partial_snapshot_starts_fresh(tmp_path, now):
+    path = str(tmp_path / "sessions.sqlite3")
+    store = SessionStore(path)
+    store.save("t", _session())
+    with sqlite3.connect(path) as db:
+        db.execute("DELETE FROM session_fields WHERE field = 'context'")
+    assert store.load("t") is None
+
+
+def test_expired_sessions_are_not_restored_and_are_purged(tmp_path, now):
+    path = str(tmp_path / "sessions.sqlite3")
+    store = SessionStore(path, ttl=3600)
+    store.save("old", _session())
+    now[0] += 1800
+    store.save("recent", _session())
+    now[0] += 1801
+    assert store.load("old") is None
+    assert store.load("recent") is not None
+    # 다음에 저장소를 열 때 만료된 세션의 행을 지움
+    SessionStore(path, ttl=3600)
+    assert _rows(path) == {"recent": len(StorySession().to_dict())}
+
+
+def test_disabled_store_keeps_nothing():
+    store = SessionStore(path="")
+    assert store.save("t", _session()) == 0
+    assert store.load("t") is None
@@ -0,0 +1,59 @@
+import itertools
+import json
+
+import story_llm
+from story_examples import examples
+
+CONTINUE_A = "흥부는 박 속에서 나온 금화로 마을에 큰 잔치를 열었고, 모두가 함께 춤을 추며 노래했어요."
+CONTINUE_B = "놀부는 제비를 잡으려고 밤새 지붕 위에서 기다리다가 그만 미끄러져 마당으로 떨어졌어요."
+
+
+def _questions(fake):
+    numbers = itertools.count()
+    return fake(lambda prompt: "\n".join(f"질문 {next(numbers)}" for _ in range(3)))
+
+
+def test_continue_questions_ignore_shared_summary(fake, index):
+    client, _ = _questions(fake)
+    summary = examples[0]
+    first_a = story_llm.generate_questions(f"{summary}\n{CONTINUE_A}", latest=CONTINUE_A)
+    for _ in range(3):
+        # 같은 요약 + 전혀 다른 이어쓰기: 학생 A 의 질문을 받으면 안 됨
+        assert story_llm.generate_questions(f"{summary}\n{CONTINUE_B}", latest=CONTINUE_B) != first_a
+    assert client.calls == 4
+
+
+def test_first_round_questions_reuse_similar_summary(fake, index):
+    client, _ = _questions(fake)
+    for _ in range(index.variants["generate_questions"] + 2):
+        story_llm.generate_questions(examples[0])
+    story_llm.generate_questions(examples[0].replace("흥부", "흥부가"))
+    assert client.calls == index.variants["generate_questions"]
+
+
+ANSWER = "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요."
+CONTEXT = examples[0]
+
+
+def _feedback(fake):
+    return fake(lambda prompt: json.dumps(
+        {"positives": ["좋아요"], "errors": [], "suggestions": [], "improved": prompt.split("사용자 작성:\n")[1].split("\n")[0]},
+        ensure_ascii=False,
+    ))
+
+
+def test_feedback_is_not_reused_for_near_duplicate_answers(fake, index):
+    client, _ = _feedback(fake)
+    story_llm.generate_feedback(ANSWER, CONTEXT)
+    for other in (ANSWER.replace("노래를", "노래룰"), ANSWER.replace("흥부", "놀부")):
+        # 오타 하나, 이름 하나만 달라도 다른 학생의 추천 예시를 받으면 안 됨
+        assert story_llm.generate_feedback(other, CONTEXT)["improved"] == other
+        assert dict(story_llm.stream_feedback(other + " 끝.", CONTEXT))["improved"] == other + " 끝."
+    assert client.calls == 5
+
+
+def test_feedback_is_reused_for_same_answer(fake, index):
+    client, _ = _feedback(fake)
+    story_llm.generate_feedback(ANSWER, CONTEXT)
+    assert story_llm.generate_feedback("  " + ANSWER.replace(" ", "  ", 1), CONTEXT)["improved"] == ANSWER
+    assert client.calls == 1
@@ -0,0 +1,15 @@
+from story_context import StoryContext
+
+SEGMENT = "흥부는 {n}번째 박을 탔어요. 박 속에서 보물이 나왔어요. 아이들은 손뼉을 쳤어요. 흥부는 이웃과 나눴어요."
+
+
+def test_render_does_not_change_state():
+    ctx = StoryContext(keep_last=3, token_budget=60)
+    for n in range(6):
+        ctx.append(SEGMENT.format(n=n))
+    before = ctx.to_dict()
+    first = ctx.render()
+    assert ctx.to_dict() == before
+    assert ctx.render() == first
+    # 예산에 맞춘 보기는 프롬프트용일 뿐, 이야기는 그대로 남음
+    assert ctx.full_text() == "\n".join(SEGMENT.format(n=n) for n in range(6))
@@ -0,0 +1,14 @@
+import pytest
+
+from story_lint import autofix, lint
+
+
+@pytest.mark.parametrize("text", ["흥부는 망설였어요. 그래서 ... 박을 탔어요.", "흥부는 망설였어요. 그래서 … 박을 탔어요."])
+def test_ellipsis_after_space_is_not_a_spacing_error(text):
+    assert [issue for issue in lint(text) if issue.kind == "spacing"] == []
+    assert autofix(text) == text
+
+
+def test_space_before_period_is_still_flagged():
+    issues = lint("흥부는 박을 탔어요 . 보물이 나왔어요.")
+    assert [issue.kind for issue in issues] == ["spacing"]
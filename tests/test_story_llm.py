@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import story_llm
+from feedback_schema import PARSE_ERROR
+from story_lint import is_local_feedback
+
+ANSWER = "흥부는 박을 타면서 가족들과 함께 노래를 불렀어요. 박 속에서는 반짝이는 보물이 쏟아졌어요."
+CONTEXT = "흥부는 다친 제비의 다리를 고쳐 주었어요."
+GOOD = json.dumps({"positives": ["좋아요"], "errors": [], "suggestions": [], "improved": ANSWER}, ensure_ascii=False)
+
+
+def test_refusal_returns_parse_error(fake):
+    client, cache = fake(None)
+    feedback = story_llm.generate_feedback(ANSWER, CONTEXT)
+    assert feedback["errors"] == [PARSE_ERROR]
+    assert feedback["improved"] == ANSWER
+    assert cache.stats()["entries"] == 0
+
+
+def test_stream_refusal_returns_parse_error(fake):
+    client, cache = fake(None)
+    feedback = dict(story_llm.stream_feedback(ANSWER, CONTEXT))
+    assert feedback["errors"] == [PARSE_ERROR]
+    assert feedback["improved"] == ANSWER
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_malformed_reply_is_not_cached(fake, stream):
+    client, cache = fake("죄송하지만 피드백을 만들 수 없어요.", GOOD)
+
+    def ask():
+        if stream:
+            return dict(story_llm.stream_feedback(ANSWER, CONTEXT))
+        return story_llm.generate_feedback(ANSWER, CONTEXT)
+
+    assert ask()["errors"] == [PARSE_ERROR]
+    assert cache.stats()["entries"] == 0
+    # 다시 물으면 모델을 다시 부르고, 읽을 수 있는 응답은 캐시됨
+    assert ask()["positives"] == ["좋아요"]
+    assert client.calls == 2
+    assert ask()["positives"] == ["좋아요"]
+    assert client.calls == 2
+
+
+def test_stream_refined_segments_matches_refine_segments(fake):
+    # 다듬을 부분을 "다듬은 " 을 붙여 돌려줌
+    fake(lambda prompt: "  다듬은 " + prompt.split("■ 다듬을 부분:\n")[1].split("\n\n■ 뒷부분:")[0])
+    segments = ["처음 요약이에요.", "다듬은 첫 조각", "학생이 쓴 둘째 조각", "셋째 조각"]
+    refined = [False, True, False, False]
+    parts = []
+    for n, delta in story_llm.stream_refined_segments(segments, refined, chunk_tokens=5):
+        if n == len(parts):
+            parts.append("")
+        parts[n] += delta
+    assert [part.strip() for part in parts] == story_llm.refine_segments(segments, refined, chunk_tokens=5)
+    assert parts[0] == "다듬은 처음 요약이에요."
+
+
+DIRTY = ANSWER.replace("어요. ", "어요.", 1)      # 마침표 뒤 붙여 쓰기 하나
+
+
+def test_lint_findings_come_first_and_model_still_reviews(fake):
+    client, _ = fake(GOOD)
+    stream = story_llm.stream_feedback(DIRTY, CONTEXT)
+    first = next(stream)
+    # 모델을 부르기 전에 린터 결과부터
+    assert first[0] == "errors" and client.calls == 0
+    feedback = dict([first, *stream])
+    assert client.calls == 1
+    assert feedback["positives"] == ["좋아요"]
+    assert feedback["errors"] == first[1]
+    assert "source" not in feedback
+
+
+@pytest.mark.parametrize("short_circuit", [False, True])
+def test_lint_issue_alone_does_not_skip_model(fake, monkeypatch, short_circuit):
+    monkeypatch.setattr(story_llm, "LINT_SHORT_CIRCUIT", short_circuit)
+    client, _ = fake(GOOD)
+    feedback = story_llm.generate_feedback(DIRTY, CONTEXT)
+    assert client.calls == 1
+    assert feedback["errors"] and feedback["positives"] == ["좋아요"]
+
+
+def test_short_circuit_only_when_nothing_left_to_review(fake, monkeypatch):
+    monkeypatch.setattr(story_llm, "LINT_SHORT_CIRCUIT", True)
+    client, _ = fake(GOOD)
+    feedback = story_llm.generate_feedback("ㅋㅋㅋㅋㅋㅋ 진짜 웃겨요 ㅎㅎㅎㅎㅎㅎ ㅋㅋㅋㅋㅋㅋㅋ", CONTEXT)
+    assert client.calls == 0
+    assert is_local_feedback(feedback)
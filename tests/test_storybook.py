@@ -0,0 +1,87 @@
+import re
+import struct
+import zlib
+
+import pytest
+
+import storybook
+from storybook import _pdf_names, export_class
+
+STORIES = [("kim", "첫 이야기", "흥부는 박을 탔어요."), ("kim", "둘째 이야기", "놀부는 제비를 보았어요.")]
+
+
+def _write_box_font(path, text: str):
+    # 시스템에 한글 글꼴이 없어도 렌더링 경로를 끝까지 타도록, text 의 글자와 ASCII 를 모두 네모 글리프 하나로
+    # 그리는 최소 TrueType 글꼴 (fpdf 1.7 이 읽는 표만: head/hhea/maxp/OS/2/hmtx/loca/glyf/cmap/name/post)
+    codes = sorted(set(range(32, 127)) | {ord(ch) for ch in text})
+    square = struct.pack(">h4hHH4B4h4h", 1, 100, 0, 600, 700, 3, 0, 1, 1, 1, 1, 100, 0, 500, 0, 0, 700, 0, -700)
+    glyf = square + b"\0" * 2                  # 0: .notdef (빈 글리프), 1: 네모 (짝수 길이로), 2: 빈 글리프
+    names = [(nid, value.encode("utf-16-be")) for nid, value in
+             ((1, "StorybookTest"), (2, "Regular"), (4, "StorybookTest Regular"), (6, "StorybookTest-Regular"))]
+    name = struct.pack(">HHH", 0, len(names), 6 + 12 * len(names))
+    offset = 0
+    for nid, raw in names:
+        name += struct.pack(">6H", 3, 1, 0x409, nid, len(raw), offset)
+        offset += len(raw)
+    name += b"".join(raw for _, raw in names)
+    cmap = struct.pack(">HHHHI", 0, 1, 3, 10, 12)
+    cmap += struct.pack(">HHIII", 12, 0, 16 + 12 * len(codes), 0, len(codes))
+    cmap += b"".join(struct.pack(">III", code, code, 1) for code in codes)
+    tables = {
+        "head": struct.pack(">IIIIHHqqhhhhHHhhh", 0x10000, 0x10000, 0, 0x5F0F3CF5, 0, 1000, 0, 0,
+                            0, -200, 1000, 800, 0, 8, 2, 1, 0),
+        "hhea": struct.pack(">I3hH3h3h4hhH", 0x10000, 800, -200, 0, 800, 0, 0, 600, 1, 0, 0, 0, 0, 0, 0, 0, 3),
+        "maxp": struct.pack(">IH13H", 0x10000, 3, 4, 1, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0),
+        "OS/2": struct.pack(">HhHHHhhhhhhhhhhh10s4I4sHHHhhhHH", 0, 800, 400, 5, 0, 0, 0, 0, 0, 0, 0, 0, 0, 50, 300,
+                            0, b"\0" * 10, 0, 0, 0, 0, b"TEST", 0x40, 32, 0xFFFF, 800, -200, 0, 800, 200),
+        "hmtx": struct.pack(">6H", 800, 0, 800, 100, 800, 0),
+        "loca": struct.pack(">4I", 0, 0, len(glyf), len(glyf)),
+        "glyf": glyf,
+        "cmap": cmap,
+        "name": name,
+        "post": struct.pack(">IIhhIIIII", 0x30000, 0, -100, 50, 0, 0, 0, 0, 0),
+    }
+    directory_size = 12 + 16 * len(tables)
+    header = struct.pack(">IHHHH", 0x10000, len(tables), 128, 3, 16 * len(tables) - 128)
+    records, body = b"", b""
+    for tag, data in sorted(tables.items()):
+        records += struct.pack(">4sIII", tag.encode("latin1"), 0, directory_size + len(body), len(data))
+        body += data + b"\0" * (-len(data) % 4)
+    path.write_bytes(header + records + body)
+
+
+@pytest.fixture
+def font(tmp_path, monkeypatch):
+    path = tmp_path / "StorybookTest.ttf"
+    _write_box_font(path, "".join(title + text for _, title, text in STORIES) + storybook.DEFAULT_TITLE)
+    monkeypatch.setenv("STORYBOOK_FONT_PATH", str(path))
+    return str(path)
+
+
+def test_pdf_names_never_collide():
+    names = ["kim", "kim", "a b", "a_b", "Kim", "lee"]
+    assert _pdf_names(names) == ["kim.pdf", "kim-2.pdf", "a_b.pdf", "a_b-2.pdf", "Kim-3.pdf", "lee.pdf"]
+
+
+def _page_texts(pdf: bytes) -> list[bytes]:
+    # 쪽마다 압축된 내용 스트림 (fpdf 가 쪽 순서대로 씀)
+    pattern = rb"<</Filter /FlateDecode /Length \d+>>\nstream\n(.*?)\nendstream"
+    return [zlib.decompress(raw) for raw in re.findall(pattern, pdf, re.DOTALL)]
+
+
+def test_render_pdf_draws_hangul_with_the_embedded_font(font):
+    title, text = STORIES[0][1:]
+    pdf = storybook.render_pdf(text, title)
+    assert b"/BaseFont /MPDFAA+StorybookTest-Regular" in pdf
+    cover, body = _page_texts(pdf)
+    # 본문 글자는 UTF-16BE 코드로 쓰이고, 제목은 문서 정보에도 BOM 붙은 UTF-16BE 로 들어감
+    assert title.encode("utf-16-be") in cover
+    assert text.encode("utf-16-be") in body
+    assert ("\ufeff" + title).encode("utf-16-be") in pdf
+
+
+def test_export_class_keeps_duplicate_ids_apart(tmp_path, font):
+    out_dir = tmp_path / "out"
+    paths = export_class(STORIES, str(out_dir), workers=1)
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["kim.pdf", "kim-2.pdf"]
+    assert (out_dir / "kim.pdf").read_bytes() != (out_dir / "kim-2.pdf").read_bytes()